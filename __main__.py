@@ -21,8 +21,13 @@ Author: Walker M. White (wmw2)
 Date:   November 1, 2017 (Python 3 Version)
 """
 from consts import *
+from config import *
 from app import *
+import sys
 
 # Application code
 if __name__ == '__main__':
-    Invaders(width=GAME_WIDTH,height=GAME_HEIGHT).run()
+    game = Invaders(width=GAME_WIDTH,height=GAME_HEIGHT,tick=1/TICK_RATE,
+                    catchup=MAX_CATCHUP)
+    game.setConfig(Config.fromArgs(sys.argv[1:]))
+    game.run()
@@ -12,6 +12,9 @@ December 4th 2018
 from consts import *
 from game2d import *
 from wave import *
+from rewind import *
+from config import *
+import random
 
 
 # PRIMARY RULE: Invaders can only access attributes in wave.py via getters/setters
@@ -49,7 +52,8 @@ class Invaders(GameApp):
         input:  the user input, used to control the ship and change state
                 [instance of GInput; it is inherited from GameApp]
         _state: the current state of the game represented as a value from consts.py
-                [one of STATE_INACTIVE, STATE_NEWWAVE, STATE_ACTIVE, STATE_PAUSED, STATE_CONTINUE, STATE_COMPLETE]
+                [one of STATE_INACTIVE, STATE_NEWWAVE, STATE_ACTIVE, STATE_PAUSED,
+                STATE_CONTINUE, STATE_COMPLETE, STATE_REWIND]
         _wave:  the subcontroller for a single wave, which manages the ships and aliens
                 [Wave, or None if there is no wave currently active]
         _text:  the currently active message
@@ -70,10 +74,44 @@ class Invaders(GameApp):
     self._storedlives = number of lives to start the game with
     self._alienspeed = alien speed of this wave
     self._score = score gained throughout the game
+    self._seed = seed of this game session; each wave is seeded from it [int]
+    self._waveNumber = number of waves finished before the current one [int >= 0]
+    self._rewind = the last REWIND_SECONDS of play of the current wave [RewindBuffer]
+    self._replay = the wave showing a rewound frame [Wave, or None if not rewinding]
+    self._frame = the frame of the rewind buffer that _replay shows [int >= 0]
+    self._resume = the state to return to when the rewind ends [ACTIVE or PAUSED state]
+    self._rewindKey = whether the 'R' key was down in the last update [bool]
+    self._factory = the builder of every wave, from prebuilt templates [WaveFactory]
+    self._next = the next wave, pre-built while a won wave is complete [Wave or None]
+    self._gameConfig = the settings of this session [Config; Config() unless setConfig
+                       was called before run]
     """
 
+    # The settings of a session that is never given any
+    _gameConfig = Config()
+
     # DO NOT MAKE A NEW INITIALIZER!
 
+    # GETTERS AND SETTERS
+    def getConfig(self):
+        """
+        Returns the attribute _gameConfig.
+        """
+        return self._gameConfig
+
+    def setConfig(self, config):
+        """
+        Sets the settings this session is played with.
+
+        Since this class has no initializer, this is how the settings are passed in.
+        It must be called before run, as start reads them.
+
+        Parameter config: the settings of the session
+        Precondition: a Config object
+        """
+        assert isinstance(config, Config), repr(config)
+        self._gameConfig = config
+
     # THREE MAIN GAMEAPP METHODS
     def start(self):
         """
@@ -94,9 +132,23 @@ class Invaders(GameApp):
         self._text = None
 
         self._storedlives = SHIP_LIVES
-        self._alienspeed = ALIEN_SPEED
+        self._alienspeed = self._gameConfig.getSpeed()
         self._score = 0
 
+        self._seed = self._gameConfig.getSeed()
+        if self._seed == None:
+            self._seed = random.randrange(2**32)
+        self._waveNumber = 0
+        self._factory = WaveFactory()
+        self._next = None
+
+        capacity = int(REWIND_SECONDS*TICK_RATE)
+        self._rewind = RewindBuffer(capacity, min(REWIND_KEYFRAME, capacity))
+        self._replay = None
+        self._frame = 0
+        self._resume = None
+        self._rewindKey = False
+
     def update(self,dt):
         """
         Animates a single frame in the game.
@@ -140,6 +192,12 @@ class Invaders(GameApp):
         You are allowed to add more states if you wish. Should you do so, you should
         describe them here.
 
+        STATE_REWIND: The last few seconds of the wave are shown for a post-mortem.
+        The application switches to this state from STATE_ACTIVE or STATE_PAUSED when
+        the player presses 'R'.  The left and right arrow keys scrub backward and
+        forward one frame per update, and 'R' again returns to the state the rewind
+        was started from.  The wave in play is not changed.
+
         Parameter dt: The time in seconds since last update
         Precondition: dt is a number (int or float)
         """
@@ -161,6 +219,11 @@ class Invaders(GameApp):
         if self._state == STATE_COMPLETE:
             self.COMPLETE()
 
+        if self._state == STATE_REWIND:
+            self.REWIND()
+
+        self._rewindKey = self.input.is_key_down('r')
+
     def draw(self):
         """
         Draws the game objects to the view.
@@ -173,24 +236,27 @@ class Invaders(GameApp):
         or you need to add a draw method to class Wave.  We suggest the latter.  See
         the example subcontroller.py from class.
         """
-        text_states = [STATE_INACTIVE,STATE_ACTIVE,STATE_PAUSED,STATE_COMPLETE]
+        text_states = [STATE_INACTIVE,STATE_ACTIVE,STATE_PAUSED,STATE_COMPLETE,
+                       STATE_REWIND]
         if self._state in text_states:
             self._text.draw(self.view)
 
         wave_states = [STATE_NEWWAVE, STATE_ACTIVE, STATE_CONTINUE]
         if self._state in wave_states:
-            self._wave.draw(self.view)
+            self._wave.draw(self.view, self.alpha)
+
+        if self._state == STATE_REWIND:
+            self._replay.draw(self.view)
 
     # HELPER METHODS FOR THE STATES GO HERE
     def INACTIVE(self):
         """
         Updates Inavdorders when its state is STATE_INACTIVE.
 
-        Before a wave has started, this method sets up Invader object for when
-        its state is inactive.
+        Before a wave has started, this method displays a welcome message. When
+        'S' key is pressed on keyboard, it allows transition into STATE_NEWWAVE
+        state, which builds the wave.
         """
-        self._wave = Wave(self._storedlives, self._alienspeed, self._score)
-
         text = "WELCOME! \nPRESS 'S' FOR SOME THRILL"
         x = GAME_WIDTH / 2
         y = GAME_HEIGHT / 2
@@ -205,8 +271,16 @@ class Invaders(GameApp):
 
         When it is time to create a new wave of aliens, this method get rids of
         previous state's text and allows transition into STATE_ACTIVE state.
+        The wave pre-built during STATE_COMPLETE is used if there is one. It
+        also starts recording the new wave for rewinds.
         """
+        if self._next != None:
+            self._wave = self._next
+            self._next = None
+        else:
+            self._wave = self.makeWave(self._alienspeed, self._waveNumber)
         self._text = None
+        self._rewind.clear()
         self._state = STATE_ACTIVE
 
     def ACTIVE(self, dt):
@@ -232,6 +306,11 @@ class Invaders(GameApp):
         top = GAME_HEIGHT - 10
         self.setText(text, x, y, 'RetroGame.ttf', 0.025, 'right', right, top)
 
+        if self._R_key_pressed():
+            self.startRewind(STATE_ACTIVE)
+            return
+
+        self._rewind.record(self._wave, dt, self.input)
         self._wave.update(dt, self.input)
         self._score = self._wave.getScore()
 
@@ -259,6 +338,8 @@ class Invaders(GameApp):
 
         if self._S_key_down():
             self._state = STATE_CONTINUE
+        elif self._R_key_pressed():
+            self.startRewind(STATE_PAUSED)
 
     def CONTINUE(self):
         """
@@ -268,6 +349,7 @@ class Invaders(GameApp):
         and allows transition back into STATE_ACTIVE state.
         """
         self._wave.setShip()
+        self._rewind.mark()
         self._state = STATE_ACTIVE
 
     def COMPLETE(self):
@@ -277,9 +359,13 @@ class Invaders(GameApp):
         When the game is over, this method displays a message demenstrating how
         this game ended: won or lost. In addition, if the player still has
         leftover lives but killed all the aliens, this method allows the player
-        to get a new Wave by pressing 'S' key on the keyboard.
+        to get a new Wave by pressing 'S' key on the keyboard.  That wave is built
+        on the first frame of this state, while the message is up, so that
+        starting it costs nothing.
         """
         if self._wave.getResult():
+            if self._next == None and self._wave.getLives() > 0:
+                self._next = self.makeWave(self._alienspeed*(1/2), self._waveNumber+1)
             text = "YOU WON!" + "\nPress 'S' for more thrill"
             text += "\n \nScore: " + str(self._score)
             x = GAME_WIDTH / 2
@@ -287,6 +373,7 @@ class Invaders(GameApp):
             self.setText(text, x, y, 'Arcade.ttf', 0.0625)
             if self._wave.getLives() > 0 and self._S_key_down():
                 self._alienspeed *= (1/2)
+                self._waveNumber += 1
                 self._state = STATE_INACTIVE
         else:
             text = "Invaded by Aliens.. \nGOODBYE"
@@ -295,6 +382,84 @@ class Invaders(GameApp):
             y = GAME_HEIGHT / 2
             self.setText(text, x, y, 'TimesBoldItalic.ttf', 0.05)
 
+    def REWIND(self):
+        """
+        Updates Invaders when its state is STATE_REWIND.
+
+        While rewinding, this method moves the shown frame one frame back or
+        forward when the left or right arrow key is down, and displays how far
+        back it is.  When 'R' is pressed again, it throws the replay away and
+        allows transition back into the state the rewind was started from.
+        """
+        if self._R_key_pressed():
+            self._replay = None
+            self._state = self._resume
+            return
+
+        frame = self._frame
+        if self.input.is_key_down('left') and frame > self._rewind.getStart():
+            frame -= 1
+        if self.input.is_key_down('right') and frame < self._rewind.getEnd():
+            frame += 1
+        if frame != self._frame:
+            self._rewind.seek(self._replay, frame, self._frame)
+            self._frame = frame
+
+        back = (self._rewind.getEnd() - self._frame) / TICK_RATE
+        text = "REWIND  -%.2fs" % back
+        text += "\nLEFT/RIGHT TO SCRUB, 'R' TO RETURN"
+        x = GAME_WIDTH/2
+        y = GAME_HEIGHT/2
+        right = GAME_WIDTH - 30
+        top = GAME_HEIGHT - 10
+        self.setText(text, x, y, 'RetroGame.ttf', 0.025, 'right', right, top)
+
+    def startRewind(self, resume):
+        """
+        Starts a rewind of the current wave, showing its latest frame.
+
+        Nothing happens if no frame of this wave has been recorded yet.
+
+        Parameter resume: the state to return to when the rewind ends
+        Precondition: STATE_ACTIVE or STATE_PAUSED
+        """
+        if self._rewind.getStart() == None:
+            return
+        self._replay = self.makeWave(self._alienspeed, self._waveNumber)
+        self._frame = self._rewind.getEnd()
+        self._rewind.seek(self._replay, self._frame)
+        self._resume = resume
+        self._state = STATE_REWIND
+
+    def makeWave(self, alienspeed, number):
+        """
+        Returns a new wave with the stored lives and score.
+
+        The size and shape of the formation, the number of bunkers and of special
+        aliens, how often aliens dive, and whether the wave is played in bullet-hell
+        mode are given by the settings of the session.
+
+        Parameter alienspeed: the number of seconds between alien steps
+        Precondition: a float between 0 < alienspeed <= 1
+
+        Parameter number: the number of waves finished before that wave
+        Precondition: an int >= 0
+        """
+        config = self._gameConfig.withSeed(self.waveSeed(number))
+        return self._factory.make(self._storedlives, alienspeed, self._score, config)
+
+    def waveSeed(self, number):
+        """
+        Returns the seed for the wave with the given number.
+
+        The seed depends only on the session seed and the wave number, so the
+        same session seed replays every wave with the same random choices.
+
+        Parameter number: the number of waves finished before that wave
+        Precondition: an int >= 0
+        """
+        return (self._seed, number)
+
     def _S_key_down(self):
         """
         Returns True if the 'S' key from keyboard is down.
@@ -304,6 +469,18 @@ class Invaders(GameApp):
         else:
             return False
 
+    def _R_key_pressed(self):
+        """
+        Returns True if the 'R' key from keyboard went down since the last update.
+
+        A press is only reported once, even if this is called again in the same
+        update.
+        """
+        down = self.input.is_key_down('r')
+        pressed = down and not self._rewindKey
+        self._rewindKey = down
+        return pressed
+
     def setText(self, text, x, y, fname, fsize, halign='center', r=None, t=None):
         """
         Creates a GLable text object and set it to the Invadors attribut _text.
@@ -0,0 +1,239 @@
+"""
+Bullet-hell module for Alien Invaders
+
+This module contains the storage for the high-density fire mode, in which many aliens
+fire at once and thousands of alien bolts can be on screen.  Instead of one bolt entity
+per shot, a BoltField keeps the position, velocity and live state of every bolt in
+NumPy arrays.  Moving the bolts, removing the ones that left the screen and testing
+them against the ship are each a few vectorized operations, whatever the bolt count.
+"""
+from consts import *
+import numpy as np
+
+
+class BoltField(object):
+    """
+    A class storing many alien bolts as a struct of arrays.
+
+    Live bolts are packed at the front of the arrays.  Dead bolts are squeezed out
+    once per update, so the live ones are always the slice [0:_size].  The arrays
+    double in size when they run out of room.
+
+    INSTANCE ATTRIBUTES:
+        _x:    the x coordinate of each bolt [float array]
+        _y:    the y coordinate of each bolt [float array]
+        _vy:   the velocity in y direction of each bolt [float array]
+        _size: the number of live bolts [int >= 0]
+        _scale: the number of BASE_RATE updates the last advance covered [float > 0]
+        _random: the random stream deciding which aliens fire [numpy Generator]
+    """
+
+    # GETTERS AND SETTERS
+    def getSize(self):
+        """
+        Returns the attribute _size.
+        """
+        return self._size
+
+    def getPositions(self, alpha=1.0):
+        """
+        Returns the x and y coordinates of the live bolts as a pair of arrays.
+
+        The arrays may be views into the field and must not be modified.
+
+        Parameter alpha: how far real time is past the start of the current step
+        Precondition: a float in 0..1, where 1 means the current positions
+        """
+        x = self._x[:self._size]
+        y = self._y[:self._size]
+        if alpha < 1:
+            y = y - self._vy[:self._size]*self._scale*(1-alpha)
+        return (x, y)
+
+    def getState(self):
+        """
+        Returns the live bolts as a tuple (xs, ys, vys, scale) for a snapshot.
+
+        The arrays are copies.  The random stream is not included.
+        """
+        n = self._size
+        return (self._x[:n].copy(), self._y[:n].copy(), self._vy[:n].copy(), self._scale)
+
+    def setState(self, xs, ys, vys, scale):
+        """
+        Replaces the bolts of the field, as recorded by getState.
+
+        Parameter xs: the x coordinates of the bolts
+        Precondition: a 1d array of numbers
+
+        Parameter ys: the y coordinates of the bolts
+        Precondition: a 1d array of numbers, the same length as xs
+
+        Parameter vys: the velocity in y direction of the bolts
+        Precondition: a 1d array of numbers, the same length as xs
+
+        Parameter scale: the number of BASE_RATE updates the last advance covered
+        Precondition: a float > 0
+        """
+        self._size = 0
+        self.spawn(xs, ys, vys)
+        self._scale = scale
+
+    # INITIALIZER
+    def __init__(self, capacity=1024, rng=None):
+        """
+        Creates an empty field.
+
+        Parameter capacity: the number of bolts to make room for up front
+        Precondition: an int > 0
+
+        Parameter rng: the random stream deciding which aliens fire
+        Precondition: a numpy Generator, or None for a fresh one
+        """
+        self._x = np.zeros(capacity)
+        self._y = np.zeros(capacity)
+        self._vy = np.zeros(capacity)
+        self._size = 0
+        self._scale = 1.0
+        self._random = rng if rng is not None else np.random.default_rng()
+
+    # FIELD METHODS
+    def spawn(self, xs, ys, vy):
+        """
+        Adds a batch of bolts to the field.
+
+        Parameter xs: the x coordinates of the new bolts
+        Precondition: a 1d array of numbers
+
+        Parameter ys: the y coordinates of the new bolts
+        Precondition: a 1d array of numbers, the same length as xs
+
+        Parameter vy: the velocity in y direction of the new bolts
+        Precondition: a number, or a 1d array the same length as xs
+        """
+        n = len(xs)
+        if self._size + n > len(self._x):
+            self._grow(self._size + n)
+        end = self._size + n
+        self._x[self._size:end] = xs
+        self._y[self._size:end] = ys
+        self._vy[self._size:end] = vy
+        self._size = end
+
+    def volley(self, xs, ys, chance, height=ALIEN_HEIGHT):
+        """
+        Fires a bolt from each of the given aliens with the given chance.
+
+        Parameter xs: the x coordinates of the aliens that may fire
+        Precondition: a 1d array of numbers
+
+        Parameter ys: the y coordinates of the aliens that may fire
+        Precondition: a 1d array of numbers, the same length as xs
+
+        Parameter chance: the chance that each alien fires
+        Precondition: a float 0 <= chance <= 1
+
+        Parameter height: the height of the aliens; bolts start at their bottom edge
+        Precondition: a number > 0
+        """
+        fire = self._random.random(len(xs)) < chance
+        if fire.any():
+            self.spawn(xs[fire], ys[fire] - height/2, -BARRAGE_SPEED)
+
+    def _grow(self, needed):
+        """
+        Enlarges the arrays to hold at least the given number of bolts.
+
+        Parameter needed: the number of bolts the field must hold
+        Precondition: an int > the current capacity
+        """
+        capacity = len(self._x)
+        while capacity < needed:
+            capacity *= 2
+        for name in ('_x', '_y', '_vy'):
+            old = getattr(self, name)
+            new = np.zeros(capacity)
+            new[:self._size] = old[:self._size]
+            setattr(self, name, new)
+
+    def advance(self, scale=1.0):
+        """
+        Moves every bolt by its velocity and removes the ones that left the screen.
+
+        Parameter scale: how many BASE_RATE updates this step covers
+        Precondition: a float > 0
+        """
+        n = self._size
+        self._scale = scale
+        self._y[:n] += self._vy[:n]*scale
+        y = self._y[:n]
+        keep = (y + BOLT_HEIGHT/2 > 0) & (y - BOLT_HEIGHT/2 < GAME_HEIGHT)
+        self._compact(keep)
+
+    def collides(self, model):
+        """
+        Returns the number of bolts that hit the model, and removes them.
+
+        This is Ship.collides applied to every bolt at once: each bolt is swept
+        over the distance it moved in the last advance, and hits when that swept
+        box overlaps the model.
+
+        Parameter model: the object the bolts are fired at
+        Precondition: a Model object (usually the Ship)
+        """
+        n = self._size
+        w = model.width/2
+        h = model.height/2
+        dx = self._x[:n] - model.x
+        y = self._y[:n]
+        before = y - self._vy[:n]*self._scale
+        low = np.minimum(y, before)
+        high = np.maximum(y, before)
+        inx = (np.abs(dx - BOLT_WIDTH/2) < w) | (np.abs(dx + BOLT_WIDTH/2) < w)
+        iny = (model.y - h < high + BOLT_HEIGHT/2) & (model.y + h > low - BOLT_HEIGHT/2)
+        hit = inx & iny
+        hits = int(np.count_nonzero(hit))
+        if hits > 0:
+            self._compact(~hit)
+        return hits
+
+    def strike(self, bunkers):
+        """
+        Returns the number of bolts stopped by the bunkers, and removes them.
+
+        Each bolt is swept over the distance it moved in the last advance, like in
+        collides, and erodes the bunker it hits (see Bunkers.strike).
+
+        Parameter bunkers: the bunkers the bolts may hit
+        Precondition: a Bunkers object
+        """
+        n = self._size
+        y = self._y[:n]
+        before = y - self._vy[:n]*self._scale
+        hit = bunkers.strike(self._x[:n], np.minimum(y, before), np.maximum(y, before),
+                             True)
+        hits = int(np.count_nonzero(hit))
+        if hits > 0:
+            self._compact(~hit)
+        return hits
+
+    def clear(self):
+        """
+        Removes every bolt from the field.
+        """
+        self._size = 0
+
+    def _compact(self, keep):
+        """
+        Squeezes the live bolts to the front of the arrays.
+
+        Parameter keep: which of the current bolts stay in the field
+        Precondition: a bool array of length _size
+        """
+        n = self._size
+        k = int(np.count_nonzero(keep))
+        if k == n:
+            return
+        for array in (self._x, self._y, self._vy):
+            array[:k] = array[:n][keep]
+        self._size = k
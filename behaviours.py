@@ -0,0 +1,282 @@
+"""
+Alien behaviour module for Alien Invaders
+
+This module contains the scripts for special aliens.  Each behaviour is a generator
+function of a wave, the (row,col) slot of an alien in its formation, the phase to start
+at and the parameters of the behaviour.  Start one by name with Wave.addScript:
+
+    wave.addScript('shieldBearer', (0, 3))
+
+A behaviour only uses the public methods of Wave, and ends on its own once its alien is
+dead (a splitter splits it first).  See scripts.py for what a script may yield.
+
+Every wait a behaviour yields names the phase it resumes at, and the behaviour can be
+started at any of its phases.  Phase 0 is the start.  A wave stores a running behaviour
+in a snapshot as its name, slot, parameters, wait and phase, and restore starts it
+again at that phase, so a restored wave runs its special aliens exactly like the
+original.
+"""
+from consts import *
+from scripts import *
+from dives import *
+import struct
+
+
+def shieldBearer(wave, slot, phase, every, hold):
+    """
+    Runs an alien that raises a shield every few steps and holds it for a while.
+
+    While the shield is up, a player bolt that hits the alien is used up and the alien
+    survives.
+
+    Phases: 0 waits for the steps, 1 raises the shield and 2 lowers it.
+
+    Parameter wave: the wave of the alien
+    Precondition: a Wave object
+
+    Parameter slot: the (row,col) slot of the alien
+    Precondition: a slot of a living alien in the formation of wave
+
+    Parameter phase: the phase to start at
+    Precondition: an int in 0..2
+
+    Parameter every: the number of alien steps between shields
+    Precondition: an int > 0
+
+    Parameter hold: the number of seconds a shield stays up
+    Precondition: a number > 0
+    """
+    while True:
+        if phase == 0:
+            if not wave.isAlienAlive(slot):
+                return
+            phase = 1
+            yield WaitSteps(every, phase)
+        elif phase == 1:
+            if not wave.isAlienAlive(slot):
+                return
+            wave.setShield(slot, True)
+            phase = 2
+            yield WaitSeconds(hold, phase)
+        else:
+            wave.setShield(slot, False)
+            phase = 0
+
+
+def gunner(wave, slot, phase, every, burst, gap):
+    """
+    Runs an alien that fires a burst of bolts every few steps.
+
+    These bolts are on top of the usual alien fire.
+
+    Phases: 0 waits for the steps, and k in 1..burst fires the k-th bolt of a burst.
+
+    Parameter wave: the wave of the alien
+    Precondition: a Wave object
+
+    Parameter slot: the (row,col) slot of the alien
+    Precondition: a slot of a living alien in the formation of wave
+
+    Parameter phase: the phase to start at
+    Precondition: an int in 0..burst
+
+    Parameter every: the number of alien steps between bursts
+    Precondition: an int > 0
+
+    Parameter burst: the number of bolts in a burst
+    Precondition: an int > 0
+
+    Parameter gap: the number of seconds between the bolts of a burst
+    Precondition: a number >= 0
+    """
+    while True:
+        if not wave.isAlienAlive(slot):
+            return
+        if phase == 0:
+            phase = 1
+            yield WaitSteps(every, phase)
+        else:
+            wave.fireFrom(slot)
+            phase = phase+1 if phase < burst else 0
+            yield WaitSeconds(gap, phase)
+
+
+def diver(wave, slot, phase, every, path):
+    """
+    Runs an alien that leaves the formation on a dive every few steps.
+
+    The alien flies the path and comes back to its slot (see Wave.startDive), then
+    waits again.  It dives towards the middle of the screen.  If the alien is already
+    away on a dive when its turn comes, it waits for that dive to end instead.
+
+    Phases: 0 waits for the steps, 1 starts the dive and 2 waits for it to end.
+
+    Parameter wave: the wave of the alien
+    Precondition: a Wave object
+
+    Parameter slot: the (row,col) slot of the alien
+    Precondition: a slot of a living alien in the formation of wave
+
+    Parameter phase: the phase to start at
+    Precondition: an int in 0..2
+
+    Parameter every: the number of alien steps between dives
+    Precondition: an int > 0
+
+    Parameter path: the path to fly, as its place in dives.PATH_NAMES
+    Precondition: an int with 0 <= path < len(PATH_NAMES)
+    """
+    while True:
+        if phase == 0:
+            if not wave.isAlienAlive(slot):
+                return
+            phase = 1
+            yield WaitSteps(every, phase)
+        elif phase == 1:
+            if not wave.isAlienAlive(slot):
+                return
+            if not wave.isDiving(slot):
+                wave.startDive(slot, PATH_NAMES[path])
+            phase = 2
+        elif wave.isDiving(slot):
+            yield WaitSeconds(0.1, phase)
+        else:
+            phase = 0
+
+
+def splitter(wave, slot, phase, every):
+    """
+    Runs an alien that splits in two when it is shot.
+
+    The alien looks at itself every few steps.  Once it is dead, a new alien appears
+    in each empty slot next to it in its row, and the behaviour ends.  The new aliens
+    are ordinary ones.
+
+    Phases: 0 waits for the steps and 1 splits the alien if it is dead.
+
+    Parameter wave: the wave of the alien
+    Precondition: a Wave object
+
+    Parameter slot: the (row,col) slot of the alien
+    Precondition: a slot of a living alien in the formation of wave
+
+    Parameter phase: the phase to start at
+    Precondition: an int in 0..1
+
+    Parameter every: the number of alien steps between looks
+    Precondition: an int > 0
+    """
+    while True:
+        if phase == 0:
+            phase = 1
+            yield WaitSteps(every, phase)
+        elif wave.isAlienAlive(slot):
+            phase = 0
+        else:
+            row, col = slot
+            for piece in ((row, col-1), (row, col+1)):
+                if wave.isSlotEmpty(piece):
+                    wave.reviveAlien(piece)
+            return
+
+
+# The behaviours a wave can run; a behaviour is stored in snapshots by its place here
+BEHAVIOURS = ('shieldBearer', 'gunner', 'diver', 'splitter')
+
+# The function, default parameters and parameter layout in snapshots of each behaviour
+_TABLE = {
+    'shieldBearer': (shieldBearer, (8, 2.0), struct.Struct('<qd')),
+    'gunner':       (gunner, (6, 3, 0.2), struct.Struct('<qqd')),
+    'diver':        (diver, (10, 0), struct.Struct('<qB')),
+    'splitter':     (splitter, (1,), struct.Struct('<q')),
+}
+
+
+def isBehaviour(kind):
+    """
+    Returns True if kind is the name of a behaviour.
+
+    Parameter kind: the name to check
+    Precondition: any value
+    """
+    return kind in BEHAVIOURS
+
+
+def behaviourIndex(kind):
+    """
+    Returns the place of the named behaviour in BEHAVIOURS.
+
+    Parameter kind: the name of the behaviour
+    Precondition: a str for which isBehaviour is True
+    """
+    assert isBehaviour(kind), repr(kind)
+    return BEHAVIOURS.index(kind)
+
+
+def fillParams(kind, params):
+    """
+    Returns all the parameters of a behaviour, the missing ones taking their defaults.
+
+    Parameter kind: the name of the behaviour
+    Precondition: a str for which isBehaviour is True
+
+    Parameter params: the first parameters of the behaviour, after the phase
+    Precondition: a sequence of numbers, no longer than the parameters of kind
+    """
+    defaults = _TABLE[kind][1]
+    assert len(params) <= len(defaults), repr(params)
+    return tuple(params) + defaults[len(params):]
+
+
+def startBehaviour(wave, kind, slot, params, phase=0):
+    """
+    Returns a new generator running a behaviour from the given phase.
+
+    Parameter wave: the wave of the alien
+    Precondition: a Wave object
+
+    Parameter kind: the name of the behaviour
+    Precondition: a str for which isBehaviour is True
+
+    Parameter slot: the (row,col) slot of the alien
+    Precondition: a slot of the formation of wave
+
+    Parameter params: the parameters of the behaviour
+    Precondition: a tuple returned by fillParams for kind
+
+    Parameter phase: the phase to start at
+    Precondition: an int >= 0 that is a phase of kind
+    """
+    return _TABLE[kind][0](wave, slot, phase, *params)
+
+
+def packParams(kind, params):
+    """
+    Returns the parameters of a behaviour packed as bytes, for a snapshot.
+
+    Parameter kind: the name of the behaviour
+    Precondition: a str for which isBehaviour is True
+
+    Parameter params: the parameters of the behaviour
+    Precondition: a tuple returned by fillParams for kind
+    """
+    return _TABLE[kind][2].pack(*params)
+
+
+def unpackParams(kind, data, pos):
+    """
+    Returns the parameters of a behaviour read from bytes, and the position after them.
+
+    The result is a pair (params, pos).
+
+    Parameter kind: the name of the behaviour
+    Precondition: a str for which isBehaviour is True
+
+    Parameter data: the bytes to read from
+    Precondition: a bytes-like object holding what packParams returned at pos
+
+    Parameter pos: the position to read at
+    Precondition: an int >= 0
+    """
+    layout = _TABLE[kind][2]
+    return (layout.unpack_from(data, pos), pos + layout.size)
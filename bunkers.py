@@ -0,0 +1,389 @@
+"""
+Bunker module for Alien Invaders
+
+This module contains the destructible bunkers that stand between the ship and the
+defensive line.  Every bunker is a bitmask of square cells, BUNKER_CELL pixels wide, and
+all the bunkers of a wave share one NumPy array of shape (count, rows, cols).  Row 0 of
+a mask is the bottom of its bunker, like the y axis of the screen.
+
+A bolt is tested by slicing out the cells under its swept rectangle, so a test costs
+the same however large or damaged the bunker is.  A bolt that meets a solid cell is
+stopped there, and a crater stencil is cut out of the mask around the impact.  The
+lowest and highest solid row of every column are kept up to date as cells are cut, and
+so is the band of heights a bolt can touch at each pixel column of the screen.  A batch
+of bolts is tested against that band with one gather, and only the bolts inside it,
+which are nearly all bolts that hit, are tested cell by cell.  The cells that changed
+since the bunkers were last drawn are remembered as one rectangle per bunker, so the
+renderer only copies that part of the bunker to its texture.
+
+This is independent of game2d, like the models.
+"""
+from consts import *
+from shapes import *
+import numpy as np
+import bisect
+import math
+
+# The cells a bolt impact removes, centered on the cell that was hit
+_CRATER = maskFromLines(['..X.X..',
+                         '.XXXXX.',
+                         'XXXXXXX',
+                         '.XXXXXX',
+                         'XXXXXXX',
+                         '.XXXXX.',
+                         '..X.X..'])
+
+
+class Bunkers(object):
+    """
+    A class storing the bunkers of a wave as bitmasks.
+
+    The bunkers are spread evenly across the screen, in order from the left, with
+    their bottom at BUNKER_BOTTOM.
+
+    INSTANCE ATTRIBUTES:
+        _mask:  whether each cell of each bunker is solid
+                [bool array of shape (count, _rows, _cols), row 0 at the bottom]
+        _rows:  the number of rows of cells in a bunker [int > 0]
+        _cols:  the number of columns of cells in a bunker [int > 0]
+        _lefts: the x coordinate of the left edge of each bunker
+                [list of float, increasing]
+        _leftArray: _lefts as an array, for batches of bolts [float array]
+        _bottoms: the lowest solid row of each column of each bunker, with an empty
+                  column at the end [int array of length count*_cols+1, _rows if the
+                  column is empty]
+        _tops:  one more than the highest solid row of each column of each bunker,
+                with an empty column at the end [int array of length count*_cols+1,
+                0 if the column is empty]
+        _cells: the bunker columns a bolt with its center in each pixel column of the
+                screen may touch, as places in _tops [int array of shape
+                (GAME_WIDTH, k), padded with the empty column]
+        _lowest:  the lowest y coordinate of the center of a bolt in each pixel column
+                  at which it may touch a solid cell [float array of length
+                  GAME_WIDTH, inf if none]
+        _highest: the highest such y coordinate [float array of length GAME_WIDTH,
+                  -inf if none]
+        _dirty: the cells of each bunker changed since takeDirty was last called
+                [list of [row0, row1, col0, col1] (ends excluded), or None if unchanged]
+    """
+
+    # GETTERS AND SETTERS
+    def getCount(self):
+        """
+        Returns the number of bunkers.
+        """
+        return len(self._lefts)
+
+    def getSize(self):
+        """
+        Returns the (rows,cols) of cells in a bunker.
+        """
+        return (self._rows, self._cols)
+
+    def getMask(self, i):
+        """
+        Returns the bitmask of a bunker, with row 0 at the bottom.
+
+        The result is a view of the bunker and must not be modified.
+
+        Parameter i: the bunker, counting from the left
+        Precondition: an int with 0 <= i < getCount()
+        """
+        return self._mask[i]
+
+    def getBounds(self, i):
+        """
+        Returns the (left, bottom, width, height) of a bunker on the screen.
+
+        Parameter i: the bunker, counting from the left
+        Precondition: an int with 0 <= i < getCount()
+        """
+        return (self._lefts[i], BUNKER_BOTTOM, self._cols*BUNKER_CELL,
+                self._rows*BUNKER_CELL)
+
+    def getState(self):
+        """
+        Returns the bitmasks of every bunker as packed bytes, for a snapshot.
+        """
+        return np.packbits(self._mask).tobytes()
+
+    def setState(self, data):
+        """
+        Replaces the bitmasks of every bunker, as recorded by getState.
+
+        Only the bunkers whose bitmask differs are measured again, and each of them
+        is then changed as a whole.  Restoring a snapshot taken a few frames ago, as
+        a fork or a rewind does, usually leaves every bunker alone.
+
+        Parameter data: the packed bitmasks
+        Precondition: a bytes-like object returned by getState on bunkers of the
+        same count and size
+        """
+        bits = np.frombuffer(data, dtype=np.uint8)
+        mask = np.unpackbits(bits, count=self._mask.size).reshape(self._mask.shape)
+        changed = (mask != self._mask).any(axis=(1, 2))
+        for i in np.flatnonzero(changed).tolist():
+            self._mask[i] = mask[i]
+            self._measure(i, 0, self._cols)
+            self._dirty[i] = [0, self._rows, 0, self._cols]
+
+    def takeDirty(self, i):
+        """
+        Returns the cells of a bunker changed since the last call, and forgets them.
+
+        The result is (row0, row1, col0, col1), the rows row0 <= row < row1 and the
+        columns col0 <= col < col1, or None if nothing changed.  A new bunker is
+        changed as a whole.
+
+        Parameter i: the bunker, counting from the left
+        Precondition: an int with 0 <= i < getCount()
+        """
+        dirty = self._dirty[i]
+        self._dirty[i] = None
+        return None if dirty == None else tuple(dirty)
+
+    # INITIALIZER
+    def __init__(self, count=BUNKER_COUNT):
+        """
+        Creates the given number of undamaged bunkers.
+
+        Parameter count: the number of bunkers
+        Precondition: an int with 0 <= count <= GAME_WIDTH // BUNKER_WIDTH
+        """
+        assert 0 <= count <= GAME_WIDTH // BUNKER_WIDTH, repr(count)
+        self._rows = BUNKER_HEIGHT // BUNKER_CELL
+        self._cols = BUNKER_WIDTH // BUNKER_CELL
+        shape = Bunkers.makeShape(self._rows, self._cols)
+        self._mask = np.repeat(shape.reshape(1, self._rows, self._cols), count, axis=0)
+        self._lefts = [GAME_WIDTH*(2*i+1)/(2*count) - BUNKER_WIDTH/2
+                       for i in range(count)]
+        self._leftArray = np.array(self._lefts, dtype=float)
+        self._bottoms = np.full(count*self._cols+1, self._rows)
+        self._tops = np.zeros(count*self._cols+1, dtype=int)
+        self._cells = self._findCells()
+        self._lowest = np.empty(GAME_WIDTH)
+        self._highest = np.empty(GAME_WIDTH)
+        self._measure(slice(None), 0, self._cols)
+        self._dirty = [[0, self._rows, 0, self._cols] for i in range(count)]
+
+    @staticmethod
+    def makeShape(rows, cols):
+        """
+        Returns the bitmask of an undamaged bunker: a block with its top corners cut
+        off and an arch under the middle.
+
+        Parameter rows: the number of rows of cells
+        Precondition: an int > 0
+
+        Parameter cols: the number of columns of cells
+        Precondition: an int > 0
+        """
+        r = np.arange(rows).reshape(rows, 1)
+        c = np.arange(cols).reshape(1, cols)
+        below = rows-1 - r    # Rows from the top
+        corner = rows // 3
+        corners = (c + below < corner) | (cols-1 - c + below < corner)
+        arch = (np.abs(c - (cols-1)/2) < cols/6) & (r < rows*2 // 5)
+        return ~(corners | arch)
+
+    # BUNKER METHODS
+    def find(self, x):
+        """
+        Returns the bunker a bolt with its center at x overlaps horizontally, or -1.
+
+        Parameter x: the horizontal coordinate of the center of the bolt
+        Precondition: a number
+        """
+        i = bisect.bisect_left(self._lefts, x + BOLT_WIDTH/2) - 1
+        if i < 0 or x - BOLT_WIDTH/2 >= self._lefts[i] + self._cols*BUNKER_CELL:
+            return -1
+        return i
+
+    def hit(self, x, low, high, falling):
+        """
+        Returns the cell where a bolt meets a bunker, or None if it meets none.
+
+        The bolt is swept from low to high, like in Formation.collides, and the
+        cells under the swept rectangle are sliced out of the mask and tested at
+        once.  The cell returned is the first solid one the bolt reaches: the
+        highest for a falling bolt, the lowest for a rising one.  The result is
+        (bunker, row, col), with col the column under the center of the bolt.
+        Nothing is changed; see erode.
+
+        Parameter x: the horizontal coordinate of the center of the bolt
+        Precondition: a number
+
+        Parameter low: the lowest y coordinate of the center of the bolt this step
+        Precondition: a number
+
+        Parameter high: the highest y coordinate of the center of the bolt this step
+        Precondition: a number >= low
+
+        Parameter falling: whether the bolt flies down
+        Precondition: a bool
+        """
+        bottom = low - BOLT_HEIGHT/2 - BUNKER_BOTTOM
+        top = high + BOLT_HEIGHT/2 - BUNKER_BOTTOM
+        if top <= 0 or bottom >= self._rows*BUNKER_CELL:
+            return None
+        i = self.find(x)
+        if i < 0:
+            return None
+        x -= self._lefts[i]
+
+        row0 = max(0, math.floor(bottom/BUNKER_CELL))
+        row1 = min(self._rows, math.ceil(top/BUNKER_CELL))
+        col0 = max(0, math.floor((x - BOLT_WIDTH/2)/BUNKER_CELL))
+        col1 = min(self._cols, math.ceil((x + BOLT_WIDTH/2)/BUNKER_CELL))
+        solid = np.flatnonzero(self._mask[i, row0:row1, col0:col1].any(axis=1))
+        if len(solid) == 0:
+            return None
+        row = row0 + int(solid[-1] if falling else solid[0])
+        col = min(max(int(x // BUNKER_CELL), 0), self._cols-1)
+        return (i, row, col)
+
+    def erode(self, impact):
+        """
+        Cuts the crater stencil out of a bunker, centered on the given cell.
+
+        Parameter impact: the cell that was hit
+        Precondition: a (bunker, row, col) triple returned by hit
+        """
+        i, row, col = impact
+        height, width = _CRATER.shape
+        top = row - height//2
+        left = col - width//2
+        row0 = max(0, top)
+        row1 = min(self._rows, top + height)
+        col0 = max(0, left)
+        col1 = min(self._cols, left + width)
+        stencil = _CRATER[row0-top:row1-top, col0-left:col1-left]
+        self._mask[i, row0:row1, col0:col1] &= ~stencil
+        self._measure(i, col0, col1)
+
+        dirty = self._dirty[i]
+        if dirty == None:
+            self._dirty[i] = [row0, row1, col0, col1]
+        else:
+            dirty[0] = min(dirty[0], row0)
+            dirty[1] = max(dirty[1], row1)
+            dirty[2] = min(dirty[2], col0)
+            dirty[3] = max(dirty[3], col1)
+
+    def strike(self, xs, lows, highs, falling):
+        """
+        Returns which bolts of a batch are stopped by the bunkers, eroding the
+        bunkers where they hit.
+
+        Every bolt is first tested against the band of heights it may touch a
+        solid cell at, where it is (see _measure).  That takes one gather however
+        many bolts there are, and a bolt outside the band misses every cell.  Only
+        the bolts inside it, which are nearly all bolts that hit, are tested one by
+        one, in order, each against the masks as the bolts before it left them.
+        Cutting craters only removes cells, so a bolt outside the band before them
+        would miss after them too.
+
+        Parameter xs: the horizontal coordinates of the centers of the bolts
+        Precondition: a 1d array of numbers
+
+        Parameter lows: the lowest y coordinate of the center of each bolt this step
+        Precondition: a 1d array of numbers, the same length as xs
+
+        Parameter highs: the highest y coordinate of the center of each bolt this step
+        Precondition: a 1d array of numbers, the same length as xs, >= lows
+
+        Parameter falling: whether the bolts fly down
+        Precondition: a bool
+        """
+        hit = np.zeros(len(xs), dtype=bool)
+        if len(self._lefts) == 0:
+            return hit
+        pixels = np.clip(xs.astype(int), 0, GAME_WIDTH-1)
+        inside = (lows < self._highest[pixels]) & (highs > self._lowest[pixels])
+        ks = np.flatnonzero(inside)
+        for k in ks.tolist():
+            impact = self.hit(float(xs[k]), float(lows[k]), float(highs[k]), falling)
+            if impact != None:
+                self.erode(impact)
+                hit[k] = True
+        return hit
+
+    def _findCells(self):
+        """
+        Returns the bunker columns a bolt with its center in each pixel column of the
+        screen may touch, for the attribute _cells.
+
+        A bolt with its center in [p, p+1) reaches BOLT_WIDTH/2 to either side.  A
+        bunker column counts if it is within a pixel of that, to be safe from
+        rounding.  The columns of each pixel column are consecutive, in the order of
+        _tops, as the bunkers are in order from the left.
+        """
+        count = len(self._lefts)
+        if count == 0:
+            return np.zeros((GAME_WIDTH, 1), dtype=int)
+        lefts = (self._leftArray.reshape(count, 1) +
+                 np.arange(self._cols)*BUNKER_CELL).reshape(count*self._cols)
+        pixels = np.arange(GAME_WIDTH).reshape(GAME_WIDTH, 1)
+        reach = BOLT_WIDTH/2 + 1
+        near = (lefts <= pixels + 1 + reach) & (lefts + BUNKER_CELL >= pixels - reach)
+        counts = near.sum(axis=1)
+        width = max(1, int(counts.max()))
+        cells = near.argmax(axis=1).reshape(GAME_WIDTH, 1) + np.arange(width)
+        return np.where(np.arange(width) < counts.reshape(GAME_WIDTH, 1), cells,
+                        count*self._cols)
+
+    def _measure(self, i, col0, col1):
+        """
+        Recomputes the lowest and highest solid row of some columns of bunkers, and
+        the heights bolts may touch a solid cell at near them.
+
+        A bolt may touch a solid cell of a column if its swept rectangle reaches
+        from below the top of the highest cell to above the bottom of the lowest
+        one.  The heights are widened by a pixel, to be safe from rounding.
+
+        Parameter i: the bunker to measure
+        Precondition: an int with 0 <= i < getCount(), or slice(None) for all
+
+        Parameter col0: the first column to measure
+        Precondition: an int with 0 <= col0 <= _cols
+
+        Parameter col1: the column after the last one to measure
+        Precondition: an int with col0 <= col1 <= _cols
+        """
+        mask = self._mask[i, :, col0:col1]
+        solid = mask.any(axis=-2)
+        bottoms = self._bottoms[:-1].reshape(len(self._lefts), self._cols)
+        tops = self._tops[:-1].reshape(len(self._lefts), self._cols)
+        bottoms[i, col0:col1] = np.where(solid, mask.argmax(axis=-2), self._rows)
+        heights = self._rows - mask[..., ::-1, :].argmax(axis=-2)
+        tops[i, col0:col1] = np.where(solid, heights, 0)
+
+        if type(i) == int:
+            reach = int(math.ceil(BOLT_WIDTH/2)) + 2
+            p0 = max(0, int(self._lefts[i] + col0*BUNKER_CELL) - reach)
+            right = int(math.ceil(self._lefts[i] + col1*BUNKER_CELL))
+            p1 = min(GAME_WIDTH, right + reach)
+        else:
+            p0, p1 = 0, GAME_WIDTH
+        cells = self._cells[p0:p1]
+        top = self._tops[cells].max(axis=1)
+        bottom = self._bottoms[cells].min(axis=1)
+        empty = top == 0
+        highest = BUNKER_BOTTOM + top*BUNKER_CELL + BOLT_HEIGHT/2 + 1
+        lowest = BUNKER_BOTTOM + bottom*BUNKER_CELL - BOLT_HEIGHT/2 - 1
+        self._highest[p0:p1] = np.where(empty, -np.inf, highest)
+        self._lowest[p0:p1] = np.where(empty, np.inf, lowest)
+
+    def getReach(self, x):
+        """
+        Returns the heights at which a bolt with its center at x may meet a solid cell.
+
+        The result is a pair (low, high): a bolt swept from y0 to y1 can only be
+        stopped if max(y0,y1) > low and min(y0,y1) < high.  It is (inf, -inf) if the
+        bolt cannot meet any cell.
+
+        Parameter x: the horizontal coordinate of the center of the bolt
+        Precondition: a number
+        """
+        pixel = min(max(int(x), 0), GAME_WIDTH-1)
+        return (float(self._lowest[pixel]), float(self._highest[pixel]))
@@ -0,0 +1,179 @@
+"""
+Collision module for Alien Invaders
+
+This module contains the collision layers of the game and the pass that finds contacts
+between them.  Every kind of object is in a layer: the ship, the aliens, the player
+bolts, the alien bolts, the aliens out of the formation on a dive and the bunkers.  A
+CollisionMatrix says which pairs of layers can collide, and a CollisionPass runs the
+test of every enabled pair once per frame, returning all the contacts as one batch.
+
+A layer holds a body: whatever object stores that kind of game object (a Ship, a
+Formation, an Archetype of bolts, Bunkers).  The test of a pair of layers is a function
+of their two bodies, so it can use whatever lookup suits them, like the grid of a
+formation.  A new kind of object joins collision by taking a new layer and adding tests
+for the layers it should hit; Wave does not grow another loop.
+
+This is independent of game2d, like the models, so collisions work without Kivy.
+"""
+
+# The collision layers, one bit each
+LAYER_SHIP = 1
+LAYER_ALIEN = 2
+LAYER_PLAYER_BOLT = 4
+LAYER_ALIEN_BOLT = 8
+LAYER_DIVER = 16
+LAYER_BUNKER = 32
+
+
+class CollisionMatrix(object):
+    """
+    A class recording which pairs of layers collide.
+
+    Each layer has a mask: the bitwise or of the layers it collides with.  The matrix is
+    symmetric, so enabling a pair sets a bit in both masks.
+
+    INSTANCE ATTRIBUTES:
+        _masks: the mask of each layer that collides with anything [dict of int to int]
+    """
+
+    # GETTERS AND SETTERS
+    def getMask(self, layer):
+        """
+        Returns the mask of the layers the given layer collides with.
+
+        Parameter layer: the layer
+        Precondition: a layer bit, like LAYER_SHIP
+        """
+        return self._masks.get(layer, 0)
+
+    # INITIALIZER
+    def __init__(self):
+        """
+        Creates a matrix in which no layers collide.
+        """
+        self._masks = {}
+
+    # MATRIX METHODS
+    def enable(self, a, b):
+        """
+        Makes the two layers collide.
+
+        Parameter a: the first layer
+        Precondition: a layer bit, like LAYER_SHIP
+
+        Parameter b: the second layer
+        Precondition: a layer bit
+        """
+        self._masks[a] = self.getMask(a) | b
+        self._masks[b] = self.getMask(b) | a
+
+    def disable(self, a, b):
+        """
+        Makes the two layers pass through each other.
+
+        Parameter a: the first layer
+        Precondition: a layer bit, like LAYER_SHIP
+
+        Parameter b: the second layer
+        Precondition: a layer bit
+        """
+        self._masks[a] = self.getMask(a) & ~b
+        self._masks[b] = self.getMask(b) & ~a
+
+    def isEnabled(self, a, b):
+        """
+        Returns True if the two layers collide.
+
+        Parameter a: the first layer
+        Precondition: a layer bit, like LAYER_SHIP
+
+        Parameter b: the second layer
+        Precondition: a layer bit
+        """
+        return self.getMask(a) & b != 0
+
+
+class CollisionPass(object):
+    """
+    A class finding the contacts between the bodies in each layer.
+
+    A pair of layers is tested only if it is enabled in the matrix, a test was added
+    for it and both layers hold a body.  Tests run in the order they were added.
+
+    INSTANCE ATTRIBUTES:
+        _matrix: the pairs of layers that collide [CollisionMatrix]
+        _bodies: the body in each layer [dict of int to object]
+        _tests:  the layer pairs with a test, and their test [list of (a, b, function)]
+    """
+
+    # GETTERS AND SETTERS
+    def getMatrix(self):
+        """
+        Returns the attribute _matrix.
+        """
+        return self._matrix
+
+    def setBody(self, layer, body):
+        """
+        Puts a body in the layer, replacing the one it had.
+
+        Parameter layer: the layer
+        Precondition: a layer bit, like LAYER_SHIP
+
+        Parameter body: the object holding the game objects of the layer
+        Precondition: any object the tests of the layer accept, or None for
+        nothing in the layer
+        """
+        self._bodies[layer] = body
+
+    # INITIALIZER
+    def __init__(self, matrix=None):
+        """
+        Creates a pass with no bodies and no tests.
+
+        Parameter matrix: the pairs of layers that collide
+        Precondition: a CollisionMatrix, or None for a new one in which nothing
+        collides
+        """
+        self._matrix = matrix if matrix != None else CollisionMatrix()
+        self._bodies = {}
+        self._tests = []
+
+    # COLLISION METHODS
+    def addTest(self, a, b, test):
+        """
+        Adds the test for contacts between the bodies of two layers.
+
+        The test is called as test(bodyA, bodyB) and returns the contacts as a list
+        of (idA, idB) pairs, where each id names an object in its body (a row, a
+        slot, ...).  It may return several contacts for one object.
+
+        Parameter a: the first layer
+        Precondition: a layer bit, like LAYER_PLAYER_BOLT
+
+        Parameter b: the second layer
+        Precondition: a layer bit, different from a, with no test yet for (a, b)
+
+        Parameter test: the function finding the contacts
+        Precondition: a function of two bodies returning a list of pairs
+        """
+        self._tests.append((a, b, test))
+
+    def run(self):
+        """
+        Returns the contacts between all the layers that collide this frame.
+
+        The result is a list of (a, idA, b, idB) tuples: the layers of the pair the
+        contact was found for, and the ids the test gave.  Nothing is changed, so the
+        caller decides what every contact does.
+        """
+        contacts = []
+        bodies = self._bodies
+        for (a, b, test) in self._tests:
+            bodyA = bodies.get(a)
+            bodyB = bodies.get(b)
+            if bodyA is None or bodyB is None or not self._matrix.getMask(a) & b:
+                continue
+            for (i, j) in test(bodyA, bodyB):
+                contacts.append((a, i, b, j))
+        return contacts
@@ -0,0 +1,287 @@
+"""
+Configuration module for Alien Invaders
+
+This module contains the settings a game session is played with: the size and shape of
+the alien formation, the alien speed, the number of bunkers and of special aliens, how
+often aliens dive, whether to play in bullet-hell mode and the session seed.  consts.py
+only holds their defaults.  A Config is immutable.  It is passed to Invaders and to
+headless.simulateBatch, which pass it on to each wave they make (WaveFactory.make and
+Wave), and the wave passes it on to its formation and models.  So one process can run
+many sessions with different settings side by side.  Nothing here reads the command
+line on import; Config.fromArgs does that when it is asked to.
+"""
+from consts import *
+from shapes import *
+
+
+class Config(object):
+    """
+    A class representing the settings of one game session.
+
+    A Config cannot be changed once it is made.  Two configs with the same settings are
+    equal and hash the same, so they can be used as dictionary keys.
+
+    INSTANCE ATTRIBUTES:
+        _rows:  the number of rows of aliens [int > 0]
+        _cols:  the number of aliens per row [int > 0]
+        _speed: the number of seconds between alien steps in the first wave [float > 0]
+        _seed:  the seed of the session [int >= 0, a tuple of them, or None to pick a
+                fresh one]
+        _shape: the shape of the formation [str naming a shape, see shapes.py]
+        _bunkers: the number of bunkers [int, 0 <= _bunkers <= GAME_WIDTH // BUNKER_WIDTH]
+        _barrage: whether to play in bullet-hell mode [bool]
+        _specials: the number of special aliens in each wave [int >= 0]
+        _dives: the number of alien steps between dives [int >= 0, 0 for no dives]
+    """
+
+    # GETTERS (THERE ARE NO SETTERS)
+    def getRows(self):
+        """
+        Returns the attribute _rows.
+        """
+        return self._rows
+
+    def getCols(self):
+        """
+        Returns the attribute _cols.
+        """
+        return self._cols
+
+    def getSpeed(self):
+        """
+        Returns the attribute _speed.
+        """
+        return self._speed
+
+    def getSeed(self):
+        """
+        Returns the attribute _seed.
+        """
+        return self._seed
+
+    def getShape(self):
+        """
+        Returns the attribute _shape.
+        """
+        return self._shape
+
+    def getBunkers(self):
+        """
+        Returns the attribute _bunkers.
+        """
+        return self._bunkers
+
+    def getBarrage(self):
+        """
+        Returns the attribute _barrage.
+        """
+        return self._barrage
+
+    def getSpecials(self):
+        """
+        Returns the attribute _specials.
+        """
+        return self._specials
+
+    def getDives(self):
+        """
+        Returns the attribute _dives.
+        """
+        return self._dives
+
+    # INITIALIZER
+    def __init__(self, rows=ALIEN_ROWS, cols=ALIENS_IN_ROW, speed=ALIEN_SPEED,
+                 seed=SESSION_SEED, shape=ALIEN_SHAPE, bunkers=BUNKER_COUNT,
+                 barrage=False, specials=0, dives=0):
+        """
+        Creates a configuration with the given settings.
+
+        Parameter rows: the number of rows of aliens
+        Precondition: an int > 0
+
+        Parameter cols: the number of aliens per row
+        Precondition: an int > 0
+
+        Parameter speed: the number of seconds between alien steps in the first wave
+        Precondition: a number > 0
+
+        Parameter seed: the seed of the session
+        Precondition: an int >= 0, a tuple of them (like the seed of one wave of a
+        session, see withSeed), or None to pick a fresh one
+
+        Parameter shape: the shape of the formation
+        Precondition: a str for which shapes.isShape is True
+
+        Parameter bunkers: the number of bunkers between the ship and the defensive line
+        Precondition: an int with 0 <= bunkers <= GAME_WIDTH // BUNKER_WIDTH
+
+        Parameter barrage: whether to play in bullet-hell mode, where every bottom
+        alien may fire on every update
+        Precondition: a bool
+
+        Parameter specials: the number of special aliens in each wave, each running a
+        scripted behaviour (see behaviours.py)
+        Precondition: an int >= 0, 0 for none
+
+        Parameter dives: the number of alien steps between the dives each wave starts
+        Precondition: an int >= 0, 0 for no dives
+        """
+        assert type(rows) == int and rows > 0, repr(rows)
+        assert type(cols) == int and cols > 0, repr(cols)
+        assert type(speed) in (int, float) and speed > 0, repr(speed)
+        assert seed == None or _isSeed(seed) or (type(seed) == tuple and
+                                                 all(map(_isSeed, seed))), repr(seed)
+        assert isShape(shape), repr(shape)
+        limit = GAME_WIDTH // BUNKER_WIDTH
+        assert type(bunkers) == int and 0 <= bunkers <= limit, repr(bunkers)
+        assert type(barrage) == bool, repr(barrage)
+        assert type(specials) == int and specials >= 0, repr(specials)
+        assert type(dives) == int and dives >= 0, repr(dives)
+        object.__setattr__(self, '_rows', rows)
+        object.__setattr__(self, '_cols', cols)
+        object.__setattr__(self, '_speed', float(speed))
+        object.__setattr__(self, '_seed', seed)
+        object.__setattr__(self, '_shape', shape)
+        object.__setattr__(self, '_bunkers', bunkers)
+        object.__setattr__(self, '_barrage', barrage)
+        object.__setattr__(self, '_specials', specials)
+        object.__setattr__(self, '_dives', dives)
+
+    def __setattr__(self, name, value):
+        """
+        Refuses to change the configuration.
+        """
+        raise AttributeError('Config objects cannot be changed')
+
+    def __eq__(self, other):
+        """
+        Returns True if other is a Config with the same settings.
+
+        Parameter other: the value to compare to
+        Precondition: any value
+        """
+        return isinstance(other, Config) and self._key() == other._key()
+
+    def __hash__(self):
+        """
+        Returns a hash of the settings.
+        """
+        return hash(self._key())
+
+    def __repr__(self):
+        """
+        Returns a string showing the settings.
+        """
+        return ('Config(rows=%d, cols=%d, speed=%r, seed=%r, shape=%r, bunkers=%d, '
+                'barrage=%r, specials=%d, dives=%d)' % (self._rows, self._cols,
+                                                        self._speed, self._seed,
+                                                        self._shape, self._bunkers,
+                                                        self._barrage, self._specials,
+                                                        self._dives))
+
+    def withSeed(self, seed):
+        """
+        Returns a configuration with these settings and the given seed.
+
+        Invaders and headless.simulateBatch seed each wave with the pair (session
+        seed, wave number), and hand the wave these settings with that seed.
+
+        Parameter seed: the seed of the new configuration
+        Precondition: an int >= 0, a tuple of them, or None
+        """
+        return Config(self._rows, self._cols, self._speed, seed, self._shape,
+                      self._bunkers, self._barrage, self._specials, self._dives)
+
+    def _key(self):
+        """
+        Returns the settings as a tuple.
+        """
+        return (self._rows, self._cols, self._speed, self._seed, self._shape,
+                self._bunkers, self._barrage, self._specials, self._dives)
+
+    # COMMAND LINE
+    @staticmethod
+    def fromArgs(args):
+        """
+        Returns the configuration given by command line arguments.
+
+        If you start the game typing
+
+            python invaders 3 4 0.5
+
+        then args is ['3', '4', '0.5']: 3 rows of 4 aliens, with 0.5 seconds between
+        alien steps.  A fourth argument sets the seed, to replay a game exactly.  The
+        word mega anywhere in the arguments plays against a MEGA_ROWS by MEGA_COLS
+        formation instead, the name of a shape anywhere (like diamond, or text:HI)
+        sets the shape of the formation, the word nobunkers plays without bunkers,
+        the word specials gives each wave SPECIAL_ALIENS special aliens, the word
+        dives makes each wave send an alien on a dive every DIVE_STEPS alien steps,
+        and the word barrage plays in bullet-hell mode.  A missing or invalid argument
+        keeps its default; rows must be in 1..10, aliens per row in 1..15 and the speed
+        in 0..3.
+
+        Parameter args: the command line arguments
+        Precondition: a list of str, without the name of the script (sys.argv[1:])
+        """
+        rows = ALIEN_ROWS
+        cols = ALIENS_IN_ROW
+        speed = ALIEN_SPEED
+        seed = SESSION_SEED
+        shape = ALIEN_SHAPE
+        bunkers = BUNKER_COUNT
+        barrage = False
+        specials = 0
+        dives = 0
+
+        try:
+            value = int(args[0])
+            if value >= 1 and value <= 10:
+                rows = value
+        except (IndexError, ValueError):
+            pass # Use original value
+
+        try:
+            value = int(args[1])
+            if value >= 1 and value <= 15:
+                cols = value
+        except (IndexError, ValueError):
+            pass # Use original value
+
+        try:
+            value = float(args[2])
+            if value > 0 and value <= 3:
+                speed = value
+        except (IndexError, ValueError):
+            pass # Use original value
+
+        try:
+            value = int(args[3])
+            if value >= 0:
+                seed = value
+        except (IndexError, ValueError):
+            pass # Use original value
+
+        if 'mega' in args:
+            rows, cols = MEGA_ROWS, MEGA_COLS
+        if 'nobunkers' in args:
+            bunkers = 0
+        if 'barrage' in args:
+            barrage = True
+        if 'specials' in args:
+            specials = SPECIAL_ALIENS
+        if 'dives' in args:
+            dives = DIVE_STEPS
+        for arg in args:
+            if isShape(arg):
+                shape = arg
+        return Config(rows, cols, speed, seed, shape, bunkers, barrage, specials, dives)
+
+
+def _isSeed(value):
+    """
+    Returns True if value is an int >= 0.
+
+    Parameter value: the value to check
+    Precondition: any value
+    """
+    return type(value) == int and value >= 0
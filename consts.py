@@ -5,11 +5,13 @@ This module global constants for the game Alien Invaders. These constants need t
 in the model, the view, and the controller. As these are spread across multiple modules,
 we separate the constants into their own module. This allows all modules to access them.
 
+The settings that can change from one session to the next (the formation size, the
+alien speed and the session seed) only have their defaults here.  A session gets its
+settings from a Config object (see config.py), which also reads the command line.
+
 Jin Ryu jfr224, Hajeong Lee hl
 November 26th, 2018
 """
-import introcs
-import sys
 
 ### WINDOW CONSTANTS (all coordinates are in pixels) ###
 
@@ -17,6 +19,13 @@ import sys
 GAME_WIDTH  = 800
 #: the height of the game display
 GAME_HEIGHT = 700
+# the update rate that the per-update speeds below (SHIP_MOVEMENT, BOLT_SPEED, ...)
+# are for
+BASE_RATE   = 60
+# the number of fixed simulation steps per second (movement is scaled to match BASE_RATE)
+TICK_RATE   = 60
+# the largest number of simulation steps to run for a single drawn frame
+MAX_CATCHUP = 5
 
 
 ### SHIP CONSTANTS ###
@@ -52,14 +61,26 @@ ALIEN_H_WALK  = ALIEN_WIDTH // 4
 ALIEN_V_WALK  = ALIEN_HEIGHT // 2
 # The distance of the top alien from the top of the window
 ALIEN_CEILING = 100
-# the number of rows of aliens, in range 1..10
+# the default number of rows of aliens (see config.py)
 ALIEN_ROWS     = 5
-# the number of aliens per row
+# the default number of aliens per row
 ALIENS_IN_ROW  = 12
+# the default shape of the formation (see shapes.py)
+ALIEN_SHAPE    = 'full'
 # the image files for the aliens (bottom to top)
 ALIEN_IMAGES   = ('alien1.png','alien2.png','alien3.png')
-# the number of seconds (0 < float <= 1) between alien steps
+# the default number of seconds (0 < float <= 1) between alien steps
 ALIEN_SPEED = 1.0
+# the number of rows of aliens in a mega formation (no upper limit)
+MEGA_ROWS      = 100
+# the number of aliens per row in a mega formation (no upper limit)
+MEGA_COLS      = 200
+# the number of special aliens in a wave when they are asked for, each running a
+# scripted behaviour
+SPECIAL_ALIENS = 3
+# the number of alien steps between the dives a wave starts on its own, when they
+# are asked for
+DIVE_STEPS     = 12
 
 
 ### BOLT CONSTANTS ###
@@ -72,6 +93,24 @@ BOLT_HEIGHT = 16
 BOLT_SPEED  = 10
 # the number of ALIEN STEPS (not frames) between bolts
 BOLT_RATE   = 5
+# the number of pixels to move a bolt per update in bullet-hell mode
+BARRAGE_SPEED  = 4
+# the chance (0 <= float <= 1) per update that each bottom alien fires in bullet-hell mode
+BARRAGE_CHANCE = 0.2
+
+
+### BUNKER CONSTANTS ###
+
+# the default number of bunkers between the ship and the defensive line
+BUNKER_COUNT  = 4
+# the width of a bunker
+BUNKER_WIDTH  = 64
+# the height of a bunker (it fits between the top of the ship and DEFENSE_LINE)
+BUNKER_HEIGHT = 20
+# the distance of the (bottom of the) bunkers from the bottom of the screen
+BUNKER_BOTTOM = 78
+# the side of a square cell of the bunker bitmask, in pixels
+BUNKER_CELL   = 2
 
 
 ### GAME CONSTANTS ###
@@ -88,38 +127,14 @@ STATE_PAUSED   = 3
 STATE_CONTINUE = 4
 #: state when the game is complete (won or lost)
 STATE_COMPLETE = 5
+# state when the last few seconds of the wave are being scrubbed through
+STATE_REWIND   = 6
+# the number of seconds of play that can be rewound
+REWIND_SECONDS = 10
+# the largest number of simulation steps between two rewind keyframes
+REWIND_KEYFRAME = 30
+# the default seed for the random streams of a game session (None picks a fresh one)
+SESSION_SEED   = None
 
 
-### USE COMMAND LINE ARGUMENTS TO CHANGE NUMBER OF ALIENS IN A ROW"""
-"""
-sys.argv is a list of the command line arguments when you run Python. These
-arguments are everything after the word python. So if you start the game typing
-
-    python invaders 3 4 0.5
-
-Python puts ['breakout.py', '3', '4', '0.5'] into sys.argv. Below, we take
-advantage of this fact to change the constants ALIEN_ROWS, ALIENS_IN_ROW, and
-ALIEN_SPEED.
-"""
-try:
-    rows = int(sys.argv[1])
-    if rows >= 1 and rows <= 10:
-        ALIEN_ROWS = rows
-except:
-    pass # Use original value
-
-try:
-    perrow = int(sys.argv[2])
-    if perrow >= 1 and perrow <= 15:
-        ALIENS_IN_ROW = perrow
-except:
-    pass # Use original value
-
-try:
-    speed = float(sys.argv[3])
-    if speed > 0 and speed <= 3:
-        ALIEN_SPEED = speed
-except:
-    pass # Use original value
-
 ### ADD MORE CONSTANTS (PROPERLY COMMENTED) AS NECESSARY ###
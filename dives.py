@@ -0,0 +1,180 @@
+"""
+Dive path module for Alien Invaders
+
+This module contains the curved paths an alien flies when it leaves the formation in a
+Galaga-style dive.  A path is given by a few control points relative to the slot the
+alien leaves, and it is flown in a fixed number of seconds.  It starts and ends at
+(0,0), so an alien that finishes its path is exactly on its slot again, wherever the
+formation has marched to in the meantime.
+
+Each path is sampled once, the first time it is needed, into a lookup table with
+BASE_RATE entries per second of flight.  The table is shared by every alien flying the
+path.  A frame only reads two neighbouring entries per diver and blends them, so no
+spline is evaluated while the game runs, and a frame with dozens of divers costs dozens
+of lookups.  The entries are spaced evenly along the curve, so divers fly at an even
+speed.
+"""
+from consts import *
+import numpy as np
+
+# The names of the dive paths; a path is stored in snapshots by its place here
+PATH_NAMES = ('loop', 'swoop')
+
+# The control points of each path, relative to the slot and at scale 1, from the slot
+# back to the slot.  The paths bend to the right; a mirrored dive flips x.
+_PATH_POINTS = {
+    'loop':  ((0, 0), (30, -40), (70, -150), (40, -280), (-40, -300), (-80, -220),
+              (-50, -120), (-10, -40), (0, 0)),
+    'swoop': ((0, 0), (50, -50), (150, -130), (100, -250), (-50, -300), (-200, -250),
+              (-150, -120), (-50, -30), (0, 0)),
+}
+
+# The number of seconds each path takes to fly
+_PATH_SECONDS = {'loop': 3.0, 'swoop': 3.5}
+
+# The number of points per spline segment used to measure the length of a path
+_DENSE = 64
+
+# The tables built so far [dict of int to DivePath]
+_TABLES = {}
+
+
+def isPath(name):
+    """
+    Returns True if name is the name of a dive path.
+
+    Parameter name: the name to check
+    Precondition: any value
+    """
+    return name in PATH_NAMES
+
+
+def pathIndex(name):
+    """
+    Returns the place of the named path in PATH_NAMES.
+
+    Parameter name: the name of the path
+    Precondition: a str for which isPath is True
+    """
+    assert isPath(name), repr(name)
+    return PATH_NAMES.index(name)
+
+
+def getPaths():
+    """
+    Returns the lookup tables of every path, in the order of PATH_NAMES.
+    """
+    return [getPath(index) for index in range(len(PATH_NAMES))]
+
+
+def getPath(index):
+    """
+    Returns the lookup table of a path, sampling it the first time.
+
+    Parameter index: the place of the path in PATH_NAMES
+    Precondition: an int with 0 <= index < len(PATH_NAMES)
+    """
+    path = _TABLES.get(index)
+    if path is None:
+        path = DivePath(PATH_NAMES[index])
+        _TABLES[index] = path
+    return path
+
+
+class DivePath(object):
+    """
+    A class storing a dive path as a lookup table of offsets from the slot.
+
+    Entry i is the offset of a diver i/BASE_RATE seconds into its dive.  The first and
+    last entries are (0,0).  The entries are Python lists, since a diver reads two of
+    them at a time and list indexing is much faster than NumPy indexing for that.
+
+    INSTANCE ATTRIBUTES:
+        _name:    the name of the path [str in PATH_NAMES]
+        _seconds: the number of seconds the path takes to fly [float > 0]
+        _xs:      the x offset of each entry, at scale 1 [list of float]
+        _ys:      the y offset of each entry, at scale 1 [list of float]
+    """
+
+    # GETTERS AND SETTERS
+    def getName(self):
+        """
+        Returns the attribute _name.
+        """
+        return self._name
+
+    def getSeconds(self):
+        """
+        Returns the attribute _seconds.
+        """
+        return self._seconds
+
+    def getSize(self):
+        """
+        Returns the number of entries in the table.
+        """
+        return len(self._xs)
+
+    def getTable(self):
+        """
+        Returns the entries as a pair of lists (xs, ys), for callers that do the
+        lookup of offset themselves.
+
+        The lists are shared and must not be modified.
+        """
+        return (self._xs, self._ys)
+
+    # INITIALIZER
+    def __init__(self, name):
+        """
+        Creates the lookup table of the named path.
+
+        The control points are joined by a Catmull-Rom spline, which passes through
+        every one of them.  The spline is measured on a dense sampling, and the
+        table entries are then placed at even distances along it.
+
+        Parameter name: the name of the path
+        Precondition: a str for which isPath is True
+        """
+        assert isPath(name), repr(name)
+        self._name = name
+        self._seconds = float(_PATH_SECONDS[name])
+
+        points = np.array(_PATH_POINTS[name], dtype=float)
+        padded = np.concatenate((points[:1], points, points[-1:]))
+        u = (np.arange(_DENSE) / _DENSE).reshape(_DENSE, 1)
+        pieces = []
+        for i in range(len(points)-1):
+            p0, p1, p2, p3 = padded[i:i+4]
+            pieces.append(0.5*(2*p1 + (p2-p0)*u + (2*p0 - 5*p1 + 4*p2 - p3)*u**2 +
+                               (3*p1 - p0 - 3*p2 + p3)*u**3))
+        pieces.append(points[-1:])
+        dense = np.concatenate(pieces)
+
+        steps = np.hypot(np.diff(dense[:, 0]), np.diff(dense[:, 1]))
+        length = np.concatenate(([0.0], np.cumsum(steps)))
+        size = int(round(self._seconds*BASE_RATE)) + 1
+        at = np.linspace(0, length[-1], size)
+        self._xs = np.interp(at, length, dense[:, 0]).tolist()
+        self._ys = np.interp(at, length, dense[:, 1]).tolist()
+        self._xs[-1] = self._ys[-1] = 0.0
+
+    # PATH METHODS
+    def offset(self, t):
+        """
+        Returns the (dx,dy) offset from the slot t seconds into a dive, at scale 1.
+
+        The two nearest entries are blended, so any dt gives a smooth flight.
+        The result is (0,0) once the dive is over.
+
+        Parameter t: the number of seconds since the dive started
+        Precondition: a number >= 0
+        """
+        at = t*BASE_RATE
+        i = int(at)
+        if i >= len(self._xs)-1:
+            return (0.0, 0.0)
+        f = at - i
+        xs = self._xs
+        ys = self._ys
+        return (xs[i] + (xs[i+1]-xs[i])*f, ys[i] + (ys[i+1]-ys[i])*f)
@@ -0,0 +1,316 @@
+"""
+Entity module for Alien Invaders
+
+This module contains the entity-component core used for the objects a wave has many of.
+An entity is just an integer handle.  Its data lives in an Archetype: one dense column
+per component (x, y, velocity, ...), with one row per entity of that kind.  A system is
+a Wave method that works on the columns of the archetypes it needs, so a system for
+player bolts never looks at alien bolts, and a frame costs time in proportion to the
+entities that are actually in play.
+
+Handles are recycled, but each carries the generation of its slot.  Destroying an entity
+bumps the generation, so a stale handle is never mistaken for the entity that reuses its
+slot.
+
+The columns are typed arrays allocated ahead of time, with a count of the live rows, and
+destroyed handles go on a free list.  Once a wave has had as many entities of a kind at
+once as it ever will, spawning and removing them allocates no new storage: a new entity
+takes a spare row and a recycled handle.
+
+Rows are removed in place, and the rows that stay keep their order.  Systems that visit
+entities in order therefore behave the same as the loops over a list they replaced, and
+the order of the rows does not depend on whether dead entities are removed one update
+at a time or in a batch (Wave.fastForward does the latter).
+"""
+import array
+
+# The number of low bits of a handle that hold the slot index
+_INDEX_BITS = 24
+_INDEX_MASK = (1 << _INDEX_BITS) - 1
+
+# The number of rows an archetype has room for when it is made
+_CAPACITY = 16
+
+
+class Entities(object):
+    """
+    A class handing out entity handles with generation counters.
+
+    A handle is generation << _INDEX_BITS | index.  The slot of a destroyed entity is
+    reused by the next one created, with the next generation.
+
+    INSTANCE ATTRIBUTES:
+        _generation: the current generation of each slot [list of int >= 0]
+        _free:       the slots of destroyed entities, ready to be reused [list of int]
+        _count:      the number of entities alive [int >= 0]
+    """
+
+    # GETTERS AND SETTERS
+    def count(self):
+        """
+        Returns the attribute _count.
+        """
+        return self._count
+
+    # INITIALIZER
+    def __init__(self):
+        """
+        Creates a registry with no entities.
+        """
+        self._generation = []
+        self._free = []
+        self._count = 0
+
+    # ENTITY METHODS
+    def create(self):
+        """
+        Returns the handle of a new entity.
+        """
+        if self._free:
+            index = self._free.pop()
+        else:
+            index = len(self._generation)
+            self._generation.append(0)
+        self._count += 1
+        return (self._generation[index] << _INDEX_BITS) | index
+
+    def destroy(self, handle):
+        """
+        Destroys the entity, so that its handle is no longer alive.
+
+        Parameter handle: the entity to destroy
+        Precondition: an int handle for which isAlive is True
+        """
+        assert self.isAlive(handle)
+        index = handle & _INDEX_MASK
+        self._generation[index] += 1
+        self._free.append(index)
+        self._count -= 1
+
+    def isAlive(self, handle):
+        """
+        Returns True if the handle is of an entity that has not been destroyed.
+
+        Parameter handle: the entity to check
+        Precondition: an int handle returned by create
+        """
+        index = handle & _INDEX_MASK
+        return (index < len(self._generation) and
+                self._generation[index] == handle >> _INDEX_BITS)
+
+
+class Archetype(object):
+    """
+    A class storing the components of one kind of entity as dense columns.
+
+    Each component is a column: a typed array (see the module array) with one value per
+    entity, doubles unless the component was named as an int one.  Row i of every column
+    belongs to the entity _handles[i], and rows are kept in the order the entities were
+    spawned.  Only the first _size rows are live; the rest are room for new entities,
+    and the columns double when they run out of it.  The columns are not NumPy arrays,
+    because a wave only ever has a handful of entities of a kind; at that size a Python
+    loop over an array is several times faster than a NumPy call, and reading a value
+    gives a Python number, not a NumPy scalar.  (Bullet-hell mode, with thousands of
+    bolts, keeps them in the NumPy arrays of a BoltField instead.)
+
+    INSTANCE ATTRIBUTES:
+        _entities: the registry the handles come from [Entities]
+        _names:    the names of the components, in column order [tuple of str]
+        _columns:  the column of each component [dict of str to array.array]
+        _handles:  the entity of each row [array.array of int]
+        _rows:     the row of each entity, the inverse of _handles [dict of int to int]
+        _size:     the number of live rows [int >= 0]
+    """
+
+    # GETTERS AND SETTERS
+    def __len__(self):
+        """
+        Returns the attribute _size, the number of entities of this kind.
+        """
+        return self._size
+
+    def column(self, name):
+        """
+        Returns the values of a component for every entity, in row order.
+
+        The result is the column itself: writing to it changes the component.  Only
+        its first len(self) values are those of entities; the rest are spare.  The
+        column stays valid as entities are spawned and removed.
+
+        Parameter name: the component
+        Precondition: one of the names this archetype was made with
+        """
+        return self._columns[name]
+
+    def getHandles(self):
+        """
+        Returns the entity handles of the rows, as a new list.
+        """
+        return self._handles[:self._size].tolist()
+
+    def find(self, handle):
+        """
+        Returns the row of the given entity, or None if it is not of this kind.
+
+        Parameter handle: the entity to look for
+        Precondition: an int handle
+        """
+        return self._rows.get(handle)
+
+    # INITIALIZER
+    def __init__(self, entities, names, ints=()):
+        """
+        Creates an archetype with no entities, and room for _CAPACITY of them.
+
+        Parameter entities: the registry to create the entities in
+        Precondition: an Entities object
+
+        Parameter names: the names of the components
+        Precondition: a sequence of distinct str
+
+        Parameter ints: the names of the components that hold ints
+        Precondition: a collection of str in names
+        """
+        self._entities = entities
+        self._names = tuple(names)
+        self._columns = {}
+        for name in self._names:
+            self._columns[name] = array.array('q' if name in ints else 'd',
+                                              bytes(8*_CAPACITY))
+        self._handles = array.array('q', bytes(8*_CAPACITY))
+        self._rows = {}
+        self._size = 0
+
+    # ARCHETYPE METHODS
+    def spawn(self, values):
+        """
+        Returns the handle of a new entity of this kind, with the given components.
+
+        The entity gets the last row.
+
+        Parameter values: the value of each component
+        Precondition: a sequence of numbers, in the order of the names
+        """
+        assert len(values) == len(self._names)
+        row = self._size
+        if row == len(self._handles):
+            self._grow()
+        for i in range(len(self._names)):
+            self._columns[self._names[i]][row] = values[i]
+        handle = self._entities.create()
+        self._handles[row] = handle
+        self._rows[handle] = row
+        self._size = row+1
+        return handle
+
+    def copy(self, source, target):
+        """
+        Copies the values of one component into another, for every entity.
+
+        Parameter source: the component to copy
+        Precondition: one of the names this archetype was made with
+
+        Parameter target: the component to copy into
+        Precondition: one of the names this archetype was made with, of the same type
+        """
+        values = self._columns[source]
+        copies = self._columns[target]
+        for row in range(self._size):
+            copies[row] = values[row]
+
+    def keepBetween(self, name, low, high):
+        """
+        Destroys the entities whose value of a component is not strictly between low
+        and high.
+
+        Parameter name: the component to test
+        Precondition: one of the names this archetype was made with
+
+        Parameter low: the bound the values must be above
+        Precondition: a number (it may be -math.inf)
+
+        Parameter high: the bound the values must be below
+        Precondition: a number (it may be math.inf)
+        """
+        values = self._columns[name]
+        kept = 0
+        for row in range(self._size):
+            if low < values[row] < high:
+                if kept < row:
+                    self._move(row, kept)
+                kept += 1
+            else:
+                self._destroy(row)
+        self._size = kept
+
+    def removeRows(self, rows):
+        """
+        Destroys the entities in the given rows.
+
+        Parameter rows: the rows to remove
+        Precondition: a collection of ints with 0 <= row < len(self)
+        """
+        kept = 0
+        for row in range(self._size):
+            if row in rows:
+                self._destroy(row)
+            else:
+                if kept < row:
+                    self._move(row, kept)
+                kept += 1
+        self._size = kept
+
+    def removeRow(self, row):
+        """
+        Destroys the entity in the given row.
+
+        Parameter row: the row to remove
+        Precondition: an int with 0 <= row < len(self)
+        """
+        self._destroy(row)
+        for later in range(row+1, self._size):
+            self._move(later, later-1)
+        self._size -= 1
+
+    def clear(self):
+        """
+        Destroys every entity of this kind.
+        """
+        for row in range(self._size):
+            self._destroy(row)
+        self._size = 0
+
+    def _destroy(self, row):
+        """
+        Destroys the entity in the given row, leaving the row to be overwritten.
+
+        Parameter row: the row of the entity
+        Precondition: an int with 0 <= row < _size, holding a live entity
+        """
+        handle = self._handles[row]
+        self._entities.destroy(handle)
+        del self._rows[handle]
+
+    def _move(self, row, to):
+        """
+        Moves the entity in the given row to an earlier row.
+
+        Parameter row: the row of the entity
+        Precondition: an int with 0 <= row < _size
+
+        Parameter to: the row to move it to
+        Precondition: an int with 0 <= to < row, whose entity was moved or destroyed
+        """
+        for values in self._columns.values():
+            values[to] = values[row]
+        handle = self._handles[row]
+        self._handles[to] = handle
+        self._rows[handle] = to
+
+    def _grow(self):
+        """
+        Doubles the room for entities in every column.
+        """
+        room = len(self._handles)
+        for values in list(self._columns.values()) + [self._handles]:
+            values.frombytes(bytes(8*room))
@@ -0,0 +1,101 @@
+"""
+Alien fire scheduling module for Alien Invaders
+
+This module contains the schedule of alien shots that are waiting to be fired.  Each
+pending shot is an event keyed by the alien step at which it fires, and the events are
+kept in a heap.  Finding the shots that are due is then O(log n) per shot, instead of a
+scan of every bolt on every frame.
+
+A pending shot is only a record of the alien that will fire it.  No bolt exists until
+the shot is due, so shots that are waiting cost nothing on the frames in between.
+"""
+import heapq
+
+
+class FireSchedule(object):
+    """
+    A class holding pending alien shots in a heap keyed by alien step.
+
+    Shots due on the same step come out in the order they were scheduled.
+
+    INSTANCE ATTRIBUTES:
+        _heap:  the pending shots [heap of (step, order, shot) tuples]
+        _order: the number of shots ever scheduled, used to break ties [int >= 0]
+    """
+
+    # INITIALIZER
+    def __init__(self):
+        """
+        Creates an empty schedule.
+        """
+        self._heap = []
+        self._order = 0
+
+    def __len__(self):
+        """
+        Returns the number of pending shots.
+        """
+        return len(self._heap)
+
+    # SCHEDULE METHODS
+    def push(self, step, shot):
+        """
+        Schedules a shot to fire at the given alien step.
+
+        Parameter step: the alien step at which the shot fires
+        Precondition: an int >= 0
+
+        Parameter shot: the shot to fire
+        Precondition: any object (Wave uses the (row,col) slot of the shooter)
+        """
+        heapq.heappush(self._heap, (step, self._order, shot))
+        self._order += 1
+
+    def peek(self):
+        """
+        Returns the alien step of the next shot, or None if nothing is scheduled.
+        """
+        if not self._heap:
+            return None
+        return self._heap[0][0]
+
+    def due(self, step):
+        """
+        Returns the shots scheduled at or before the given step, removing them.
+
+        The shots are returned in firing order.
+
+        Parameter step: the current alien step
+        Precondition: an int >= 0
+        """
+        shots = []
+        while self._heap and self._heap[0][0] <= step:
+            shots.append(heapq.heappop(self._heap)[2])
+        return shots
+
+    def pending(self):
+        """
+        Returns the pending shots as a list of (step, shot) pairs in firing order.
+
+        The schedule is not changed.  Pushing the pairs in this order onto an empty
+        schedule gives one that fires the same shots in the same order.
+        """
+        return [(step, shot) for (step, order, shot) in sorted(self._heap, key=_key)]
+
+    def clear(self):
+        """
+        Removes every pending shot.
+        """
+        self._heap = []
+
+
+def _key(entry):
+    """
+    Returns the sort key of a heap entry, leaving out the shot.
+
+    Shots need not be comparable, and (step, order) is already unique.
+
+    Parameter entry: the heap entry
+    Precondition: a (step, order, shot) tuple
+    """
+    return (entry[0], entry[1])
@@ -0,0 +1,773 @@
+"""
+Formation module for Alien Invaders
+
+This module contains the storage for the grid of aliens in a wave.  Instead of a 2d
+list of Alien objects, a Formation keeps contiguous NumPy arrays: whether each alien is
+alive and the index of its image in ALIEN_IMAGES, plus the x coordinate of each column
+and the y coordinate of each row.
+
+The aliens march in lockstep, so the formation is a group with a single offset, like a
+GScene.  Column and row coordinates are formation-local and never change; the world
+position of an alien is its local position plus the offset, and a march step is one
+update of the offset no matter how many aliens there are.  Bolt tests are single
+vectorized operations, so they scale to formations with thousands of aliens.
+
+Alive counts per row and column, the extreme occupied columns, the lowest occupied row
+and the lowest alien of each column are kept up to date when an alien dies.  Queries
+about the extents of the formation are then O(1) instead of a scan of the grid.  The
+layout is the one computed by Alien.__init__; rows and columns here are 0-based array
+indices, so the alien at [row][col] is the one Alien(row+1, col+1, config) would
+create.
+
+Formations larger than the command line limits (a "mega formation", such as 100 rows
+of 200 aliens) would not fit on the screen with that layout.  They are scaled down about
+the top left corner of the screen, aliens and gaps alike, until they fit.  A formation
+that fits already has scale 1 and is laid out exactly as Alien.__init__ does.
+
+A formation need not be a full rectangle.  It can start from a shape mask (see
+shapes.py); the slots outside the shape are holes that are never alive.  Besides the
+grid, a formation keeps a sparse index of its living slots, so listing the living
+aliens (which the renderer does when one dies) costs time in proportion to the aliens
+left, not to the area of the grid.  Collisions look up the grid cells under a bolt, so
+they never depend on the area either.
+
+An alien can leave its slot for a while, to dive (see dives.py).  While it is away it
+is out of the grid exactly as if it were dead, so it neither collides nor counts towards
+the extents, but the formation remembers it and attach puts it back in its slot.
+"""
+from consts import *
+from models import *
+from shapes import *
+import numpy as np
+import math
+import copy
+
+
+class Formation(object):
+    """
+    A class storing the grid of aliens as a struct of arrays.
+
+    Dead aliens keep their entry in the arrays but are masked out of every query.  They
+    also stop marching, exactly like an Alien removed from the old 2d list: the world
+    position at the moment of death is remembered in _remains.  Holes in the shape are
+    slots that were never alive, and have no remains.  Aliens away from their slot are
+    not alive in the grid either; they are in _away until they are attached again or
+    released.
+
+    INSTANCE ATTRIBUTES:
+        _config: the settings the formation was built from [Config]
+        _rows:  the number of rows in the grid [int > 0]
+        _cols:  the number of columns in the grid [int > 0]
+        _colX:  the local x coordinate of each column [float array of length _cols]
+        _rowY:  the local y coordinate of each row [float array of length _rows]
+        _scale: the factor the layout and alien size are scaled by
+                [number, 0 < _scale <= 1]
+        _width: the width of an alien [number > 0]
+        _height: the height of an alien [number > 0]
+        _pitchX: the distance between the centers of adjacent columns [float > 0]
+        _pitchY: the distance between the centers of adjacent rows [float > 0]
+        _ox:    the horizontal offset of the whole formation [int or float]
+        _oy:    the vertical offset of the whole formation [int or float]
+        _remains: the world position of each dead alien [dict of (row,col) to (x,y)]
+        _alive: whether each alien is still alive [bool array of shape (_rows,_cols)]
+        _image: the index of each alien image in ALIEN_IMAGES
+                [int array of shape (_rows,_cols)]
+        _count:    the number of living aliens [int >= 0]
+        _rowCount: the number of living aliens in each row [int array of length _rows]
+        _colCount: the number of living aliens in each column [int array of length _cols]
+        _bottom:   the lowest living row of each column
+                   [int array of length _cols, -1 if empty]
+        _leftCol:  the leftmost column with a living alien [int, -1 if _count is 0]
+        _rightCol: the rightmost column with a living alien [int, -1 if _count is 0]
+        _lowRow:   the lowest row with a living alien [int, -1 if _count is 0]
+        _liveCols: the columns with a living alien, in no particular order [list of int]
+        _colIndex: the position of each column in _liveCols
+                   [int array of length _cols, -1 if empty]
+        _live:     the living slots, in row-major order except that an attached or
+                   revived alien comes last [dict of (row,col) to True]
+        _away:     the slots of the aliens away from the formation
+                   [dict of (row,col) to True]
+    """
+
+    # GETTERS AND SETTERS
+    def getRows(self):
+        """
+        Returns the attribute _rows.
+        """
+        return self._rows
+
+    def getCols(self):
+        """
+        Returns the attribute _cols.
+        """
+        return self._cols
+
+    def getScale(self):
+        """
+        Returns the attribute _scale.
+        """
+        return self._scale
+
+    def getAlienSize(self):
+        """
+        Returns the (width,height) of an alien in this formation.
+        """
+        return (self._width, self._height)
+
+    def isAlive(self, row, col):
+        """
+        Returns True if the alien at the given slot is alive.
+
+        Parameter row: the row of the alien
+        Precondition: an int with 0 <= row < _rows
+
+        Parameter col: the column of the alien
+        Precondition: an int with 0 <= col < _cols
+        """
+        return bool(self._alive[row, col])
+
+    def isAway(self, row, col):
+        """
+        Returns True if the alien of the given slot is alive but away from the formation.
+
+        Parameter row: the row of the alien
+        Precondition: an int with 0 <= row < _rows
+
+        Parameter col: the column of the alien
+        Precondition: an int with 0 <= col < _cols
+        """
+        return (row, col) in self._away
+
+    def getOffset(self):
+        """
+        Returns the (x,y) offset of the formation group.
+        """
+        return (self._ox, self._oy)
+
+    def setOffset(self, ox, oy):
+        """
+        Sets the (x,y) offset of the formation group.
+
+        Wave.coast uses this to put back an offset that march produced before, so
+        the offset is exactly what the marches would give.
+
+        Parameter ox: the horizontal offset
+        Precondition: an int or float
+
+        Parameter oy: the vertical offset
+        Precondition: an int or float
+        """
+        self._ox = ox
+        self._oy = oy
+
+    def getLocal(self, row, col):
+        """
+        Returns the formation-local (x,y) coordinates of the given slot.
+
+        Parameter row: the row of the alien
+        Precondition: an int with 0 <= row < _rows
+
+        Parameter col: the column of the alien
+        Precondition: an int with 0 <= col < _cols
+        """
+        return (float(self._colX[col]), float(self._rowY[row]))
+
+    def getPosition(self, row, col):
+        """
+        Returns the world (x,y) coordinates of the alien at the given slot.
+
+        Parameter row: the row of the alien
+        Precondition: an int with 0 <= row < _rows
+
+        Parameter col: the column of the alien
+        Precondition: an int with 0 <= col < _cols
+        """
+        if not self._alive[row, col]:
+            return self._remains[(row, col)]
+        return (float(self._colX[col] + self._ox), float(self._rowY[row] + self._oy))
+
+    def getSource(self, row, col):
+        """
+        Returns the image file of the alien at the given slot.
+
+        Parameter row: the row of the alien
+        Precondition: an int with 0 <= row < _rows
+
+        Parameter col: the column of the alien
+        Precondition: an int with 0 <= col < _cols
+        """
+        return ALIEN_IMAGES[self._image[row, col]]
+
+    def getAlien(self, row, col):
+        """
+        Returns a new Alien model at the current position of the given slot.
+
+        Parameter row: the row of the alien
+        Precondition: an int with 0 <= row < _rows
+
+        Parameter col: the column of the alien
+        Precondition: an int with 0 <= col < _cols
+        """
+        alien = Alien(row+1, col+1, self._config)
+        alien.x, alien.y = self.getPosition(row, col)
+        alien.width = self._width
+        alien.height = self._height
+        return alien
+
+    def count(self):
+        """
+        Returns the number of aliens alive in the formation, not counting those away.
+        """
+        return self._count
+
+    def countAway(self):
+        """
+        Returns the number of aliens away from the formation.
+        """
+        return len(self._away)
+
+    def countColumns(self):
+        """
+        Returns the number of columns with a living alien.
+        """
+        return len(self._liveCols)
+
+    def getLivingColumn(self, i):
+        """
+        Returns one of the columns with a living alien.
+
+        Each i names a different column, so a uniformly random i in range picks a
+        uniformly random column in O(1), however many columns are empty.
+
+        Parameter i: which living column to return
+        Precondition: an int with 0 <= i < countColumns()
+        """
+        return self._liveCols[i]
+
+    def getLivingColumns(self):
+        """
+        Returns the columns with a living alien, in the order getLivingColumn uses.
+        """
+        return list(self._liveCols)
+
+    def getAliveMask(self):
+        """
+        Returns a copy of the alive mask as a bool array of shape (_rows,_cols).
+        """
+        return self._alive.copy()
+
+    def living(self):
+        """
+        Returns the (row,col) slots of all living aliens in the formation, in row-major
+        order except that aliens attached again or revived come last.
+
+        This reads the sparse index, so it takes time in proportion to count().
+        """
+        return list(self._live)
+
+    # INITIALIZER
+    def __init__(self, config):
+        """
+        Creates a formation of aliens in their starting positions.
+
+        The size and shape of the formation are those of config.  The slots outside
+        the shape (see shapes.py) are holes.
+
+        Parameter config: the settings of the game
+        Precondition: a Config object
+        """
+        rows = config.getRows()
+        cols = config.getCols()
+        self._config = config
+        self._rows = rows
+        self._cols = cols
+        self._scale = Formation.fitScale(rows, cols)
+        self._width = ALIEN_WIDTH*self._scale
+        self._height = ALIEN_HEIGHT*self._scale
+
+        self._colX = Alien.slotX(np.arange(1, cols+1, dtype=float))*self._scale
+        rowY = Alien.slotY(np.arange(1, rows+1, dtype=float))
+        self._rowY = GAME_HEIGHT - (GAME_HEIGHT-rowY)*self._scale
+        # The step between consecutive slots in Alien.slotX and Alien.slotY
+        self._pitchX = (ALIEN_WIDTH + ALIEN_H_SEP)*self._scale
+        self._pitchY = (ALIEN_HEIGHT + ALIEN_V_SEP)*self._scale
+        self._ox = 0
+        self._oy = 0
+        self._remains = {}
+        self._away = {}
+
+        index = Alien.imageIndex(np.arange(1, rows+1), rows)
+        self._image = np.repeat(index.reshape(rows, 1), cols, axis=1)
+
+        mask = makeMask(config.getShape(), rows, cols)
+        assert mask.shape == (rows, cols) and mask.any()
+        self._alive = np.array(mask, dtype=bool)
+        columns = np.flatnonzero(self._alive.any(axis=0)).tolist()
+        self._recount(columns)
+
+    def setState(self, alive, offset, columns, remains, away=()):
+        """
+        Puts the formation in the given state, as recorded by a snapshot.
+
+        The counters and extents are recomputed from the alive mask, unless the
+        mask and the living columns are those the formation already has.  Only the
+        remains that are still needed (the dead aliens a pending shot fires from)
+        have to be given.
+
+        Parameter alive: whether each alien is alive
+        Precondition: a bool array of shape (_rows,_cols)
+
+        Parameter offset: the (x,y) offset of the formation group
+        Precondition: a pair of numbers
+
+        Parameter columns: the living columns, in the order of getLivingColumns
+        Precondition: a list of the ints col for which alive[:,col] has a True
+
+        Parameter remains: the world position of dead aliens
+        Precondition: a dict of (row,col) to (x,y), for dead slots only
+
+        Parameter away: the slots of the aliens away from the formation
+        Precondition: an iterable of (row,col) slots that are not alive in alive
+        """
+        self._ox, self._oy = offset
+        self._remains = dict(remains)
+        self._away = dict.fromkeys(away, True)
+        if columns != self._liveCols or not np.array_equal(alive, self._alive):
+            self._alive = np.array(alive, dtype=bool)
+            self._recount(columns)
+
+    def _recount(self, columns):
+        """
+        Recomputes the counters, the extents and the sparse index from _alive.
+
+        Parameter columns: the living columns, in the order of getLivingColumns
+        Precondition: a list of the ints col for which _alive[:,col] has a True
+        """
+        self._count = int(np.count_nonzero(self._alive))
+        self._rowCount = np.count_nonzero(self._alive, axis=1)
+        self._colCount = np.count_nonzero(self._alive, axis=0)
+        lowest = self._rows-1 - np.argmax(self._alive[::-1], axis=0)
+        self._bottom = np.where(self._colCount > 0, lowest, -1)
+        self._leftCol = self._scan(self._colCount, 0, 1)
+        self._rightCol = self._scan(self._colCount, self._cols-1, -1)
+        self._lowRow = self._scan(self._rowCount, self._rows-1, -1)
+
+        self._liveCols = list(columns)
+        self._colIndex = np.full(self._cols, -1, dtype=int)
+        self._colIndex[self._liveCols] = np.arange(len(self._liveCols))
+
+        rows, cols = np.nonzero(self._alive)
+        self._live = dict.fromkeys(zip(rows.tolist(), cols.tolist()), True)
+
+    @staticmethod
+    def fitScale(rows, cols):
+        """
+        Returns the scale at which a formation of the given size fits the screen.
+
+        The formation fits if its right edge, plus a gap, is on the screen and its
+        bottom edge is above the defensive line.  The result is 1 for any formation
+        within the command line limits (see Config.fromArgs).
+
+        Parameter rows: the number of rows of aliens
+        Precondition: an int > 0
+
+        Parameter cols: the number of aliens per row
+        Precondition: an int > 0
+        """
+        width = Alien.slotX(cols) + ALIEN_WIDTH/2 + ALIEN_H_SEP
+        height = GAME_HEIGHT - Alien.slotY(rows) + ALIEN_HEIGHT/2
+        return min(1, GAME_WIDTH/width, (GAME_HEIGHT-DEFENSE_LINE)/height)
+
+    def copy(self):
+        """
+        Returns a copy of this formation that can change independently.
+
+        The layout and the images never change, so they are shared; only the
+        alive mask and the counters are copied.
+        """
+        other = copy.copy(self)
+        other._remains = dict(self._remains)
+        other._away = dict(self._away)
+        other._alive = self._alive.copy()
+        other._rowCount = self._rowCount.copy()
+        other._colCount = self._colCount.copy()
+        other._bottom = self._bottom.copy()
+        other._liveCols = list(self._liveCols)
+        other._colIndex = self._colIndex.copy()
+        other._live = dict(self._live)
+        return other
+
+    # FORMATION METHODS
+    def kill(self, row, col):
+        """
+        Removes the alien at the given slot from the formation.
+
+        Parameter row: the row of the alien
+        Precondition: an int with 0 <= row < _rows, and that alien is alive
+
+        Parameter col: the column of the alien
+        Precondition: an int with 0 <= col < _cols
+        """
+        self._remains[(row, col)] = self.getPosition(row, col)
+        self._remove(row, col)
+
+    def detach(self, row, col):
+        """
+        Takes the alien at the given slot out of the formation, without killing it.
+
+        Until it is attached or released, the slot is empty for every query of the
+        grid.
+
+        Parameter row: the row of the alien
+        Precondition: an int with 0 <= row < _rows, and that alien is alive
+
+        Parameter col: the column of the alien
+        Precondition: an int with 0 <= col < _cols
+        """
+        self._remove(row, col)
+        self._away[(row, col)] = True
+
+    def attach(self, row, col):
+        """
+        Puts an alien that is away back in its slot.
+
+        Parameter row: the row of the alien
+        Precondition: an int with 0 <= row < _rows, and isAway(row, col) is True
+
+        Parameter col: the column of the alien
+        Precondition: an int with 0 <= col < _cols
+        """
+        del self._away[(row, col)]
+        self._add(row, col)
+
+    def revive(self, row, col):
+        """
+        Puts a new living alien in an empty slot.
+
+        The slot may be that of a dead alien, whose remains are then forgotten, or a
+        hole in the shape.
+
+        Parameter row: the row of the alien
+        Precondition: an int with 0 <= row < _rows, and the slot is neither alive
+        nor away
+
+        Parameter col: the column of the alien
+        Precondition: an int with 0 <= col < _cols
+        """
+        self._remains.pop((row, col), None)
+        self._add(row, col)
+
+    def release(self, row, col, position):
+        """
+        Kills an alien that is away from the formation, where it is.
+
+        Parameter row: the row of the alien
+        Precondition: an int with 0 <= row < _rows, and isAway(row, col) is True
+
+        Parameter col: the column of the alien
+        Precondition: an int with 0 <= col < _cols
+
+        Parameter position: the world (x,y) position of the alien when it died
+        Precondition: a pair of numbers
+        """
+        del self._away[(row, col)]
+        self._remains[(row, col)] = position
+
+    def _add(self, row, col):
+        """
+        Puts the alien at the given slot in the grid, the counters, the extents and
+        the sparse index.
+
+        Parameter row: the row of the alien
+        Precondition: an int with 0 <= row < _rows, and that alien is not alive
+
+        Parameter col: the column of the alien
+        Precondition: an int with 0 <= col < _cols
+        """
+        self._alive[row, col] = True
+        self._live[(row, col)] = True
+        self._count += 1
+        self._rowCount[row] += 1
+        self._colCount[col] += 1
+
+        self._bottom[col] = max(self._bottom[col], row)
+        if self._colCount[col] == 1:
+            self._colIndex[col] = len(self._liveCols)
+            self._liveCols.append(col)
+        if self._count == 1:
+            self._leftCol = self._rightCol = col
+            self._lowRow = row
+        else:
+            self._leftCol = min(self._leftCol, col)
+            self._rightCol = max(self._rightCol, col)
+            self._lowRow = max(self._lowRow, row)
+
+    def _remove(self, row, col):
+        """
+        Takes the alien at the given slot out of the grid, the counters, the extents
+        and the sparse index.
+
+        Parameter row: the row of the alien
+        Precondition: an int with 0 <= row < _rows, and that alien is alive
+
+        Parameter col: the column of the alien
+        Precondition: an int with 0 <= col < _cols
+        """
+        self._alive[row, col] = False
+        del self._live[(row, col)]
+        self._count -= 1
+        self._rowCount[row] -= 1
+        self._colCount[col] -= 1
+
+        if self._bottom[col] == row:
+            self._bottom[col] = self._scan(self._alive[:, col], row-1, -1)
+        if self._colCount[col] == 0:
+            self._dropColumn(col)
+        if self._count == 0:
+            self._leftCol = self._rightCol = self._lowRow = -1
+            return
+
+        if self._colCount[col] == 0:
+            if col == self._leftCol:
+                self._leftCol = self._scan(self._colCount, col+1, 1)
+            if col == self._rightCol:
+                self._rightCol = self._scan(self._colCount, col-1, -1)
+
+        if row == self._lowRow and self._rowCount[row] == 0:
+            self._lowRow = self._scan(self._rowCount, row-1, -1)
+
+    def _dropColumn(self, col):
+        """
+        Removes an empty column from _liveCols by swapping it with the last one.
+
+        Parameter col: the column that just lost its last alien
+        Precondition: an int with 0 <= col < _cols, and col is in _liveCols
+        """
+        i = self._colIndex[col]
+        last = self._liveCols.pop()
+        if last != col:
+            self._liveCols[i] = last
+            self._colIndex[last] = i
+        self._colIndex[col] = -1
+
+    def _scan(self, values, start, step):
+        """
+        Returns the index of the first nonzero value, counting from start by step.
+
+        Returns -1 if every value from start onwards is zero.  This is only called
+        when an alien dies or leaves, so it never runs during an ordinary frame.
+
+        Parameter values: the values to search
+        Precondition: a 1d array of ints or bools
+
+        Parameter start: the first index to look at
+        Precondition: an int (it may be out of range, in which case -1 is returned)
+
+        Parameter step: the direction of the search
+        Precondition: 1 or -1
+        """
+        if start < 0 or start >= len(values):
+            return -1
+        if step > 0:
+            nonzero = np.flatnonzero(values[start:])
+        else:
+            nonzero = np.flatnonzero(values[start::-1])
+        if len(nonzero) == 0:
+            return -1
+        return start + step*int(nonzero[0])
+
+    def march(self, dx, dy):
+        """
+        Moves every living alien by (dx,dy).
+
+        This only changes the group offset, so it costs the same for any number
+        of aliens.
+
+        Parameter dx: the horizontal distance to move
+        Precondition: an int or float
+
+        Parameter dy: the vertical distance to move
+        Precondition: an int or float
+        """
+        self._ox += dx
+        self._oy += dy
+
+    def rightmost(self, ox=None):
+        """
+        Returns the x coordinate of the rightmost living alien.
+
+        Precondition: at least one alien is alive
+
+        Parameter ox: the horizontal offset of the formation to measure at
+        Precondition: a number, or None for the offset the formation has
+        """
+        if ox == None:
+            ox = self._ox
+        return float(self._colX[self._rightCol] + ox)
+
+    def leftmost(self, ox=None):
+        """
+        Returns the x coordinate of the leftmost living alien.
+
+        Precondition: at least one alien is alive
+
+        Parameter ox: the horizontal offset of the formation to measure at
+        Precondition: a number, or None for the offset the formation has
+        """
+        if ox == None:
+            ox = self._ox
+        return float(self._colX[self._leftCol] + ox)
+
+    def lowest(self, oy=None):
+        """
+        Returns the y coordinate of the lowest living alien.
+
+        Precondition: at least one alien is alive
+
+        Parameter oy: the vertical offset of the formation to measure at
+        Precondition: a number, or None for the offset the formation has
+        """
+        if oy == None:
+            oy = self._oy
+        return float(self._rowY[self._lowRow] + oy)
+
+    def columnAlive(self, col):
+        """
+        Returns True if any alien in the given column is alive.
+
+        Parameter col: the column to check
+        Precondition: an int with 0 <= col < _cols
+        """
+        return self._colCount[col] > 0
+
+    def bottomRow(self, col):
+        """
+        Returns the row of the lowest living alien in the given column.
+
+        Parameter col: the column to check
+        Precondition: an int with 0 <= col < _cols, and columnAlive(col) is True
+        """
+        return int(self._bottom[col])
+
+    def bottomPositions(self):
+        """
+        Returns the world x and y coordinates of the lowest alien in every column.
+
+        Empty columns are left out.  The result is a pair of arrays, ordered from
+        the left.  Only the living columns are visited, so a formation with a few
+        columns left is cheap however wide its grid.
+        """
+        cols = np.sort(np.array(self._liveCols, dtype=int))
+        xs = self._colX[cols] + self._ox
+        ys = self._rowY[self._bottom[cols]] + self._oy
+        return (xs, ys)
+
+    def collides(self, x, low, high):
+        """
+        Returns the (row,col) slot of the first alien hit by a player bolt, or None.
+
+        The bolt is swept over the whole distance it moved this step, from low to
+        high, so it cannot pass through an alien at low update rates.
+        An alien is hit when the swept bolt overlaps it; for a motionless bolt
+        smaller than the alien, this is Alien.collides, the test that one of the
+        four corners is strictly inside.  If several aliens are hit, the
+        first one the bolt reaches is returned: the lowest, as player bolts fly up.
+
+        The grid is regular, so the bolt is moved into formation-local coordinates
+        and the only columns and rows it can touch are computed arithmetically.
+        Just those few cells are tested, which makes the cost O(1) per bolt no
+        matter how large the formation is.
+
+        Parameter x: the horizontal coordinate of the center of the bolt
+        Precondition: a number
+
+        Parameter low: the lowest y coordinate of the center of the bolt this step
+        Precondition: a number
+
+        Parameter high: the highest y coordinate of the center of the bolt this step
+        Precondition: a number >= low
+        """
+        w = self._width/2
+        h = self._height/2
+        bx = x - self._ox
+        low -= self._oy
+        high -= self._oy
+
+        reachX = w + BOLT_WIDTH/2
+        reachY = h + BOLT_HEIGHT/2
+        near = bx - self._colX[0]
+        cols = self._candidates(near, near, self._pitchX, reachX, self._cols)
+        near = self._rowY[0] - high
+        far = self._rowY[0] - low
+        rows = self._candidates(near, far, self._pitchY, reachY, self._rows)
+
+        for row in reversed(rows):
+            y = self._rowY[row]
+            if not (y - h < high + BOLT_HEIGHT/2 and y + h > low - BOLT_HEIGHT/2):
+                continue
+            for col in cols:
+                if abs(self._colX[col] - bx) < reachX:
+                    if self._alive[row, col]:
+                        return (row, col)
+        return None
+
+    def ceiling(self, x, y, offset=None):
+        """
+        Returns the lowest bottom edge of a living alien a rising bolt could still hit.
+
+        The bolt has its center at (x,y) and flies straight up.  Aliens it cannot
+        overlap horizontally, or that are already entirely below it, are ignored.
+        The result is infinity if no alien is left in the path of the bolt.  Like
+        collides, this only looks at the few columns within reach of x.
+
+        Parameter x: the horizontal coordinate of the bolt
+        Precondition: a number
+
+        Parameter y: the vertical coordinate of the bolt
+        Precondition: a number
+
+        Parameter offset: the (x,y) offset of the formation to measure at
+        Precondition: a pair of numbers, or None for the offset the formation has
+        """
+        ox, oy = (self._ox, self._oy) if offset == None else offset
+        w = self._width/2
+        h = self._height/2
+        bx = x - ox
+        reachX = w + BOLT_WIDTH/2
+        near = bx - self._colX[0]
+        cols = self._candidates(near, near, self._pitchX, reachX, self._cols)
+        above = self._rowY + h > y - BOLT_HEIGHT/2 - oy
+
+        lowest = math.inf
+        for col in cols:
+            if self._colCount[col] > 0 and abs(self._colX[col] - bx) < reachX:
+                rows = np.flatnonzero(self._alive[:, col] & above)
+                if len(rows) > 0:
+                    lowest = min(lowest, self._rowY[rows[-1]] - h + oy)
+        return float(lowest)
+
+    def _candidates(self, near, far, pitch, reach, count):
+        """
+        Returns the range of slot indices within reach of a segment.
+
+        The range is conservative (it may include one slot too many on each side);
+        the caller still does the exact test.
+
+        Parameter near: how far the start of the segment is from slot 0, towards slot 1
+        Precondition: a number
+
+        Parameter far: how far the end of the segment is from slot 0, towards slot 1
+        Precondition: a number >= near
+
+        Parameter pitch: the distance between adjacent slots
+        Precondition: a number > 0
+
+        Parameter reach: the largest center distance that can still overlap
+        Precondition: a number > 0
+
+        Parameter count: the number of slots
+        Precondition: an int > 0
+        """
+        first = max(0, math.floor((near - reach) / pitch))
+        last = min(count-1, math.ceil((far + reach) / pitch))
+        return range(first, last+1)
@@ -62,8 +62,62 @@ class GameApp(kivy.app.App):
         self._fps = value
         Clock.schedule_interval(self._refresh,1.0/self._fps)
     
+    @property
+    def tick(self):
+        """
+        The length in seconds of a fixed simulation step, or None
+        
+        If this value is None (the default), :meth:`update` is called once per animation
+        frame with the real frame time, as it always has been.  Otherwise the game runs
+        on a fixed-rate clock: each animation frame calls :meth:`update` zero or more 
+        times, always with ``dt`` equal to this value, until simulated time catches up 
+        with real time.  Game speed then no longer depends on the frame rate.
+        
+        **Invariant**: Must be None or an int or float > 0.
+        """
+        return self._tick
+    
+    @tick.setter
+    def tick(self,value):
+        assert value is None or type(value) in [int,float], 'value %s is not a number' % repr(value)
+        assert value is None or value > 0, 'value %s is not positive' % repr(value)
+        self._tick = value
+        self._lag = 0.0
+        self._alpha = 1.0
+    
+    @property
+    def catchup(self):
+        """
+        The maximum number of simulation steps run for a single animation frame
+        
+        This only matters when :attr:`tick` is not None.  If a frame takes so long that
+        more steps are owed than this, the extra time is dropped.  A slow machine then 
+        skips drawn frames rather than falling further and further behind.
+        
+        **Invariant**: Must be an int > 0.
+        """
+        return self._catchup
+    
+    @catchup.setter
+    def catchup(self,value):
+        assert type(value) == int, 'value %s is not an int' % repr(value)
+        assert value > 0, 'value %s is not positive' % repr(value)
+        self._catchup = value
+    
     
     # IMMUTABLE PROPERTIES
+    @property
+    def alpha(self):
+        """
+        How far real time has moved past the last simulation step, as a fraction of a step
+        
+        Use this in :meth:`draw` to interpolate positions between the previous and the 
+        current simulation step.  It is always 1.0 when :attr:`tick` is None.
+        
+        **Invariant**: Must be a float in 0..1.
+        """
+        return self._alpha
+    
     @property
     def width(self):
         """
@@ -220,6 +274,8 @@ class GameApp(kivy.app.App):
             
             GameApp(width=400,height=400)
         
+        The keywords ``fps``, ``tick`` and ``catchup`` set the attributes of the same name.
+        
         The game window will not show until you start the game. To start the game, use 
         the method ``run()``.
         
@@ -232,6 +288,8 @@ class GameApp(kivy.app.App):
         w = keywords.pop('width', 0.0)
         h = keywords.pop('height', 0.0)
         f = keywords.pop('fps', 60.0)
+        t = keywords.pop('tick', None)
+        c = keywords.pop('catchup', 5)
 
         assert type(w) in [int,float], 'width %s is not a number' % repr(w)
         assert type(h) in [int,float], 'height %s is not a number' % repr(h)
@@ -241,6 +299,8 @@ class GameApp(kivy.app.App):
         self._gwidth = w
         self._gheight = h
         self._fps = f
+        self.tick = t
+        self.catchup = c
         
         Config.set('graphics', 'width', str(self.width))
         Config.set('graphics', 'height', str(self.height))
@@ -346,11 +406,25 @@ class GameApp(kivy.app.App):
         This method a callback-proxy for the methods `update` and `draw`.  It handles
         important issues behind the scenes, particularly with clearing the window.
         
+        If :attr:`tick` is set, this runs as many fixed steps as are owed (at most
+        :attr:`catchup`) and records the leftover fraction in :attr:`alpha`.
+        
         :param dt: time in seconds since last update
         :type dt:  ``int`` or ``float``
         """
         self.view.clear()
-        self.update(dt)
+        if self._tick is None:
+            self.update(dt)
+        else:
+            self._lag += dt
+            steps = 0
+            while self._lag >= self._tick and steps < self._catchup:
+                self.update(self._tick)
+                self._lag -= self._tick
+                steps += 1
+            if self._lag >= self._tick:
+                self._lag %= self._tick
+            self._alpha = self._lag/self._tick
         self.draw()
     
     def _setpaths(self):
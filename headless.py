@@ -0,0 +1,367 @@
+"""
+Headless simulation module for Alien Invaders
+
+This module runs waves without Kivy and without a window.  It is used for balancing,
+soak testing and benchmarks.  Nothing here imports game2d; the only thing Wave needs
+from GameApp during an update is an input object, and HeadlessInput stands in for it.
+
+Speed is measured in simulated frames per second: how many calls to Wave.update
+one core can make per wall-clock second.
+
+Per-frame cost targets for Wave.update, drawing excluded, on one core:
+
+    normal mode:       at most 50 us per frame for any formation up to MEGA_ROWS by
+                       MEGA_COLS; the cost must not grow with the number of aliens
+    bullet-hell mode:  at most 250 us per frame for a MEGA_ROWS by MEGA_COLS
+                       formation; the cost may grow with the number of columns
+                       (every bottom alien can fire) but not with the alien count
+
+Either is a small part of the 16.7 ms of a 60 Hz frame.  measureScaling checks them,
+and measureSystems breaks the cost of an update down by system.
+
+The settings of a session are a Config object, not globals read from the command line,
+so simulateBatch can play many different configurations in one process.
+"""
+from consts import *
+from wave import *
+from config import *
+import numpy as np
+import time
+
+
+class HeadlessInput(object):
+    """
+    A class that stands in for GInput when there is no window.
+
+    Only is_key_down is supported, since that is all Wave asks of its input.
+
+    INSTANCE ATTRIBUTES:
+        _keys: the keys currently held down [set of str]
+    """
+
+    # GETTERS AND SETTERS
+    def setKeys(self, keys):
+        """
+        Sets the keys that are currently held down.
+
+        Parameter keys: the names of the keys held down
+        Precondition: an iterable of strings, using GInput key names
+        """
+        self._keys = set(keys)
+
+    def is_key_down(self, key):
+        """
+        Returns True if the key is currently held down.
+
+        Parameter key: the key to test
+        Precondition: a string, using GInput key names
+        """
+        return key in self._keys
+
+    # INITIALIZER
+    def __init__(self, keys=()):
+        """
+        Creates an input with the given keys held down.
+
+        Parameter keys: the names of the keys held down
+        Precondition: an iterable of strings, using GInput key names
+        """
+        self.setKeys(keys)
+
+
+def simulate(wave, frames, dt=1/60, script=None, fast=False):
+    """
+    Returns the number of frames actually run after updating wave headlessly.
+
+    The simulation stops early if the wave is over or the ship is destroyed.  With
+    fast, the frames are split into runs with the same keys held, and each run is
+    given to Wave.fastForward.  The outcome is bit-identical; only the time it
+    takes differs.
+
+    Parameter wave: the wave to simulate
+    Precondition: a Wave object
+
+    Parameter frames: the maximum number of frames to run
+    Precondition: an int >= 0
+
+    Parameter dt: the time in seconds per frame
+    Precondition: a number > 0
+
+    Parameter script: function from frame number to the keys held that frame
+    Precondition: a function returning an iterable of strings, or None for no input
+
+    Parameter fast: whether to skip ahead between events with Wave.fastForward
+    Precondition: a bool
+    """
+    input = HeadlessInput()
+    if fast:
+        return _simulateFast(wave, frames, dt, script, input)
+    for frame in range(frames):
+        if script is not None:
+            input.setKeys(script(frame))
+        wave.update(dt, input)
+        if wave.gameOver() or wave.getShip() == None:
+            return frame+1
+    return frames
+
+
+def _simulateFast(wave, frames, dt, script, input):
+    """
+    Returns the number of frames actually run after fast-forwarding wave.
+
+    This is simulate with fast set; the parameters are those of simulate, plus the
+    input object to use.
+    """
+    frame = 0
+    while frame < frames:
+        keys = set(script(frame)) if script is not None else set()
+        run = 1
+        if script is None:
+            run = frames - frame
+        while frame+run < frames and set(script(frame+run)) == keys:
+            run += 1
+        input.setKeys(keys)
+        frame += wave.fastForward(run, dt, input)
+        if wave.gameOver() or wave.getShip() == None:
+            return frame
+    return frames
+
+
+def simulateBatch(configs, frames=6000, script=None, dt=1/60, fast=False):
+    """
+    Returns the outcome of the first wave of a session for each configuration.
+
+    The result is a list of (frames, result, score) triples, one per config in order:
+    the number of frames run, the result of the wave (see Wave.getResult) and the
+    score.  Each wave is seeded as Invaders seeds its first wave, so a config with a
+    seed plays the same wave as a game started with it.  Like Invaders.ACTIVE, a
+    destroyed ship costs a life and is replaced while lives are left.  When the last
+    one is lost, the run stops with the result False, which is how Invaders ends the
+    game.  All the waves come from one WaveFactory, so configs of the same size share
+    a formation template.
+
+    Parameter configs: the settings of each session to play
+    Precondition: an iterable of Config objects
+
+    Parameter frames: the maximum number of frames to run for each config
+    Precondition: an int > 0
+
+    Parameter script: function from frame number to the keys held that frame
+    Precondition: a function returning an iterable of strings, or None for no input
+
+    Parameter dt: the time in seconds per frame
+    Precondition: a number > 0
+
+    Parameter fast: whether to skip ahead between events with Wave.fastForward
+    Precondition: a bool
+    """
+    factory = WaveFactory()
+    result = []
+    for config in configs:
+        seed = config.getSeed()
+        if seed != None:
+            config = config.withSeed((seed, 0))
+        wave = factory.make(SHIP_LIVES, config.getSpeed(), 0, config)
+        lives = SHIP_LIVES
+        ran = 0
+        while ran < frames and not wave.gameOver():
+            offset = script
+            if script is not None:
+                offset = (lambda frame, start=ran: script(frame+start))
+            ran += simulate(wave, frames-ran, dt, offset, fast)
+            if wave.getShip() == None and not wave.gameOver():
+                lives -= 1
+                if lives == 0:
+                    break
+                wave.setShip()
+        outcome = False if lives == 0 else wave.getResult()
+        result.append((ran, outcome, wave.getScore()))
+    return result
+
+
+def measure(frames=6000, script=None, dt=1/60, seed=0, fast=False):
+    """
+    Returns the simulated frames per second for a fresh wave.
+
+    Parameter frames: the maximum number of frames to run
+    Precondition: an int > 0
+
+    Parameter dt: the time in seconds per frame
+    Precondition: a number > 0
+
+    Parameter script: function from frame number to the keys held that frame
+    Precondition: a function returning an iterable of strings, or None for no input
+
+    Parameter seed: the seed for the wave, so that every run plays the same game
+    Precondition: an int >= 0, or None for a fresh game each run
+
+    Parameter fast: whether to skip ahead between events with Wave.fastForward
+    Precondition: a bool
+    """
+    wave = Wave(SHIP_LIVES, ALIEN_SPEED, 0, Config(seed=seed))
+    start = time.perf_counter()
+    ran = simulate(wave, frames, dt, script, fast)
+    elapsed = time.perf_counter() - start
+    return ran / elapsed if elapsed > 0 else float('inf')
+
+
+def measureSystems(frames=6000, script=None, dt=1/60, seed=0, barrage=False):
+    """
+    Returns how often each system of a fresh wave ran, and what it cost.
+
+    The result is a list of (name, runs, microseconds) triples, one per system that
+    ran at least once, in the order they first ran: the number of updates it ran in
+    and its average time per run.  A system that runs at the alien step rate shows
+    far fewer runs than there were frames.
+
+    Parameter frames: the maximum number of frames to run
+    Precondition: an int > 0
+
+    Parameter script: function from frame number to the keys held that frame
+    Precondition: a function returning an iterable of strings, or None for no input
+
+    Parameter dt: the time in seconds per frame
+    Precondition: a number > 0
+
+    Parameter seed: the seed for the wave, so that every run plays the same game
+    Precondition: an int >= 0, or None for a fresh game each run
+
+    Parameter barrage: whether to play in bullet-hell mode
+    Precondition: a bool
+    """
+    totals = {}
+    def profiler(records):
+        for (name, seconds) in records:
+            runs, elapsed = totals.get(name, (0, 0.0))
+            totals[name] = (runs+1, elapsed+seconds)
+
+    wave = Wave(SHIP_LIVES, ALIEN_SPEED, 0, Config(seed=seed, barrage=barrage))
+    wave.setProfiler(profiler)
+    simulate(wave, frames, dt, script)
+    return [(name, runs, elapsed/runs*1e6) for (name, (runs, elapsed)) in totals.items()]
+
+
+def measureBarrage(live=5000, frames=600, seed=0):
+    """
+    Returns the updates per second of a bullet-hell field holding live bolts.
+
+    The field is filled with bolts spread over the screen.  Every update moves them,
+    tests them against a ship, and tops the field back up to the target count, so
+    the measured cost is for a steady state of that many live bolts.
+
+    Parameter live: the number of live bolts to keep in the field
+    Precondition: an int > 0
+
+    Parameter frames: the number of updates to run
+    Precondition: an int > 0
+
+    Parameter seed: the seed for where the bolts are spawned
+    Precondition: an int >= 0, or None for a fresh layout each run
+    """
+    rng = np.random.default_rng(seed)
+    field = BoltField()
+    ship = Ship()
+    field.spawn(rng.uniform(0, GAME_WIDTH, live),
+                rng.uniform(0, GAME_HEIGHT, live), -BARRAGE_SPEED)
+    start = time.perf_counter()
+    for frame in range(frames):
+        field.advance()
+        field.collides(ship)
+        missing = live - field.getSize()
+        if missing > 0:
+            field.spawn(rng.uniform(0, GAME_WIDTH, missing),
+                        np.full(missing, float(GAME_HEIGHT)), -BARRAGE_SPEED)
+    elapsed = time.perf_counter() - start
+    return frames / elapsed if elapsed > 0 else float('inf')
+
+
+def measureFork(count=2000, seed=0):
+    """
+    Returns how many times per second a wave in play can be forked.
+
+    A fork is a snapshot of one wave restored into another, as a search bot or
+    rollback would do.  The wave is first played for a while, so that it has bolts
+    in flight and dead aliens.
+
+    Parameter count: the number of forks to make
+    Precondition: an int > 0
+
+    Parameter seed: the seed for the wave that is forked
+    Precondition: an int >= 0, or None for a fresh game each run
+    """
+    wave = Wave(SHIP_LIVES, ALIEN_SPEED, 0, Config(seed=seed))
+    simulate(wave, 1500, script=_sweep)
+    fork = Wave(SHIP_LIVES, ALIEN_SPEED, 0)
+    start = time.perf_counter()
+    for i in range(count):
+        fork.restore(wave.snapshot())
+    elapsed = time.perf_counter() - start
+    return count / elapsed if elapsed > 0 else float('inf')
+
+
+def measureScaling(sizes=((5,12), (10,15), (25,50), (50,100), (100,200)),
+                   frames=2000, barrage=False, seed=0):
+    """
+    Returns the microseconds per update for waves with formations of the given sizes.
+
+    The result is a list of (aliens, microseconds) pairs, one per size.  Each wave
+    is played by the sweeping bot; a destroyed ship is replaced so that the wave
+    keeps going until it is over or the frames run out.
+
+    Parameter sizes: the formation sizes to measure
+    Precondition: a sequence of (rows, cols) pairs of ints > 0
+
+    Parameter frames: the maximum number of frames to run for each size
+    Precondition: an int > 0
+
+    Parameter barrage: whether to play in bullet-hell mode
+    Precondition: a bool
+
+    Parameter seed: the seed for every wave
+    Precondition: an int >= 0, or None for fresh games each run
+    """
+    factory = WaveFactory()
+    input = HeadlessInput()
+    result = []
+    for (rows, cols) in sizes:
+        config = Config(rows, cols, seed=seed, barrage=barrage)
+        wave = factory.make(SHIP_LIVES, ALIEN_SPEED, 0, config)
+        ran = 0
+        start = time.perf_counter()
+        while ran < frames and not wave.gameOver():
+            input.setKeys(_sweep(ran))
+            wave.update(1/60, input)
+            if wave.getShip() == None:
+                wave.setShip()
+            ran += 1
+        elapsed = time.perf_counter() - start
+        result.append((rows*cols, elapsed/ran*1e6))
+    return result
+
+
+def _sweep(frame):
+    """
+    Returns the keys for a simple bot that sweeps the ship and fires constantly.
+
+    Parameter frame: the frame number
+    Precondition: an int >= 0
+    """
+    if (frame // 120) % 2 == 0:
+        return ('right', 'spacebar')
+    return ('left', 'spacebar')
+
+
+# Application code
+if __name__ == '__main__':
+    print('idle:  %.0f simulated frames/sec' % measure())
+    print('sweep: %.0f simulated frames/sec' % measure(script=_sweep))
+    print('sweep at 15 Hz: %.0f simulated frames/sec' % measure(script=_sweep, dt=1/15))
+    print('idle, fast-forward:  %.0f simulated frames/sec' % measure(fast=True))
+    print('sweep, fast-forward: %.0f simulated frames/sec' %
+          measure(script=_sweep, fast=True))
+    print('5000 bullet-hell bolts: %.0f updates/sec' % measureBarrage())
+    print('snapshot and restore: %.0f forks/sec' % measureFork())
+    for barrage in (False, True):
+        mode = 'bullet-hell' if barrage else 'normal'
+        for (aliens, cost) in measureScaling(barrage=barrage):
+            print('%s, %6d aliens: %.1f us/update' % (mode, aliens, cost))
@@ -15,6 +15,9 @@ there are a lot of constants in consts.py for initializing the objects, and you
 want to add a custom initializer.  With that said, feel free to keep the pass underneath
 the class definitions if you do not want to do that.
 
+Laser bolts are not model objects.  A wave has many of them, coming and going every
+few frames, so they are entities with their data in dense arrays (see entities.py).
+
 You are free to add even more models to this module.  You may wish to do this when you
 add new features to your game, such as power-ups.  If you are unsure about whether to
 make a new class or not, please ask on Piazza.
@@ -23,15 +26,110 @@ Jin Ryu jfr224
 December 4th 2018
 """
 from consts import *
-from game2d import *
 
 # PRIMARY RULE: Models are not allowed to access anything in any module other than
 # consts.py.  If you need extra information from Gameplay, then it should be
 # a parameter in your method, and Wave should pass it as a argument when it
 # calls the method.
+#
+# Models are plain data and never import game2d.  They can be simulated in a process
+# without Kivy; the module render.py turns them into drawables when a view exists.
+
+
+class Model(object):
+    """
+    A class representing an axis-aligned box in game coordinates.
 
+    This is the headless replacement for the parts of GObject that the game logic
+    actually uses: a center, a size and a bounding box test.  There are no Kivy
+    transforms, so moving a model is just an attribute assignment.
 
-class Ship(GImage):
+    INSTANCE ATTRIBUTES:
+        x:      the horizontal coordinate of the center [int or float]
+        y:      the vertical coordinate of the center [int or float]
+        width:  the horizontal width of the box [int or float > 0]
+        height: the vertical height of the box [int or float > 0]
+        _px:    the value of x at the start of the current step [int or float]
+        _py:    the value of y at the start of the current step [int or float]
+    """
+
+    # INITIALIZER TO SET THE BOX
+    def __init__(self, x, y, width, height):
+        """
+        Creates a new model box.
+
+        Parameter x: the horizontal coordinate of the center
+        Precondition: an int or float
+
+        Parameter y: the vertical coordinate of the center
+        Precondition: an int or float
+
+        Parameter width: the horizontal width of the box
+        Precondition: an int or float > 0
+
+        Parameter height: the vertical height of the box
+        Precondition: an int or float > 0
+        """
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self._px = x
+        self._py = y
+
+    def savePosition(self):
+        """
+        Remembers the current position as the start of a new simulation step.
+        """
+        self._px = self.x
+        self._py = self.y
+
+    def getSavedPosition(self):
+        """
+        Returns the (x,y) position at the start of the current step.
+        """
+        return (self._px, self._py)
+
+    def setSavedPosition(self, x, y):
+        """
+        Sets the position at the start of the current step.
+
+        This is only for restoring a snapshot; during play use savePosition.
+
+        Parameter x: the horizontal coordinate at the start of the step
+        Precondition: an int or float
+
+        Parameter y: the vertical coordinate at the start of the step
+        Precondition: an int or float
+        """
+        self._px = x
+        self._py = y
+
+    def getDrawPosition(self, alpha):
+        """
+        Returns the (x,y) position to draw at, between the last two steps.
+
+        Parameter alpha: how far real time is past the start of the current step
+        Precondition: a float in 0..1, where 1 means the current position
+        """
+        if alpha >= 1:
+            return (self.x, self.y)
+        return (self._px + (self.x-self._px)*alpha, self._py + (self.y-self._py)*alpha)
+
+    def contains(self, point):
+        """
+        Returns True if the point is strictly inside this box.
+
+        This matches GObject.contains for an unrotated object.
+
+        Parameter point: the point to check
+        Precondition: a pair of numbers
+        """
+        return (abs(point[0]-self.x) < self.width/2 and
+                abs(point[1]-self.y) < self.height/2)
+
+
+class Ship(Model):
     """
     A class to represent the game ship.
 
@@ -50,53 +148,63 @@ class Ship(GImage):
     collision method.
 
     However, there is no need for any more attributes other than those inherited by
-    GImage. You would only add attributes if you needed them for extra gameplay
+    Model. You would only add attributes if you needed them for extra gameplay
     features (like animation). If you add attributes, list them below.
 
     LIST MORE ATTRIBUTES (AND THEIR INVARIANTS) HERE IF NECESSARY
+    _source: the image file used when the ship is drawn
+    Precondition: a string refering to a valid file
     """
     # GETTERS AND SETTERS (ONLY ADD IF YOU NEED THEM)
+    def getSource(self):
+        """
+        Returns the attribute _source.
+        """
+        return self._source
 
     # INITIALIZER TO CREATE A NEW SHIP
     def __init__(self):
         """
         Creates a new ship.
 
-        This method inherits the initializer method from class GImage.
+        This method inherits the initializer method from class Model.
         """
         h_pos = GAME_WIDTH / 2
         v_pos = SHIP_BOTTOM + SHIP_HEIGHT / 2
         w = SHIP_WIDTH
         h = SHIP_HEIGHT
-        s = 'ship.png'
+        self._source = 'ship.png'
 
-        super().__init__(x=h_pos, y=v_pos, width=w, height=h, source=s)
+        super().__init__(h_pos, v_pos, w, h)
 
     # METHODS TO MOVE THE SHIP AND CHECK FOR COLLISIONS
-    def collides(self,bolt):
+    def collides(self, x, low, high):
         """
-        Returns True if the bolt was fired by the player and collides with
-        this alien.
+        Returns True if an alien bolt collides with this ship.
 
-        Parameter bolt: The laser bolt to check
-        Precondition: bolt is of class Bolt
-        """
-        assert not bolt.isPlayerBolt()
+        Parameter x: the horizontal coordinate of the center of the bolt
+        Precondition: a number
 
-        x = [bolt.x - BOLT_WIDTH/2, bolt.x + BOLT_WIDTH/2]
-        y = [bolt.y - BOLT_HEIGHT/2, bolt.y + BOLT_HEIGHT/2,]
+        Parameter low: the lowest y coordinate of the center of the bolt this step
+        Precondition: a number
 
-        for h_edge in x:
-            for v_edge in y:
-                if self.contains((h_edge, v_edge)):
-                    return True
-        return False
+        Parameter high: the highest y coordinate of the center of the bolt this step
+        Precondition: a number >= low
+        """
+        # The bolt is swept over the whole distance it moved this step, so it
+        # cannot pass through the ship at low update rates.  As a bolt is smaller
+        # than the ship, for a motionless bolt this is the four-corner test.
+        if not (self.contains((x - BOLT_WIDTH/2, self.y)) or
+                self.contains((x + BOLT_WIDTH/2, self.y))):
+            return False
+        return (self.y - self.height/2 < high + BOLT_HEIGHT/2 and
+                self.y + self.height/2 > low - BOLT_HEIGHT/2)
 
 
     # ADD MORE METHODS (PROPERLY SPECIFIED) AS NECESSARY
 
 
-class Alien(GImage):
+class Alien(Model):
     """
     A class to represent a single alien.
 
@@ -111,179 +219,118 @@ class Alien(GImage):
     collision method.
 
     However, there is no need for any more attributes other than those inherited by
-    GImage. You would only add attributes if you needed them for extra gameplay
+    Model. You would only add attributes if you needed them for extra gameplay
     features (like giving each alien a score value). If you add attributes, list
     them below.
 
     LIST MORE ATTRIBUTES (AND THEIR INVARIANTS) HERE IF NECESSARY
     _source: the source file for this image
     Precondition: a string refering to a valid file
+    _row: the row in which the alien locates [int, 1 <= _row <= number of rows]
+    _col: the column in which the alien locates [int >= 1]
     """
 
     # GETTERS AND SETTERS (ONLY ADD IF YOU NEED THEM)
-    def setImage(self, row):
+    def getSource(self):
+        """
+        Returns the attribute _source.
+        """
+        return self._source
+
+    def getRow(self):
+        """
+        Returns the attribute _row.
+        """
+        return self._row
+
+    def getCol(self):
+        """
+        Returns the attribute _col.
+        """
+        return self._col
+
+    def setImage(self, row, rows):
         """
         Returns a source image for the alien.
 
         Parameter row: the row in which the alien locates
-        Precondition: an integer between 1 <= row <= ALIEN_ROWS
-        """
-        rowRange = ALIEN_ROWS
-        sourceNumber = 0
-        while rowRange > 0:
-            rowRange -= 2
-            if row > rowRange and rowRange+2 >= row:
-                i = sourceNumber
-            sourceNumber += 1
+        Precondition: an integer between 1 <= row <= rows
 
-        index = i % len(ALIEN_IMAGES)
-        return ALIEN_IMAGES[index]
+        Parameter rows: the number of rows in the formation
+        Precondition: an int > 0
+        """
+        return ALIEN_IMAGES[Alien.imageIndex(row, rows)]
 
     # INITIALIZER TO CREATE AN ALIEN
-    def __init__(self, row, col):
+    def __init__(self, row, col, config=None):
         """
         Creates a new alien.
 
-        This method inherits the initializer method from class GImage.
+        This method inherits the initializer method from class Model.
 
         Parameter row: the row in which the alien locates
-        Precondition: an integer between 1 <= row <= ALIEN_ROWS
+        Precondition: an integer between 1 <= row <= the number of rows of config
 
         Parameter col: the column in which the alien locates
-        Precondition: an integer between 1 <= col <= ALIENS_IN_ROW
+        Precondition: an integer >= 1
+
+        Parameter config: the settings of the game, for the size of the formation
+        Precondition: a Config object, or None for a formation of ALIEN_ROWS rows
         """
-        s = self.setImage(row)
+        rows = ALIEN_ROWS if config == None else config.getRows()
+        self._source = self.setImage(row, rows)
+        self._row = row
+        self._col = col
 
-        h_pos = col * ALIEN_H_SEP + (ALIEN_WIDTH/2) * (1 + 2*(col-1))
-        v_pos = GAME_HEIGHT - ALIEN_CEILING - ALIEN_V_SEP * (row-1)
-        v_pos -= (ALIEN_HEIGHT/2) * (1 + 2*(row-1))
+        h_pos = Alien.slotX(col)
+        v_pos = Alien.slotY(row)
         w = ALIEN_WIDTH
         h = ALIEN_HEIGHT
 
-        super().__init__(x=h_pos, y=v_pos, width=w, height=h, source=s)
-
-    # METHOD TO CHECK FOR COLLISION (IF DESIRED)
-    def collides(self,bolt):
-        """
-        Returns True if the bolt was fired by the player and collides with
-        this alien.
+        super().__init__(h_pos, v_pos, w, h)
 
-        Parameter bolt: The laser bolt to check
-        Precondition: bolt is of class Bolt
+    # FORMATION LAYOUT (SHARED WITH formation.py)
+    @staticmethod
+    def slotX(col):
         """
-        assert bolt.isPlayerBolt()
-        x = [bolt.x - BOLT_WIDTH/2, bolt.x + BOLT_WIDTH/2]
-        y = [bolt.y - BOLT_HEIGHT/2, bolt.y + BOLT_HEIGHT/2]
+        Returns the starting x coordinate of an alien in the given column.
 
-        for h_edge in x:
-            for v_edge in y:
-                if self.contains((h_edge, v_edge)):
-                    return True
-        return False
+        The arithmetic also works elementwise on a NumPy array of columns.
 
-
-class Bolt(GRectangle):
-    """
-    A class representing a laser bolt.
-
-    Laser bolts are often just thin, white rectangles.  The size of the bolt is
-    determined by constants in consts.py. We MUST subclass GRectangle, because we
-    need to add an extra attribute for the velocity of the bolt.
-
-    The class Wave will need to look at these attributes, so you will need getters for
-    them.  However, it is possible to write this assignment with no setters for the
-    velocities.  That is because the velocity is fixed and cannot change once the bolt
-    is fired.
-
-    In addition to the getters, you need to write the __init__ method to set the starting
-    velocity. This __init__ method will need to call the __init__ from GRectangle as a
-    helper.
-
-    You also MIGHT want to create a method to move the bolt.  You move the bolt by adding
-    the velocity to the y-position.  However, the getter allows Wave to do this on its
-    own, so this method is not required.
-
-    INSTANCE ATTRIBUTES:
-        _velocity: The velocity in y direction [int or float]
-
-    LIST MORE ATTRIBUTES (AND THEIR INVARIANTS) HERE IF NECESSARY
-        _whichAlien: The alien from which the bolt is fired [Alien object]
-        _whenToFire: The number of alien steps required to fire the bolt [int]
-        _state: The state of the alien bolt, either 'active' or 'inactive' [str]
-    """
-
-    # GETTERS AND SETTERS (ONLY ADD IF YOU NEED THEM)
-    def getWhenToFire(self):
-        """
-        Returns the bolt attritbue _whenToFire.
-        """
-        return self._whenToFire
-
-    def getWhichAlien(self):
-        """
-        Returns the bolt attritbue _whichAlien.
+        Parameter col: the column in which the alien locates
+        Precondition: an integer (or array of them) >= 1
         """
-        return self._whichAlien
+        return col * ALIEN_H_SEP + (ALIEN_WIDTH/2) * (1 + 2*(col-1))
 
-    def setBoltState(self, state):
+    @staticmethod
+    def imageIndex(row, rows):
         """
-        Returns the bolt attritbue _state.
+        Returns the index in ALIEN_IMAGES of the image for the given row.
 
-        Parameter state: state of the alien bolt being fired or not
-        Precondition: a string, either 'active' or 'inactive'
-        """
-        self._state = state
+        Rows pair up from the bottom, and each pair takes the next image, wrapping
+        around.  The arithmetic also works elementwise on a NumPy array of rows.
 
-    def getBoltState(self):
-        """
-        Returns the bolt attritbue _state.
-        """
-        return self._state
+        Parameter row: the row in which the alien locates
+        Precondition: an integer (or array of them) with 1 <= row <= rows
 
-    # INITIALIZER TO SET THE VELOCITY
-    def __init__(self, which, strwhich, when=None):
+        Parameter rows: the number of rows in the formation
+        Precondition: an int > 0
         """
-        Creates a bolt.
+        return ((rows - row) // 2) % len(ALIEN_IMAGES)
 
-        This method inherits the initializer method from class GRectangle.
-
-        Parameter which: the object from which this alien bolt is fired
-        Precondition: either a Ship object or an Alien object
-
-        Paramter strwhich: a string that indicates what kind of object is firing
-        Preconditon: a string, either 'ship' or 'alien'
-
-        Parameter when: number of alien steps required to fire the alien bolt
-        Precondition: an int between 1 <= when <= BOLT_RATE
+    @staticmethod
+    def slotY(row):
         """
-        if strwhich == 'ship':
-            self._velocity = BOLT_SPEED
-            Y = SHIP_BOTTOM + SHIP_HEIGHT + BOLT_HEIGHT/2
+        Returns the starting y coordinate of an alien in the given row.
 
-        elif strwhich == 'alien':
-            self._velocity = -BOLT_SPEED
-            self._whichAlien = which
-            self._whenToFire = when
-            self._state = 'inactive'
-            Y = which.y - ALIEN_HEIGHT/2
+        The arithmetic also works elementwise on a NumPy array of rows.
 
-        X = which.x
-        w = BOLT_WIDTH
-        h = BOLT_HEIGHT
-        c1 = 'black'
-        c2 = 'blue'
-
-        super().__init__(x=X,y=Y,width=w,height=h,fillcolor=c1,linewidth=1,linecolor=c2)
-
-    # ADD MORE METHODS (PROPERLY SPECIFIED) AS NECESSARY
-    def isPlayerBolt(self):
-        """
-        Returns True if this bolt from the player's ship. If not, returns False.
+        Parameter row: the row in which the alien locates
+        Precondition: an integer (or array of them) >= 1
         """
-        if self._velocity > 0:
-            return True
-        else:
-            return False
+        v_pos = GAME_HEIGHT - ALIEN_CEILING - ALIEN_V_SEP * (row-1)
+        v_pos -= (ALIEN_HEIGHT/2) * (1 + 2*(row-1))
+        return v_pos
 
 
 # IF YOU NEED ADDITIONAL MODEL CLASSES, THEY GO HERE
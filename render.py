@@ -0,0 +1,437 @@
+"""
+Render adapter module for Alien Invaders
+
+This module turns the plain models from models.py into game2d drawables.  The models
+themselves never touch Kivy, so a Wave can be simulated in a process without a window.
+Only when a Wave is first drawn does it build a WaveRenderer, and only the renderer
+creates GImage, GRectangle and GPath objects.
+
+Drawables are created once per model and then kept in sync with the model position.
+Moving a model is free; the drawable is only touched when it is about to be drawn.
+Bolts are entities with no model object, so their drawables are handed out by row and
+reused from frame to frame.
+
+The aliens are children of one GScene in formation-local coordinates, so a march step
+only moves the scene.  Aliens on a dive are out of the scene; like bolts, they are
+entities, and their images are handed out by row.
+
+A bunker is drawn from a texture with one texel per cell of its bitmask.  The texture
+is filled once, and after that only the cells damaged since the last frame are copied
+to it, so a hit costs the same however large the bunker is.
+"""
+from consts import *
+from game2d import *
+from kivy.graphics import Color, Rectangle, PopMatrix
+from kivy.graphics.texture import Texture
+import numpy as np
+
+# The color of an empty and of a solid bunker cell, as RGBA bytes
+_BUNKER_COLORS = np.array([[0, 0, 0, 0], [0, 160, 0, 255]], dtype=np.uint8)
+
+
+class WaveRenderer(object):
+    """
+    A class that draws the models of a single Wave.
+
+    INSTANCE ATTRIBUTES:
+        _sprites: the drawable for each ship seen so far [dict of model to GObject]
+        _aliens:  the drawable for each living alien [dict of (row,col) slot to GImage]
+        _group:   the scene holding the alien drawables [GScene]
+        _count:   the number of living aliens when _group was built [int >= 0, or -1]
+        _bolts:   the reusable drawables for bolt entities [list of GRectangle]
+        _barrage: the reusable drawables for bullet-hell bolts [list of GRectangle]
+        _shields: the reusable drawables for alien shields [list of GEllipse]
+        _divers:  the reusable drawables for diving aliens [list of GImage]
+        _bunkers: the drawable for each bunker, from the left [list of BunkerImage]
+        _dline:   the defensive line being protected [GPath]
+    """
+
+    # INITIALIZER TO CREATE THE STATIC DRAWABLES
+    def __init__(self):
+        """
+        Creates an empty renderer with the defensive line.
+        """
+        self._sprites = {}
+        self._aliens = {}
+        self._group = GScene(x=0, y=0)
+        self._count = -1
+        self._bolts = []
+        self._barrage = []
+        self._shields = []
+        self._divers = []
+        self._bunkers = []
+        points = [0, DEFENSE_LINE, GAME_WIDTH, DEFENSE_LINE]
+        self._dline = GPath(points = points, linewidth = 1, linecolor = 'black')
+
+    def invalidate(self):
+        """
+        Makes the next draw rebuild the alien drawables.
+
+        Wave calls this after restoring a snapshot, since the living aliens may
+        have changed without their count changing.
+        """
+        self._count = -1
+
+    # DRAW METHODS
+    def draw(self, view, ship, formation, bolts, barrage=None, alpha=1.0, shields=(),
+             divers=None, bunkers=None):
+        """
+        Draws the aliens, diving or not, and their shields, the ship, the bunkers,
+        the defensive line and the bolts.
+
+        Ship and bolt drawables are kept even when nothing uses them, to be
+        reused later.
+
+        Parameter view: the game view, used in drawing
+        Precondition: instance of GView; it is inherited from GameApp
+
+        Parameter ship: the player ship
+        Precondition: a Ship object or None
+
+        Parameter formation: the aliens to draw
+        Precondition: a Formation object
+
+        Parameter bolts: the bolts to draw
+        Precondition: an iterable of Archetypes with the components x, y, px and py
+
+        Parameter barrage: the bullet-hell bolts to draw
+        Precondition: a BoltField object, or None
+
+        Parameter alpha: how far real time is past the last update
+        Precondition: a float in 0..1
+
+        Parameter shields: the slots of the aliens whose shield is up
+        Precondition: a collection of (row,col) slots of living aliens
+
+        Parameter divers: the aliens away from the formation on a dive
+        Precondition: an Archetype with the components row, col, x, y, px and py,
+        or None
+
+        Parameter bunkers: the bunkers to draw
+        Precondition: a Bunkers object, or None
+        """
+        self._drawFormation(view, formation)
+
+        if divers:
+            self._drawDivers(view, formation, divers, alpha)
+
+        if shields:
+            self._drawShields(view, formation, shields, divers)
+
+        if ship != None:
+            self._drawModel(view, ship, alpha)
+
+        if bunkers != None:
+            self._drawBunkers(view, bunkers)
+
+        self._dline.draw(view)
+
+        self._drawBolts(view, bolts, alpha)
+
+        if barrage != None:
+            self._drawBarrage(view, barrage, alpha)
+
+    def _drawBarrage(self, view, barrage, alpha):
+        """
+        Draws the bolts of a bullet-hell field.
+
+        The field has no bolt objects, so drawables are handed out by index and
+        reused from frame to frame.
+
+        Parameter view: the game view, used in drawing
+        Precondition: instance of GView
+
+        Parameter barrage: the bullet-hell bolts to draw
+        Precondition: a BoltField object
+
+        Parameter alpha: how far real time is past the last update
+        Precondition: a float in 0..1
+        """
+        xs, ys = barrage.getPositions(alpha)
+        for i in range(barrage.getSize()):
+            if i == len(self._barrage):
+                self._barrage.append(self._makeBolt(0.0, 0.0))
+            sprite = self._barrage[i]
+            sprite.x = float(xs[i])
+            sprite.y = float(ys[i])
+            sprite.draw(view)
+
+    def _drawBunkers(self, view, bunkers):
+        """
+        Draws the bunkers, first copying the cells damaged since the last draw to
+        their textures.
+
+        Parameter view: the game view, used in drawing
+        Precondition: instance of GView
+
+        Parameter bunkers: the bunkers to draw
+        Precondition: a Bunkers object
+        """
+        rows, cols = bunkers.getSize()
+        for i in range(bunkers.getCount()):
+            if i == len(self._bunkers):
+                left, bottom, width, height = bunkers.getBounds(i)
+                self._bunkers.append(BunkerImage(rows, cols, x=left+width/2,
+                                                 y=bottom+height/2, width=width,
+                                                 height=height))
+            sprite = self._bunkers[i]
+            dirty = bunkers.takeDirty(i)
+            if dirty != None:
+                sprite.blit(bunkers.getMask(i), dirty)
+            sprite.draw(view)
+
+    def _drawDivers(self, view, formation, divers, alpha):
+        """
+        Draws the diving aliens, between their positions at the last two updates.
+
+        Parameter view: the game view, used in drawing
+        Precondition: instance of GView
+
+        Parameter formation: the formation the divers belong to
+        Precondition: a Formation object
+
+        Parameter divers: the aliens away from the formation on a dive
+        Precondition: an Archetype with the components row, col, x, y, px and py
+
+        Parameter alpha: how far real time is past the last update
+        Precondition: a float in 0..1
+        """
+        w, h = formation.getAlienSize()
+        rows = divers.column('row')
+        cols = divers.column('col')
+        xs = divers.column('x')
+        ys = divers.column('y')
+        pxs = divers.column('px')
+        pys = divers.column('py')
+        for i in range(len(divers)):
+            source = formation.getSource(rows[i], cols[i])
+            if i == len(self._divers):
+                self._divers.append(GImage(x=0.0, y=0.0, width=w, height=h,
+                                           source=source))
+            sprite = self._divers[i]
+            if sprite.source != source:
+                sprite.source = source
+            sprite.x = float(pxs[i] + (xs[i]-pxs[i])*alpha)
+            sprite.y = float(pys[i] + (ys[i]-pys[i])*alpha)
+            sprite.draw(view)
+
+    def _drawShields(self, view, formation, shields, divers=None):
+        """
+        Draws a shield around each of the given aliens.
+
+        Shields come and go, so drawables are handed out by index and reused from
+        frame to frame.
+
+        Parameter view: the game view, used in drawing
+        Precondition: instance of GView
+
+        Parameter formation: the aliens the shields belong to
+        Precondition: a Formation object
+
+        Parameter shields: the slots of the aliens whose shield is up
+        Precondition: a collection of (row,col) slots of living aliens
+
+        Parameter divers: the aliens away from the formation on a dive
+        Precondition: an Archetype with the components row, col, x and y, holding
+        every shielded alien that is away, or None if none is
+        """
+        w, h = formation.getAlienSize()
+        away = {}
+        if divers:
+            for row in range(len(divers)):
+                slot = (divers.column('row')[row], divers.column('col')[row])
+                away[slot] = (divers.column('x')[row], divers.column('y')[row])
+        i = 0
+        for slot in shields:
+            if i == len(self._shields):
+                self._shields.append(GEllipse(x=0.0, y=0.0, width=w*1.4, height=h*1.4,
+                                              linewidth=2, linecolor='cyan'))
+            sprite = self._shields[i]
+            if slot in away:
+                sprite.x, sprite.y = away[slot]
+            else:
+                sprite.x, sprite.y = formation.getPosition(slot[0], slot[1])
+            sprite.draw(view)
+            i += 1
+
+    def _drawBolts(self, view, bolts, alpha):
+        """
+        Draws the bolt entities, between their positions at the last two updates.
+
+        Parameter view: the game view, used in drawing
+        Precondition: instance of GView
+
+        Parameter bolts: the bolts to draw
+        Precondition: an iterable of Archetypes with the components x, y, px and py
+
+        Parameter alpha: how far real time is past the last update
+        Precondition: a float in 0..1
+        """
+        i = 0
+        for archetype in bolts:
+            xs = archetype.column('x')
+            ys = archetype.column('y')
+            pxs = archetype.column('px')
+            pys = archetype.column('py')
+            for row in range(len(archetype)):
+                if i == len(self._bolts):
+                    self._bolts.append(self._makeBolt(0.0, 0.0))
+                sprite = self._bolts[i]
+                if alpha >= 1:
+                    sprite.x = float(xs[row])
+                    sprite.y = float(ys[row])
+                else:
+                    sprite.x = float(pxs[row] + (xs[row]-pxs[row])*alpha)
+                    sprite.y = float(pys[row] + (ys[row]-pys[row])*alpha)
+                sprite.draw(view)
+                i += 1
+
+    def _drawFormation(self, view, formation):
+        """
+        Draws every living alien of the formation.
+
+        The children of the scene only change when an alien dies.  Otherwise
+        drawing the formation is one translation of the scene.
+
+        Parameter view: the game view, used in drawing
+        Precondition: instance of GView
+
+        Parameter formation: the aliens to draw
+        Precondition: a Formation object
+        """
+        if formation.count() != self._count:
+            aliens = {}
+            for slot in formation.living():
+                sprite = self._aliens.get(slot)
+                if sprite is None:
+                    x, y = formation.getLocal(slot[0], slot[1])
+                    w, h = formation.getAlienSize()
+                    source = formation.getSource(slot[0], slot[1])
+                    sprite = GImage(x=x, y=y, width=w, height=h, source=source)
+                aliens[slot] = sprite
+            self._aliens = aliens
+            self._group.children = list(aliens.values())
+            self._count = formation.count()
+
+        ox, oy = formation.getOffset()
+        if self._group.x != ox:
+            self._group.x = float(ox)
+        if self._group.y != oy:
+            self._group.y = float(oy)
+        self._group.draw(view)
+
+    def _drawModel(self, view, model, alpha):
+        """
+        Draws a single model, creating its drawable the first time it is seen.
+
+        Parameter view: the game view, used in drawing
+        Precondition: instance of GView
+
+        Parameter model: the model to draw
+        Precondition: a Ship or Alien object
+
+        Parameter alpha: how far real time is past the last update
+        Precondition: a float in 0..1
+        """
+        sprite = self._sprites.get(model)
+        if sprite is None:
+            sprite = self._makeSprite(model)
+            self._sprites[model] = sprite
+        x, y = model.getDrawPosition(alpha)
+        if sprite.x != x:
+            sprite.x = float(x)
+        if sprite.y != y:
+            sprite.y = float(y)
+        sprite.draw(view)
+
+    def _makeSprite(self, model):
+        """
+        Returns a new drawable for the given model.
+
+        Parameter model: the model to draw
+        Precondition: a Ship or Alien object
+        """
+        x = float(model.x)
+        y = float(model.y)
+        w = model.width
+        h = model.height
+        return GImage(x=x, y=y, width=w, height=h, source=model.getSource())
+
+    def _makeBolt(self, x, y):
+        """
+        Returns a new bolt drawable at the given position.
+
+        Parameter x: the horizontal coordinate of the center
+        Precondition: a float
+
+        Parameter y: the vertical coordinate of the center
+        Precondition: a float
+        """
+        return GRectangle(x=x, y=y, width=BOLT_WIDTH, height=BOLT_HEIGHT,
+                          fillcolor='black', linewidth=1, linecolor='blue')
+
+
+class BunkerImage(GRectangle):
+    """
+    A class drawing a bunker from a texture of its bitmask.
+
+    The texture has one texel per cell, and is stretched over the bunker with nearest
+    filtering, so the cells stay sharp.  It starts empty; blit copies a rectangle of
+    cells to it.
+
+    INSTANCE ATTRIBUTES:
+        _texture: the texture of the bunker [Texture of size (cols,rows)]
+    """
+
+    # INITIALIZER
+    def __init__(self, rows, cols, **keywords):
+        """
+        Creates a bunker drawable with an empty texture.
+
+        This class supports the same keywords as GRectangle.
+
+        Parameter rows: the number of rows of cells in the bunker
+        Precondition: an int > 0
+
+        Parameter cols: the number of columns of cells in the bunker
+        Precondition: an int > 0
+        """
+        self._defined = False
+        self._texture = Texture.create(size=(cols, rows), colorfmt='rgba')
+        self._texture.mag_filter = 'nearest'
+        self._texture.min_filter = 'nearest'
+        GRectangle.__init__(self, **keywords)
+        self._defined = True
+
+    # DRAWING METHODS
+    def blit(self, mask, cells):
+        """
+        Copies a rectangle of cells of the bitmask to the texture.
+
+        Only that part of the texture is uploaded.  Row 0 of the mask and of the
+        texture are both at the bottom, so the rows copy across as they are.
+
+        Parameter mask: the bitmask of the bunker
+        Precondition: a bool array of shape (rows,cols), row 0 at the bottom
+
+        Parameter cells: the rectangle to copy
+        Precondition: a tuple (row0, row1, col0, col1) of the rows row0 <= row < row1
+        and the columns col0 <= col < col1, not empty
+        """
+        row0, row1, col0, col1 = cells
+        pixels = _BUNKER_COLORS[mask[row0:row1, col0:col1].view(np.uint8)]
+        self._texture.blit_buffer(pixels.tobytes(), size=(col1-col0, row1-row0),
+                                  colorfmt='rgba', bufferfmt='ubyte', pos=(col0, row0))
+
+    # HIDDEN METHODS
+    def _reset(self):
+        """
+        Resets the drawing cache.
+        """
+        GObject._reset(self)
+        x = -self.width/2.0
+        y = -self.height/2.0
+        self._cache.add(Color(1, 1, 1))
+        self._cache.add(Rectangle(pos=(x, y), size=(self.width, self.height),
+                                  texture=self._texture))
+        self._cache.add(PopMatrix())
@@ -0,0 +1,168 @@
+"""
+Rewind module for Alien Invaders
+
+This module contains the ring buffer that remembers the last few seconds of a wave, so
+that the play leading up to a lost ship can be scrubbed through afterwards.
+
+A Wave is deterministic: restored from a snapshot and given the same input and dt, it
+plays out exactly the same frames.  So a frame does not have to be stored as the aliens,
+bolts and ship it contains.  The buffer keeps a snapshot of the wave (a keyframe) every
+few frames and, for every frame, the delta that leads to the next one: its dt and the
+keys held.  That is 9 bytes per frame.  Seeking to a frame decodes the nearest keyframe
+at or before it and replays the deltas from there, which is at most one keyframe
+interval of updates.
+
+Old frames are overwritten as new ones are recorded, so memory stays bounded however
+long the session lasts.  The oldest frame that can be sought is the oldest keyframe whose
+deltas are all still kept, so between capacity-interval and capacity frames are
+available once the buffer is full.
+"""
+from consts import *
+from headless import HeadlessInput
+import numpy as np
+import collections
+
+# The keys that Wave reads, and their bits in a frame delta
+_KEYS = ('left', 'right', 'spacebar')
+
+
+class RewindBuffer(object):
+    """
+    A class remembering the most recent frames of a wave in fixed memory.
+
+    Frames are numbered from 0, the state when the buffer was cleared.  Frame f+1 is
+    the state after the update recorded as frame f.
+
+    INSTANCE ATTRIBUTES:
+        _capacity:  the number of frame deltas kept [int > 0]
+        _interval:  the largest number of frames between keyframes [int > 0]
+        _dt:        the dt of each kept frame, indexed by frame % _capacity [float array]
+        _keys:      the keys held in each kept frame, as bits [uint8 array]
+        _end:       the number of frames recorded so far [int >= 0]
+        _keyframes: the kept keyframes, oldest first [deque of (frame, bytes) pairs]
+        _force:     whether the next recorded frame must start with a keyframe [bool]
+    """
+
+    # GETTERS AND SETTERS
+    def getStart(self):
+        """
+        Returns the oldest frame that can still be sought, or None if there is none.
+        """
+        if not self._keyframes:
+            return None
+        return self._keyframes[0][0]
+
+    def getEnd(self):
+        """
+        Returns the attribute _end, the newest frame that can be sought.
+        """
+        return self._end
+
+    def getInterval(self):
+        """
+        Returns the attribute _interval.
+        """
+        return self._interval
+
+    # INITIALIZER
+    def __init__(self, capacity, interval):
+        """
+        Creates an empty buffer.
+
+        Parameter capacity: the number of frames to keep
+        Precondition: an int > 0
+
+        Parameter interval: the largest number of frames between keyframes
+        Precondition: an int with 0 < interval <= capacity
+        """
+        self._capacity = capacity
+        self._interval = interval
+        self._dt = np.zeros(capacity)
+        self._keys = np.zeros(capacity, dtype=np.uint8)
+        self._keyframes = collections.deque()
+        self.clear()
+
+    # BUFFER METHODS
+    def clear(self):
+        """
+        Forgets every frame, so that the next recorded frame is frame 0.
+        """
+        self._end = 0
+        self._keyframes.clear()
+        self._force = True
+
+    def mark(self):
+        """
+        Makes the next recorded frame start with a keyframe.
+
+        Call this after the wave was changed outside of Wave.update (for example by
+        Wave.setShip), since replaying the deltas would not repeat that change.
+        """
+        self._force = True
+
+    def record(self, wave, dt, input):
+        """
+        Records the update that is about to be made to the wave.
+
+        Call this right before wave.update(dt, input).  A keyframe of the wave is
+        taken first if one is due.
+
+        Parameter wave: the wave about to be updated
+        Precondition: a Wave object
+
+        Parameter dt: the time in seconds of the update
+        Precondition: a number > 0
+
+        Parameter input: the input of the update
+        Precondition: an object with an is_key_down method, like GInput
+        """
+        frame = self._end
+        if self._force or frame - self._keyframes[-1][0] >= self._interval:
+            self._keyframes.append((frame, wave.snapshot()))
+            self._force = False
+
+        bits = 0
+        for i in range(len(_KEYS)):
+            if input.is_key_down(_KEYS[i]):
+                bits |= 1 << i
+        self._dt[frame % self._capacity] = dt
+        self._keys[frame % self._capacity] = bits
+        self._end = frame+1
+
+        # Drop the keyframes whose first deltas were overwritten.  There is always
+        # a keyframe at most _interval frames old, so one is always left.
+        oldest = self._end - self._capacity
+        while self._keyframes[0][0] < oldest:
+            self._keyframes.popleft()
+
+    def seek(self, wave, frame, current=None):
+        """
+        Puts the wave in the state of the given frame.
+
+        The nearest keyframe at or before frame is restored, and the recorded
+        deltas are replayed up to frame.  If the wave is already at a frame
+        between that keyframe and frame, it is simply played forward instead.
+
+        Parameter wave: the wave to put in the recorded state
+        Precondition: a Wave with the same formation size and mode as the recorded one
+
+        Parameter frame: the frame to seek
+        Precondition: an int with getStart() <= frame <= getEnd()
+
+        Parameter current: the frame the wave is at now
+        Precondition: an int, or None if the wave is not at a recorded frame
+        """
+        assert self._keyframes and self.getStart() <= frame <= self._end
+        i = len(self._keyframes)-1
+        while self._keyframes[i][0] > frame:
+            i -= 1
+        start, data = self._keyframes[i]
+        if current == None or not (start <= current <= frame):
+            wave.restore(data)
+            current = start
+
+        input = HeadlessInput()
+        for f in range(current, frame):
+            bits = int(self._keys[f % self._capacity])
+            input.setKeys([_KEYS[k] for k in range(len(_KEYS)) if bits & (1 << k)])
+            wave.update(float(self._dt[f % self._capacity]), input)
@@ -0,0 +1,183 @@
+"""
+System scheduler module for Alien Invaders
+
+This module contains the scheduler that runs the systems of a wave.  A system is a
+function of (dt, input) that does one job, like moving the ship or firing the alien
+shots that are due.  Each system is registered with a rate that says when it runs:
+
+    RATE_TICK:   on every update
+    RATE_STEP:   only on updates in which the aliens took a step
+    RATE_DEMAND: only when something asked for it with request
+
+Most of a wave only changes when the formation moves, so the work that depends only on
+the formation (firing, the invasion check) is skipped on the many updates in between.
+Systems run in the order they were registered, which is the order the old update method
+called them in, so a scheduled wave plays exactly like one that called every system.
+
+A profiler can be attached to see what ran.  After every update it is given the name
+and running time of each system that ran, in order.  Without one, nothing is timed.
+
+This is independent of game2d, like the models.
+"""
+import time
+
+# The rates a system can run at
+RATE_TICK = 0
+RATE_STEP = 1
+RATE_DEMAND = 2
+
+
+class SystemScheduler(object):
+    """
+    A class running registered systems at their own rates.
+
+    An alien step is signalled by the system that takes it, with stepped.  Only the
+    systems after it in the order see the step, and the signal is forgotten at the end
+    of the update.  A request lasts until the system runs, so a system requested after
+    its turn runs on the next update.
+
+    INSTANCE ATTRIBUTES:
+        _systems:  the systems in running order [list of (name, function, rate)]
+        _ticks:    the RATE_TICK systems, with their place in _systems
+                   [list of (int, function)]
+        _stepped:  whether the aliens took a step in the current update [bool]
+        _requests: the names of the systems asked to run [set of str]
+        _profiler: the function given what ran after each update [function, or None]
+    """
+
+    # GETTERS AND SETTERS
+    def getNames(self):
+        """
+        Returns the names of the systems, in running order.
+        """
+        return [name for (name, system, rate) in self._systems]
+
+    def setProfiler(self, profiler):
+        """
+        Sets the function called after every update with what ran.
+
+        It is called as profiler(records), where records is a list of (name, seconds)
+        pairs: each system that ran, in order, and how long it took.
+
+        Parameter profiler: the function to call
+        Precondition: a function of one list, or None to stop profiling
+        """
+        self._profiler = profiler
+
+    # INITIALIZER
+    def __init__(self):
+        """
+        Creates a scheduler with no systems.
+        """
+        self._systems = []
+        self._ticks = []
+        self._stepped = False
+        self._requests = set()
+        self._profiler = None
+
+    # SCHEDULER METHODS
+    def addSystem(self, name, system, rate):
+        """
+        Registers a system, to run after those registered before it.
+
+        Parameter name: the name of the system, used in requests and by profilers
+        Precondition: a str that no other system of this scheduler has
+
+        Parameter system: the function doing the work of the system
+        Precondition: a function of (dt, input)
+
+        Parameter rate: when the system runs
+        Precondition: one of RATE_TICK, RATE_STEP or RATE_DEMAND
+        """
+        assert name not in self.getNames(), repr(name)
+        if rate == RATE_TICK:
+            self._ticks.append((len(self._systems), system))
+        self._systems.append((name, system, rate))
+
+    def stepped(self):
+        """
+        Signals that the aliens took a step in this update.
+        """
+        self._stepped = True
+
+    def request(self, name):
+        """
+        Asks for the system to run at its next turn, whatever its rate.
+
+        Parameter name: the system to run
+        Precondition: the name of a registered system
+        """
+        self._requests.add(name)
+
+    def run(self, dt, input):
+        """
+        Runs one update: every system whose rate or request says it is due.
+
+        Parameter dt: The time in seconds since last update
+        Precondition: dt is a number (int or float)
+
+        Parameter input: user input used to control the ship
+        Precondition: an object with an is_key_down method, like GInput
+        """
+        if self._profiler != None:
+            self._runProfiled(dt, input)
+            return
+        requests = self._requests
+        if not requests:
+            # Until a step or a request comes up, only RATE_TICK systems are due
+            for (place, system) in self._ticks:
+                system(dt, input)
+                if self._stepped or requests:
+                    self._runFrom(place+1, dt, input)
+                    return
+            return
+        self._runFrom(0, dt, input)
+
+    def _runFrom(self, start, dt, input):
+        """
+        Runs the rest of an update, from the system at the given place on.
+
+        Parameter start: the place in _systems to start at
+        Precondition: an int >= 0
+
+        Parameter dt: The time in seconds since last update
+        Precondition: dt is a number (int or float)
+
+        Parameter input: user input used to control the ship
+        Precondition: an object with an is_key_down method, like GInput
+        """
+        requests = self._requests
+        systems = self._systems
+        for place in range(start, len(systems)):
+            name, system, rate = systems[place]
+            if rate == RATE_TICK or (rate == RATE_STEP and self._stepped):
+                system(dt, input)
+            elif requests and name in requests:
+                system(dt, input)
+            else:
+                continue
+            if requests:
+                requests.discard(name)
+        self._stepped = False
+
+    def _runProfiled(self, dt, input):
+        """
+        Runs one update like run, timing every system, and hands the times to the
+        profiler.
+
+        Parameter dt: The time in seconds since last update
+        Precondition: dt is a number (int or float)
+
+        Parameter input: user input used to control the ship
+        Precondition: an object with an is_key_down method, like GInput
+        """
+        records = []
+        for (name, system, rate) in self._systems:
+            if (rate == RATE_TICK or (rate == RATE_STEP and self._stepped) or
+                    name in self._requests):
+                start = time.perf_counter()
+                system(dt, input)
+                records.append((name, time.perf_counter() - start))
+                self._requests.discard(name)
+        self._stepped = False
+        self._profiler(records)
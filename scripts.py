@@ -0,0 +1,405 @@
+"""
+Scripted behaviour module for Alien Invaders
+
+This module contains the cooperative scheduler for scripted aliens.  A script is a
+Python generator: it does a little work, then yields how long to sleep, either a
+number of alien steps or a number of seconds.
+
+    def blinker(wave, slot):
+        while wave.isAlienAlive(slot):
+            wave.setShield(slot, True)
+            yield WaitSeconds(0.5)
+            wave.setShield(slot, False)
+            yield WaitSteps(4)
+
+Yielding None sleeps until the next alien step.  A script ends when its generator
+returns.  Each running script is an entity, with a handle from the Entities registry
+of its wave.
+
+A running generator cannot be copied, so a script that is to survive a snapshot is
+spawned with a spec: whatever its owner needs to start the same script again.  Each
+wait it yields also names the phase it resumes at, a number the script chooses.
+getState lists the spec, wait and phase of every script, and setState starts each one
+again at its phase (see behaviours.py, whose scripts are written that way).
+
+Sleeping scripts are kept in two heaps, one keyed by alien step and one by time, so an
+update only looks at the scripts that wake in it.  A wave with tens of thousands of
+scripts sleeping costs nothing more per frame than one with none.  The step heap is
+driven by the alien step clock of Wave.aliensMoving; the time heap by a clock that sums
+the dt of every update.
+"""
+import heapq
+
+
+class WaitSteps(object):
+    """
+    A class a script yields to sleep for a number of alien steps.
+
+    INSTANCE ATTRIBUTES:
+        _steps: the number of alien steps to sleep [int > 0]
+        _phase: the phase the script resumes at [int >= 0]
+    """
+
+    # GETTERS AND SETTERS
+    def getSteps(self):
+        """
+        Returns the attribute _steps.
+        """
+        return self._steps
+
+    def getPhase(self):
+        """
+        Returns the attribute _phase.
+        """
+        return self._phase
+
+    # INITIALIZER
+    def __init__(self, steps=1, phase=0):
+        """
+        Creates a wait for the given number of alien steps.
+
+        Parameter steps: the number of alien steps to sleep
+        Precondition: an int > 0
+
+        Parameter phase: the phase the script resumes at, for snapshots
+        Precondition: an int >= 0
+        """
+        assert type(steps) == int and steps > 0, repr(steps)
+        assert type(phase) == int and phase >= 0, repr(phase)
+        self._steps = steps
+        self._phase = phase
+
+
+class WaitSeconds(object):
+    """
+    A class a script yields to sleep for a number of seconds.
+
+    INSTANCE ATTRIBUTES:
+        _seconds: the number of seconds to sleep [number >= 0]
+        _phase:   the phase the script resumes at [int >= 0]
+    """
+
+    # GETTERS AND SETTERS
+    def getSeconds(self):
+        """
+        Returns the attribute _seconds.
+        """
+        return self._seconds
+
+    def getPhase(self):
+        """
+        Returns the attribute _phase.
+        """
+        return self._phase
+
+    # INITIALIZER
+    def __init__(self, seconds, phase=0):
+        """
+        Creates a wait for the given number of seconds.
+
+        A wait of 0 seconds sleeps until the next update.
+
+        Parameter seconds: the number of seconds to sleep
+        Precondition: a number >= 0
+
+        Parameter phase: the phase the script resumes at, for snapshots
+        Precondition: an int >= 0
+        """
+        assert type(seconds) in (int, float) and seconds >= 0, repr(seconds)
+        assert type(phase) == int and phase >= 0, repr(phase)
+        self._seconds = seconds
+        self._phase = phase
+
+
+class ScriptScheduler(object):
+    """
+    A class resuming scripts when their wait is over.
+
+    Heap entries are never removed early.  A script that is stopped keeps its entry,
+    which is thrown away when it comes to the top of its heap.
+
+    INSTANCE ATTRIBUTES:
+        _entities:  the registry the script handles come from [Entities]
+        _scripts:   the generator of each running script [dict of int to generator]
+        _specs:     the spec of each running script [dict of int to any value, None if
+                    the script was spawned without one]
+        _waits:     the wait of each running script, as its heap entry and phase
+                    [dict of int to (bool, number, int, int): whether it waits for a
+                    step, then the step or time, order and phase]
+        _bySteps:   the scripts waiting for an alien step [heap of (step, order, handle)]
+        _bySeconds: the scripts waiting for a time [heap of (time, order, handle)]
+        _order:     the number of waits ever pushed, used to break ties [int >= 0]
+        _clock:     the seconds simulated so far [float >= 0]
+        _step:      the last alien step seen [int >= 0]
+    """
+
+    # GETTERS AND SETTERS
+    def count(self):
+        """
+        Returns the number of running scripts.
+        """
+        return len(self._scripts)
+
+    def getClock(self):
+        """
+        Returns the attribute _clock.
+        """
+        return self._clock
+
+    def setClock(self, clock):
+        """
+        Sets the attribute _clock, without waking any script.
+
+        Wave.coast uses this after checking that no script wakes in between.
+
+        Parameter clock: the seconds simulated so far
+        Precondition: a float >= _clock, below nextTime() if that is not None
+        """
+        self._clock = clock
+
+    def isRunning(self, handle):
+        """
+        Returns True if the handle is of a script that has not ended.
+
+        Parameter handle: the script to check
+        Precondition: an int handle
+        """
+        return handle in self._scripts
+
+    def nextStep(self):
+        """
+        Returns the alien step at which the next script waiting for steps wakes, or
+        None if no script waits for a step.
+        """
+        heap = self._bySteps
+        while heap and heap[0][2] not in self._scripts:
+            heapq.heappop(heap)
+        return heap[0][0] if heap else None
+
+    def nextTime(self):
+        """
+        Returns the time at which the next script waiting for seconds wakes, or None
+        if no script waits for a time.
+        """
+        heap = self._bySeconds
+        while heap and heap[0][2] not in self._scripts:
+            heapq.heappop(heap)
+        return heap[0][0] if heap else None
+
+    # INITIALIZER
+    def __init__(self, entities, step=0):
+        """
+        Creates a scheduler with no scripts.
+
+        Parameter entities: the registry to create the script handles in
+        Precondition: an Entities object
+
+        Parameter step: the current alien step
+        Precondition: an int >= 0
+        """
+        self._entities = entities
+        self._scripts = {}
+        self._specs = {}
+        self._waits = {}
+        self._bySteps = []
+        self._bySeconds = []
+        self._order = 0
+        self._clock = 0.0
+        self._step = step
+
+    # SCHEDULER METHODS
+    def spawn(self, script, spec=None):
+        """
+        Returns the handle of a new running script.
+
+        The script first runs in the next update, at phase 0.
+
+        Parameter script: the script to run
+        Precondition: a generator that yields WaitSteps, WaitSeconds or None
+
+        Parameter spec: what is needed to start the script again, for getState
+        Precondition: any value other than None, or None if the script is never
+        stored
+        """
+        handle = self._entities.create()
+        self._scripts[handle] = script
+        self._specs[handle] = spec
+        self._push(self._bySeconds, self._clock, handle, 0)
+        return handle
+
+    def stop(self, handle):
+        """
+        Ends a running script, closing its generator.
+
+        A script may stop itself; it is then dropped when it next yields.
+
+        Parameter handle: the script to stop
+        Precondition: an int handle for which isRunning is True
+        """
+        script = self._scripts.pop(handle)
+        del self._specs[handle]
+        del self._waits[handle]
+        self._entities.destroy(handle)
+        if not script.gi_running:
+            script.close()
+
+    def clear(self):
+        """
+        Ends every running script.
+        """
+        for handle in list(self._scripts):
+            self.stop(handle)
+        self._bySteps = []
+        self._bySeconds = []
+
+    def getState(self):
+        """
+        Returns the running scripts, for a snapshot.
+
+        The result is (records, order, clock): a list with a (spec, steps, when,
+        order, phase) record per script, in no particular order, then the attributes
+        _order and _clock.  steps is True if the script waits for an alien step, when
+        is the step or time it wakes at, order breaks ties between scripts waking
+        together, and phase is where the script resumes.
+
+        Precondition: every running script was spawned with a spec
+        """
+        records = []
+        for (handle, spec) in self._specs.items():
+            assert spec != None, 'a script without a spec cannot be stored'
+            steps, when, order, phase = self._waits[handle]
+            records.append((spec, steps, when, order, phase))
+        return (records, self._order, self._clock)
+
+    def setState(self, records, order, clock, step, start):
+        """
+        Replaces every running script with the scripts recorded by getState.
+
+        Each script is started again with start(spec, phase) and put back in its
+        heap with its old wake and order, so the scripts wake in the same order as
+        they would have.  They get new handles.
+
+        Parameter records: the scripts, as getState lists them
+        Precondition: a list of (spec, steps, when, order, phase) records
+
+        Parameter order: the number of waits ever pushed
+        Precondition: an int greater than the order of every record
+
+        Parameter clock: the seconds simulated so far
+        Precondition: a float >= 0
+
+        Parameter step: the current alien step
+        Precondition: an int >= 0
+
+        Parameter start: the function starting a script from its spec at a phase
+        Precondition: a function of (spec, phase) returning a generator that yields
+        WaitSteps, WaitSeconds or None
+        """
+        self.clear()
+        self._clock = clock
+        self._step = step
+        for (spec, steps, when, rank, phase) in records:
+            handle = self._entities.create()
+            self._scripts[handle] = start(spec, phase)
+            self._specs[handle] = spec
+            self._waits[handle] = (steps, when, rank, phase)
+            heap = self._bySteps if steps else self._bySeconds
+            heap.append((when, rank, handle))
+        heapq.heapify(self._bySteps)
+        heapq.heapify(self._bySeconds)
+        self._order = order
+
+    def advance(self, dt):
+        """
+        Adds dt to the clock and resumes the scripts whose time has come.
+
+        Parameter dt: The time in seconds since last update
+        Precondition: dt is a number (int or float)
+        """
+        self._clock += dt
+        heap = self._bySeconds
+        if heap and heap[0][0] <= self._clock:
+            self._wake(heap, self._clock)
+
+    def stepped(self, step):
+        """
+        Records the alien step and resumes the scripts waiting for it.
+
+        If the aliens took several steps in one update, a script waiting for any of
+        them is resumed once.
+
+        Parameter step: the alien step the wave is at
+        Precondition: an int >= the last step given
+        """
+        self._step = step
+        heap = self._bySteps
+        if heap and heap[0][0] <= step:
+            self._wake(heap, step)
+
+    def _wake(self, heap, now):
+        """
+        Resumes the scripts in a heap whose wait ends at or before now.
+
+        The due scripts are taken off the heap before any is resumed, so a script
+        that sleeps 0 seconds is not resumed twice in one update.
+
+        Parameter heap: the heap to wake scripts from
+        Precondition: _bySteps or _bySeconds
+
+        Parameter now: the alien step or time it is
+        Precondition: a number in the unit of the heap
+        """
+        due = []
+        while heap and heap[0][0] <= now:
+            due.append(heapq.heappop(heap)[2])
+        for handle in due:
+            if handle in self._scripts:
+                self._resume(handle)
+
+    def _resume(self, handle):
+        """
+        Runs a script until it yields, and schedules it to wake again.
+
+        Parameter handle: the script to run
+        Precondition: an int handle for which isRunning is True
+        """
+        try:
+            wait = next(self._scripts[handle])
+        except StopIteration:
+            if handle in self._scripts:
+                del self._scripts[handle]
+                del self._specs[handle]
+                del self._waits[handle]
+                self._entities.destroy(handle)
+            return
+        if handle not in self._scripts:
+            return    # The script stopped itself
+        if isinstance(wait, WaitSeconds):
+            self._push(self._bySeconds, self._clock + wait.getSeconds(), handle,
+                       wait.getPhase())
+        elif wait == None:
+            self._push(self._bySteps, self._step + 1, handle, 0)
+        else:
+            self._push(self._bySteps, self._step + wait.getSteps(), handle,
+                       wait.getPhase())
+
+    def _push(self, heap, when, handle, phase):
+        """
+        Puts a script in a heap, to wake at the given step or time, and records its
+        wait.
+
+        Parameter heap: the heap to put the script in
+        Precondition: _bySteps or _bySeconds
+
+        Parameter when: the alien step or time to wake at
+        Precondition: a number in the unit of the heap
+
+        Parameter handle: the script
+        Precondition: an int handle for which isRunning is True
+
+        Parameter phase: the phase the script resumes at
+        Precondition: an int >= 0
+        """
+        heapq.heappush(heap, (when, self._order, handle))
+        self._waits[handle] = (heap is self._bySteps, when, self._order, phase)
+        self._order += 1
@@ -0,0 +1,183 @@
+"""
+Formation shape module for Alien Invaders
+
+This module contains the shapes a formation can start in.  A shape is a mask: a bool
+array of shape (rows,cols) that is True where a slot starts with an alien.  The slots
+outside the shape are holes; they are never alive, so a Formation treats them exactly
+like aliens that are already dead.
+
+Shapes are named by strings, so that a Config can hold one:
+
+    'full':      every slot (the classic rectangle)
+    'diamond':   a diamond touching the middle of each side of the grid
+    'box':       a hollow box, only the outer rows and columns
+    'text:HI':   the letters after the colon, scaled to fill the grid
+"""
+import numpy as np
+
+# The names of the shapes that are not text
+SHAPE_NAMES = ('full', 'diamond', 'box')
+
+# The start of a text shape name
+TEXT_PREFIX = 'text:'
+
+# The glyphs of text shapes, 3 columns by 5 rows, X for an alien
+_FONT = {
+    'A': ('XXX', 'X.X', 'XXX', 'X.X', 'X.X'),
+    'B': ('XX.', 'X.X', 'XX.', 'X.X', 'XX.'),
+    'C': ('XXX', 'X..', 'X..', 'X..', 'XXX'),
+    'D': ('XX.', 'X.X', 'X.X', 'X.X', 'XX.'),
+    'E': ('XXX', 'X..', 'XX.', 'X..', 'XXX'),
+    'F': ('XXX', 'X..', 'XX.', 'X..', 'X..'),
+    'G': ('XXX', 'X..', 'X.X', 'X.X', 'XXX'),
+    'H': ('X.X', 'X.X', 'XXX', 'X.X', 'X.X'),
+    'I': ('XXX', '.X.', '.X.', '.X.', 'XXX'),
+    'J': ('..X', '..X', '..X', 'X.X', 'XXX'),
+    'K': ('X.X', 'X.X', 'XX.', 'X.X', 'X.X'),
+    'L': ('X..', 'X..', 'X..', 'X..', 'XXX'),
+    'M': ('X.X', 'XXX', 'XXX', 'X.X', 'X.X'),
+    'N': ('XX.', 'X.X', 'X.X', 'X.X', 'X.X'),
+    'O': ('XXX', 'X.X', 'X.X', 'X.X', 'XXX'),
+    'P': ('XXX', 'X.X', 'XXX', 'X..', 'X..'),
+    'Q': ('XXX', 'X.X', 'X.X', 'XXX', '..X'),
+    'R': ('XX.', 'X.X', 'XX.', 'X.X', 'X.X'),
+    'S': ('XXX', 'X..', 'XXX', '..X', 'XXX'),
+    'T': ('XXX', '.X.', '.X.', '.X.', '.X.'),
+    'U': ('X.X', 'X.X', 'X.X', 'X.X', 'XXX'),
+    'V': ('X.X', 'X.X', 'X.X', 'X.X', '.X.'),
+    'W': ('X.X', 'X.X', 'XXX', 'XXX', 'X.X'),
+    'X': ('X.X', 'X.X', '.X.', 'X.X', 'X.X'),
+    'Y': ('X.X', 'X.X', '.X.', '.X.', '.X.'),
+    'Z': ('XXX', '..X', '.X.', 'X..', 'XXX'),
+    ' ': ('...', '...', '...', '...', '...'),
+}
+_GLYPH_ROWS = 5
+
+
+def isShape(name):
+    """
+    Returns True if name is the name of a shape makeMask can build.
+
+    Parameter name: the name to check
+    Precondition: any value
+    """
+    if name in SHAPE_NAMES:
+        return True
+    if type(name) != str or not name.startswith(TEXT_PREFIX):
+        return False
+    text = name[len(TEXT_PREFIX):].upper()
+    return text.strip() != '' and all(c in _FONT for c in text)
+
+
+def makeMask(name, rows, cols):
+    """
+    Returns the mask of the named shape in a grid of the given size.
+
+    Every shape has at least one alien in any grid.  A text shape is scaled by the
+    largest whole factor that fits and centered; if even one cell per glyph pixel is
+    too big, the middle of the text is kept.
+
+    Parameter name: the name of the shape
+    Precondition: a str for which isShape is True
+
+    Parameter rows: the number of rows in the grid
+    Precondition: an int > 0
+
+    Parameter cols: the number of columns in the grid
+    Precondition: an int > 0
+    """
+    assert isShape(name), repr(name)
+    if name == 'full':
+        return np.ones((rows, cols), dtype=bool)
+    if name == 'diamond':
+        return _diamond(rows, cols)
+    if name == 'box':
+        return _box(rows, cols)
+    return _text(name[len(TEXT_PREFIX):].upper(), rows, cols)
+
+
+def maskFromLines(lines):
+    """
+    Returns the mask drawn by lines of text, one line per row from the top.
+
+    A '.' or a space is a hole and any other character is an alien.  Shorter lines
+    are padded with holes on the right.
+
+    Parameter lines: the rows of the shape
+    Precondition: a non-empty list of str, with at least one alien in them
+    """
+    cols = max(len(line) for line in lines)
+    mask = np.zeros((len(lines), cols), dtype=bool)
+    for row in range(len(lines)):
+        for col in range(len(lines[row])):
+            mask[row, col] = lines[row][col] not in '. '
+    assert mask.any()
+    return mask
+
+
+def _diamond(rows, cols):
+    """
+    Returns the mask of a diamond filling a grid of the given size.
+
+    Parameter rows: the number of rows in the grid
+    Precondition: an int > 0
+
+    Parameter cols: the number of columns in the grid
+    Precondition: an int > 0
+    """
+    # The center of every slot, with the grid running from -1 to 1 both ways
+    y = (2*np.arange(rows) + 1)/rows - 1
+    x = (2*np.arange(cols) + 1)/cols - 1
+    return np.abs(y).reshape(rows, 1) + np.abs(x).reshape(1, cols) <= 1
+
+
+def _box(rows, cols):
+    """
+    Returns the mask of a hollow box around a grid of the given size.
+
+    Parameter rows: the number of rows in the grid
+    Precondition: an int > 0
+
+    Parameter cols: the number of columns in the grid
+    Precondition: an int > 0
+    """
+    mask = np.zeros((rows, cols), dtype=bool)
+    mask[0, :] = mask[-1, :] = True
+    mask[:, 0] = mask[:, -1] = True
+    return mask
+
+
+def _text(text, rows, cols):
+    """
+    Returns the mask of the text, scaled and centered in a grid of the given size.
+
+    Parameter text: the letters to draw
+    Precondition: a str of keys of _FONT, not all spaces
+
+    Parameter rows: the number of rows in the grid
+    Precondition: an int > 0
+
+    Parameter cols: the number of columns in the grid
+    Precondition: an int > 0
+    """
+    # One blank column between letters
+    lines = [''] * _GLYPH_ROWS
+    for i in range(len(text)):
+        for r in range(_GLYPH_ROWS):
+            lines[r] += _FONT[text[i]][r] + ('.' if i < len(text)-1 else '')
+    image = np.array([[c == 'X' for c in line] for line in lines], dtype=bool)
+
+    factor = max(1, min(rows // image.shape[0], cols // image.shape[1]))
+    image = np.repeat(np.repeat(image, factor, axis=0), factor, axis=1)
+
+    mask = np.zeros((rows, cols), dtype=bool)
+    height = min(rows, image.shape[0])
+    width = min(cols, image.shape[1])
+    top = (image.shape[0] - height) // 2
+    left = (image.shape[1] - width) // 2
+    row = (rows - height) // 2
+    col = (cols - width) // 2
+    mask[row:row+height, col:col+width] = image[top:top+height, left:left+width]
+    if not mask.any():
+        mask[rows//2, cols//2] = True
+    return mask
@@ -0,0 +1,251 @@
+"""
+Bunker tests for Alien Invaders
+
+Bunkers keeps its bitmasks together with state derived from them: the band of heights
+a bolt can touch at each pixel column, and the rectangle of cells changed since the
+bunkers were last drawn.  These tests compare hit with a cell by cell search, strike
+with bolts hit one by one, the band with a fresh measure, and follow the changed
+rectangles the way the renderer copies them to its textures.
+"""
+from bunkers import *
+import numpy as np
+import pytest
+
+
+def _search(bunkers, x, low, high, falling):
+    """
+    Returns the cell a swept bolt meets, found by testing every solid cell.
+
+    Parameter bunkers: the bunkers to search
+    Precondition: a Bunkers object
+
+    Parameter x: the horizontal coordinate of the center of the bolt
+    Precondition: a number
+
+    Parameter low: the lowest y coordinate of the center of the bolt
+    Precondition: a number
+
+    Parameter high: the highest y coordinate of the center of the bolt
+    Precondition: a number >= low
+
+    Parameter falling: whether the bolt flies down
+    Precondition: a bool
+    """
+    rows, cols = bunkers.getSize()
+    for i in range(bunkers.getCount()):
+        left = bunkers.getBounds(i)[0]
+        touched = []
+        for row in range(rows):
+            y = BUNKER_BOTTOM + row*BUNKER_CELL
+            if not (y < high + BOLT_HEIGHT/2 and y + BUNKER_CELL > low - BOLT_HEIGHT/2):
+                continue
+            for col in range(cols):
+                cx = left + col*BUNKER_CELL
+                if (bunkers.getMask(i)[row, col] and cx < x + BOLT_WIDTH/2 and
+                        cx + BUNKER_CELL > x - BOLT_WIDTH/2):
+                    touched.append(row)
+        if touched:
+            row = max(touched) if falling else min(touched)
+            col = min(max(int((x - left) // BUNKER_CELL), 0), cols-1)
+            return (i, row, col)
+    return None
+
+
+def _bolts(rng, count):
+    """
+    Returns random swept bolts around the bunkers, as (xs, lows, highs).
+
+    Parameter rng: the random generator
+    Precondition: a numpy Generator
+
+    Parameter count: the number of bolts
+    Precondition: an int >= 0
+    """
+    xs = rng.uniform(0, GAME_WIDTH, count)
+    lows = rng.uniform(BUNKER_BOTTOM - 30, BUNKER_BOTTOM + BUNKER_HEIGHT + 20, count)
+    highs = lows + rng.uniform(0, 25, count)
+    return (xs, lows, highs)
+
+
+def _damaged(seed, hits=60):
+    """
+    Returns bunkers damaged by random bolts falling and rising.
+
+    Parameter seed: the seed of the bolts
+    Precondition: an int >= 0
+
+    Parameter hits: the number of bolts of each kind
+    Precondition: an int >= 0
+    """
+    rng = np.random.default_rng(seed)
+    bunkers = Bunkers()
+    for falling in (True, False):
+        xs, lows, highs = _bolts(rng, hits)
+        bunkers.strike(xs, lows, highs, falling)
+    return bunkers
+
+
+def _reach(bunkers):
+    """
+    Returns getReach of every pixel column, as a list.
+
+    Parameter bunkers: the bunkers to measure
+    Precondition: a Bunkers object
+    """
+    return [bunkers.getReach(x + 0.5) for x in range(GAME_WIDTH)]
+
+
+@pytest.mark.parametrize('damaged', [False, True])
+def test_hit_matches_cell_search(damaged):
+    """
+    hit returns the first solid cell a swept bolt reaches, as a search of every cell
+    does, and the bolt is within the band of heights of its pixel column.
+    """
+    rng = np.random.default_rng(1)
+    bunkers = _damaged(2) if damaged else Bunkers()
+    xs, lows, highs = _bolts(rng, 3000)
+    found = 0
+    for k in range(len(xs)):
+        for falling in (True, False):
+            impact = bunkers.hit(xs[k], lows[k], highs[k], falling)
+            assert impact == _search(bunkers, xs[k], lows[k], highs[k], falling), k
+            if impact != None:
+                found += 1
+                low, high = bunkers.getReach(xs[k])
+                assert highs[k] > low and lows[k] < high, k
+    assert found > 100
+
+
+def test_find():
+    """
+    find gives the bunker a bolt overlaps, and -1 between bunkers.
+    """
+    bunkers = Bunkers(2)
+    left, bottom, width, height = bunkers.getBounds(1)
+    assert bunkers.find(left + width/2) == 1
+    assert bunkers.find(left - BOLT_WIDTH/2 + 0.1) == 1
+    assert bunkers.find(left - BOLT_WIDTH/2) == -1
+    assert bunkers.find(left + width + BOLT_WIDTH/2) == -1
+    assert bunkers.find(0) == -1
+    assert Bunkers(0).strike(np.array([1.0]), np.array([80.0]), np.array([90.0]),
+                             True).tolist() == [False]
+
+
+def test_erode_cuts_crater_and_marks_it():
+    """
+    erode cuts the crater out around the cell, clipped to the bunker, and marks the
+    cells it changed, which takeDirty hands out once.
+    """
+    bunkers = Bunkers(3)
+    rows, cols = bunkers.getSize()
+    for i in range(3):
+        assert bunkers.takeDirty(i) == (0, rows, 0, cols)
+        assert bunkers.takeDirty(i) == None
+    before = bunkers.getMask(1).copy()
+    bunkers.erode((1, rows-1, 0))
+    after = bunkers.getMask(1)
+    assert (after <= before).all()
+    assert not after[rows-3:, 0:3].any()
+    assert (after[:rows-4] == before[:rows-4]).all()
+    assert (after[:, 4:] == before[:, 4:]).all()
+    assert bunkers.takeDirty(1) == (rows-4, rows, 0, 4)
+    assert bunkers.takeDirty(0) == None and bunkers.takeDirty(2) == None
+
+    bunkers.erode((1, 4, 10))
+    bunkers.erode((1, 5, 20))
+    assert bunkers.takeDirty(1) == (1, 9, 7, 24)
+    assert bunkers.takeDirty(1) == None
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_band_matches_fresh_measure(seed):
+    """
+    The band of heights kept up as craters are cut is the one measured afresh from
+    the damaged masks.
+    """
+    bunkers = _damaged(seed)
+    fresh = Bunkers()
+    fresh.setState(bunkers.getState())
+    assert _reach(fresh) == _reach(bunkers)
+    assert _reach(bunkers) != _reach(Bunkers())
+
+
+def test_set_state_round_trip():
+    """
+    setState restores the masks getState recorded, and marks as changed only the
+    bunkers whose mask it changes.
+    """
+    bunkers = Bunkers()
+    undamaged = bunkers.getState()
+    rows, cols = bunkers.getSize()
+    for i in range(bunkers.getCount()):
+        bunkers.takeDirty(i)
+    bunkers.erode((2, 3, 7))
+    bunkers.takeDirty(2)
+    damaged = bunkers.getState()
+    mask = bunkers.getMask(2).copy()
+    assert damaged != undamaged
+
+    bunkers.setState(damaged)
+    assert [bunkers.takeDirty(i) for i in range(4)] == [None]*4
+    bunkers.setState(undamaged)
+    assert bunkers.getState() == undamaged
+    assert [bunkers.takeDirty(i) for i in range(4)] == [None, None, (0, rows, 0, cols),
+                                                        None]
+    assert _reach(bunkers) == _reach(Bunkers())
+
+    other = Bunkers()
+    other.setState(damaged)
+    assert other.getState() == damaged
+    assert (other.getMask(2) == mask).all()
+    assert [other.takeDirty(i) for i in range(4)] == [(0, rows, 0, cols)]*4
+
+
+@pytest.mark.parametrize('damaged', [False, True])
+@pytest.mark.parametrize('falling', [True, False])
+def test_strike_matches_hit_per_bolt(damaged, falling):
+    """
+    A batch of bolts struck at once is stopped, and erodes the bunkers, exactly like
+    the same bolts hit and eroded one by one in order.
+    """
+    rng = np.random.default_rng(3)
+    for batch in range(10):
+        batched = _damaged(batch) if damaged else Bunkers()
+        single = Bunkers()
+        single.setState(batched.getState())
+        xs, lows, highs = _bolts(rng, 400)
+        stopped = batched.strike(xs, lows, highs, falling)
+        expected = np.zeros(len(xs), dtype=bool)
+        for k in range(len(xs)):
+            impact = single.hit(float(xs[k]), float(lows[k]), float(highs[k]), falling)
+            if impact != None:
+                single.erode(impact)
+                expected[k] = True
+        assert (stopped == expected).all(), batch
+        assert expected.any()
+        assert batched.getState() == single.getState(), batch
+        assert _reach(batched) == _reach(single), batch
+
+
+def test_dirty_rectangles_keep_texture_in_sync():
+    """
+    Copying only the changed rectangle of each bunker every frame, as the renderer
+    does with its textures (see render.BunkerImage.blit), keeps copies of the masks
+    equal to them.
+    """
+    rng = np.random.default_rng(4)
+    bunkers = Bunkers()
+    textures = [np.zeros(bunkers.getSize(), dtype=bool) for i in range(4)]
+    for frame in range(80):
+        if frame % 20 == 10:
+            bunkers.setState(_damaged(frame).getState())
+        xs, lows, highs = _bolts(rng, 5)
+        bunkers.strike(xs, lows, highs, frame % 2 == 0)
+        for i in range(bunkers.getCount()):
+            dirty = bunkers.takeDirty(i)
+            if dirty != None:
+                row0, row1, col0, col1 = dirty
+                assert row0 < row1 and col0 < col1
+                mask = bunkers.getMask(i)
+                textures[i][row0:row1, col0:col1] = mask[row0:row1, col0:col1]
+            assert (textures[i] == bunkers.getMask(i)).all(), (frame, i)
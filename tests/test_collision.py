@@ -0,0 +1,198 @@
+"""
+Collision tests for Alien Invaders
+
+The collision pass replaced the loops of Wave that tested every bolt against every
+alien and against the ship with the four-corner test of the models.  These tests check
+the matrix and the pass themselves, and that the contacts the pass finds are the ones
+those per-bolt tests find.
+"""
+from collision import *
+from wave import *
+from wave import _BOLT_COMPONENTS
+from config import Config
+import numpy as np
+
+
+def _corners(x, y):
+    """
+    Returns the four corners of a bolt with its center at (x,y).
+
+    Parameter x: the horizontal coordinate of the center of the bolt
+    Precondition: a number
+
+    Parameter y: the vertical coordinate of the center of the bolt
+    Precondition: a number
+    """
+    return [(x + dx*BOLT_WIDTH/2, y + dy*BOLT_HEIGHT/2)
+            for dx in (-1, 1) for dy in (-1, 1)]
+
+
+def _setUp(seed, count):
+    """
+    Returns a collision pass with the alien and ship tests of a wave, and the
+    formation, ship, player bolts and alien bolts in its layers, as a tuple.  Some
+    aliens are dead, the formation has moved, and motionless bolts are scattered over
+    the formation and the ship.
+
+    Parameter seed: the seed of the random positions
+    Precondition: an int >= 0
+
+    Parameter count: the number of bolts of each kind
+    Precondition: an int >= 0
+    """
+    rng = np.random.default_rng(seed)
+    config = Config(seed=seed)
+    wave = Wave(SHIP_LIVES, ALIEN_SPEED, 0, config)
+    formation = Formation(config)
+    for (row, col) in zip(rng.integers(0, formation.getRows(), 20).tolist(),
+                          rng.integers(0, formation.getCols(), 20).tolist()):
+        if formation.isAlive(row, col):
+            formation.kill(row, col)
+    formation.march(float(rng.uniform(-30, 30)), float(rng.uniform(-120, 0)))
+
+    ship = Ship()
+    ship.x = float(rng.uniform(SHIP_WIDTH, GAME_WIDTH - SHIP_WIDTH))
+    entities = Entities()
+    players = Archetype(entities, _BOLT_COMPONENTS)
+    falling = Archetype(entities, _BOLT_COMPONENTS)
+    top = formation.getPosition(0, 0)[1] + ALIEN_HEIGHT
+    bottom = formation.lowest() - ALIEN_HEIGHT
+    for i in range(count):
+        x = float(rng.uniform(0, GAME_WIDTH))
+        y = float(rng.uniform(bottom, top))
+        players.spawn((x, y, x, y, BOLT_SPEED))
+        x = float(rng.uniform(ship.x - SHIP_WIDTH, ship.x + SHIP_WIDTH))
+        y = float(rng.uniform(ship.y - SHIP_HEIGHT, ship.y + SHIP_HEIGHT))
+        falling.spawn((x, y, x, y, -BOLT_SPEED))
+
+    collisions = CollisionPass()
+    collisions.getMatrix().enable(LAYER_PLAYER_BOLT, LAYER_ALIEN)
+    collisions.getMatrix().enable(LAYER_ALIEN_BOLT, LAYER_SHIP)
+    collisions.addTest(LAYER_PLAYER_BOLT, LAYER_ALIEN, wave.alien_collides)
+    collisions.addTest(LAYER_ALIEN_BOLT, LAYER_SHIP, wave.ship_collides)
+    collisions.setBody(LAYER_ALIEN, formation)
+    collisions.setBody(LAYER_SHIP, ship)
+    collisions.setBody(LAYER_PLAYER_BOLT, players)
+    collisions.setBody(LAYER_ALIEN_BOLT, falling)
+    return (collisions, formation, ship, players, falling)
+
+
+def test_matrix_is_symmetric():
+    """
+    Enabling or disabling a pair of layers works both ways round.
+    """
+    matrix = CollisionMatrix()
+    assert not matrix.isEnabled(LAYER_SHIP, LAYER_ALIEN_BOLT)
+    matrix.enable(LAYER_ALIEN_BOLT, LAYER_SHIP)
+    matrix.enable(LAYER_ALIEN_BOLT, LAYER_BUNKER)
+    assert matrix.isEnabled(LAYER_SHIP, LAYER_ALIEN_BOLT)
+    assert matrix.getMask(LAYER_ALIEN_BOLT) == LAYER_SHIP | LAYER_BUNKER
+    assert matrix.getMask(LAYER_SHIP) == LAYER_ALIEN_BOLT
+    matrix.disable(LAYER_SHIP, LAYER_ALIEN_BOLT)
+    assert not matrix.isEnabled(LAYER_ALIEN_BOLT, LAYER_SHIP)
+    assert matrix.getMask(LAYER_ALIEN_BOLT) == LAYER_BUNKER
+
+
+def test_pass_runs_enabled_tests_in_order():
+    """
+    Only the tests of enabled pairs with a body in both layers run, in the order they
+    were added, and their contacts are tagged with the layers.
+    """
+    collisions = CollisionPass()
+    matrix = collisions.getMatrix()
+    collisions.addTest(LAYER_PLAYER_BOLT, LAYER_BUNKER, lambda a, b: [(a, b)])
+    collisions.addTest(LAYER_PLAYER_BOLT, LAYER_ALIEN, lambda a, b: [(a, b), (b, a)])
+    collisions.addTest(LAYER_ALIEN_BOLT, LAYER_SHIP, lambda a, b: [(a, b)])
+    collisions.setBody(LAYER_PLAYER_BOLT, 'bolts')
+    collisions.setBody(LAYER_ALIEN, 'aliens')
+    collisions.setBody(LAYER_BUNKER, 'bunkers')
+    collisions.setBody(LAYER_ALIEN_BOLT, 'falling')
+    assert collisions.run() == []
+
+    matrix.enable(LAYER_PLAYER_BOLT, LAYER_ALIEN)
+    matrix.enable(LAYER_PLAYER_BOLT, LAYER_BUNKER)
+    matrix.enable(LAYER_ALIEN_BOLT, LAYER_SHIP)
+    assert collisions.run() == [
+        (LAYER_PLAYER_BOLT, 'bolts', LAYER_BUNKER, 'bunkers'),
+        (LAYER_PLAYER_BOLT, 'bolts', LAYER_ALIEN, 'aliens'),
+        (LAYER_PLAYER_BOLT, 'aliens', LAYER_ALIEN, 'bolts'),
+    ]
+    collisions.setBody(LAYER_SHIP, 'ship')
+    collisions.setBody(LAYER_BUNKER, None)
+    assert collisions.run()[-1] == (LAYER_ALIEN_BOLT, 'falling', LAYER_SHIP, 'ship')
+    assert len(collisions.run()) == 3
+
+
+def test_contacts_match_corner_tests():
+    """
+    The pass finds a contact for a motionless bolt exactly when a corner of the bolt
+    is inside a living alien or the ship, and a player bolt hits the lowest alien it
+    touches.
+    """
+    for seed in range(5):
+        collisions, formation, ship, players, falling = _setUp(seed, 400)
+        contacts = collisions.run()
+        aliens = {}
+        rammed = set()
+        for (layer, row, target, which) in contacts:
+            if target == LAYER_ALIEN:
+                assert row not in aliens
+                aliens[row] = which
+            else:
+                rammed.add(row)
+
+        models = [((row, col), formation.getAlien(row, col))
+                  for row in range(formation.getRows())
+                  for col in range(formation.getCols()) if formation.isAlive(row, col)]
+        for row in range(len(players)):
+            x = players.column('x')[row]
+            y = players.column('y')[row]
+            touched = [(alien.y, slot) for (slot, alien) in models
+                       if any(alien.contains(corner) for corner in _corners(x, y))]
+            if not touched:
+                assert row not in aliens, (seed, row)
+            else:
+                assert aliens[row] == min(touched)[1], (seed, row)
+
+        hits = 0
+        for row in range(len(falling)):
+            x = falling.column('x')[row]
+            y = falling.column('y')[row]
+            touched = any(ship.contains(corner) for corner in _corners(x, y))
+            assert touched == (row in rammed), (seed, row)
+            hits += touched
+        assert 0 < hits < len(falling)
+        assert 0 < len(aliens) < len(players)
+
+
+def test_swept_contacts_match_box_overlap():
+    """
+    A player bolt that moved is tested over its whole path: it hits the lowest living
+    alien its swept box overlaps.
+    """
+    rng = np.random.default_rng(7)
+    for seed in range(3):
+        collisions, formation, ship, players, falling = _setUp(seed, 300)
+        ys = players.column('y')
+        pys = players.column('py')
+        for row in range(len(players)):
+            pys[row] = ys[row] - float(rng.uniform(0, 3*ALIEN_HEIGHT))
+        contacts = {row: which for (layer, row, target, which) in collisions.run()
+                    if target == LAYER_ALIEN}
+        w, h = formation.getAlienSize()
+        for row in range(len(players)):
+            x = players.column('x')[row]
+            touched = []
+            for r in range(formation.getRows()):
+                for c in range(formation.getCols()):
+                    if not formation.isAlive(r, c):
+                        continue
+                    ax, ay = formation.getPosition(r, c)
+                    if (abs(ax - x) < w/2 + BOLT_WIDTH/2 and
+                            ay - h/2 < ys[row] + BOLT_HEIGHT/2 and
+                            ay + h/2 > pys[row] - BOLT_HEIGHT/2):
+                        touched.append((ay, (r, c)))
+            if touched:
+                assert contacts[row] == min(touched)[1], (seed, row)
+            else:
+                assert row not in contacts, (seed, row)
@@ -0,0 +1,103 @@
+"""
+Configuration tests for Alien Invaders
+
+Config.fromArgs reads the settings of a session from the command line.  A positional
+argument that is missing, invalid or out of range keeps its default, and the words
+anywhere in the arguments switch on the options.  These tests check those rules.
+"""
+from config import *
+import pytest
+
+
+def test_no_arguments_give_defaults():
+    """
+    No arguments give the default settings.
+    """
+    assert Config.fromArgs([]) == Config()
+
+
+def test_positionals():
+    """
+    The positional arguments set rows, aliens per row, speed and seed in order.
+    """
+    config = Config.fromArgs(['3', '4', '0.5', '17'])
+    assert (config.getRows(), config.getCols()) == (3, 4)
+    assert config.getSpeed() == 0.5
+    assert config.getSeed() == 17
+    assert Config.fromArgs(['10', '15', '3']) == Config(10, 15, 3.0)
+    assert Config.fromArgs(['1', '1', '0.01', '0']) == Config(1, 1, 0.01, 0)
+
+
+@pytest.mark.parametrize('args', [
+    ['0', '0', '0', '-1'],
+    ['11', '16', '3.5', '-7'],
+    ['x', '4.5', 'fast', '1.5'],
+    ['', '', 'nan', ''],
+    ['-3', '1e3', 'inf', 'seed'],
+    ['2.0', '3.0', '-0.5', '0x10'],
+])
+def test_invalid_positionals_keep_defaults(args):
+    """
+    A positional argument that is not a number or is out of range keeps its default,
+    without changing the others.
+    """
+    assert Config.fromArgs(args) == Config()
+    for i in range(len(args)):
+        mixed = ['5', '6', '0.25', '9']
+        mixed[i] = args[i]
+        config = Config.fromArgs(mixed)
+        expected = [5, 6, 0.25, 9]
+        expected[i] = (ALIEN_ROWS, ALIENS_IN_ROW, ALIEN_SPEED, SESSION_SEED)[i]
+        assert [config.getRows(), config.getCols(), config.getSpeed(),
+                config.getSeed()] == expected, (args, i)
+
+
+def test_mega_overrides_size():
+    """
+    The word mega anywhere gives a MEGA_ROWS by MEGA_COLS formation, and leaves the
+    speed and seed to the positionals.
+    """
+    config = Config.fromArgs(['3', '4', '0.5', '2', 'mega'])
+    assert (config.getRows(), config.getCols()) == (MEGA_ROWS, MEGA_COLS)
+    assert config.getSpeed() == 0.5 and config.getSeed() == 2
+    config = Config.fromArgs(['mega'])
+    assert (config.getRows(), config.getCols()) == (MEGA_ROWS, MEGA_COLS)
+    assert config.getSpeed() == ALIEN_SPEED
+
+
+def test_words_mix_with_positionals():
+    """
+    The words may come in any order, before or after the positionals, and a word in
+    the place of a positional keeps its default.
+    """
+    config = Config.fromArgs(['4', 'dives', '0.5', 'nobunkers', 'barrage', 'diamond',
+                              'specials'])
+    assert config == Config(4, ALIENS_IN_ROW, 0.5, SESSION_SEED, 'diamond', 0, True,
+                            SPECIAL_ALIENS, DIVE_STEPS)
+    config = Config.fromArgs(['specials', '5', '6'])
+    assert (config.getRows(), config.getCols()) == (ALIEN_ROWS, 5)
+    assert config.getSpecials() == SPECIAL_ALIENS
+    assert config.getDives() == 0 and config.getBunkers() == BUNKER_COUNT
+    assert not config.getBarrage()
+
+
+def test_shapes():
+    """
+    The name of a shape anywhere sets the shape, the last one winning, and a word that
+    is not a shape is ignored.
+    """
+    assert Config.fromArgs(['box']).getShape() == 'box'
+    assert Config.fromArgs(['text:HI', '3', 'box']).getShape() == 'box'
+    assert Config.fromArgs(['2', '3', '1', '4', 'text:HI']).getShape() == 'text:HI'
+    assert Config.fromArgs(['text:#', 'circle', 'MEGA']) == Config()
+
+
+def test_with_seed():
+    """
+    withSeed changes only the seed, and accepts the tuple seed of one wave.
+    """
+    config = Config.fromArgs(['3', '4', '0.5', '8', 'dives', 'box'])
+    wave = config.withSeed((8, 2))
+    assert wave.getSeed() == (8, 2)
+    assert wave.withSeed(8) == config
+    assert wave != config
@@ -0,0 +1,160 @@
+"""
+Entity tests for Alien Invaders
+
+Entities hands out handles that carry the generation of their slot, so a handle is dead
+for good once its entity is destroyed, even after the slot is reused.  An Archetype keeps
+its rows in spawn order through every kind of removal, and reuses its storage.  These
+tests check both.
+"""
+from entities import *
+from entities import _CAPACITY
+import math
+
+
+def test_handles_are_reused_with_new_generations():
+    """
+    A destroyed slot is reused by the next entity, and the old handle stays dead.
+    """
+    entities = Entities()
+    first = entities.create()
+    second = entities.create()
+    assert first != second
+    assert entities.count() == 2
+
+    entities.destroy(first)
+    assert not entities.isAlive(first)
+    assert entities.isAlive(second)
+    assert entities.count() == 1
+
+    third = entities.create()
+    assert third != first
+    assert entities.isAlive(third)
+    assert not entities.isAlive(first)
+
+    entities.destroy(third)
+    fourth = entities.create()
+    assert not entities.isAlive(third) and not entities.isAlive(first)
+    assert entities.isAlive(fourth)
+    assert len({first, third, fourth}) == 3
+
+
+def test_unknown_handle_is_not_alive():
+    """
+    A handle for a slot that was never created is not alive.
+    """
+    entities = Entities()
+    entities.create()
+    assert not entities.isAlive(5)
+
+
+def _archetype(values):
+    """
+    Returns an archetype with an x, y and int kind component, and an entity spawned
+    for each value, with x the value, y ten times it and kind its position.
+
+    Parameter values: the x of each entity
+    Precondition: a list of numbers
+    """
+    archetype = Archetype(Entities(), ('x', 'y', 'kind'), ('kind',))
+    for i in range(len(values)):
+        archetype.spawn((values[i], 10*values[i], i))
+    return archetype
+
+
+def _live(archetype, name):
+    """
+    Returns the live values of a component as a list.
+
+    Parameter archetype: the archetype to read
+    Precondition: an Archetype object
+
+    Parameter name: the component
+    Precondition: one of the names of archetype
+    """
+    return archetype.column(name)[:len(archetype)].tolist()
+
+
+def test_removal_keeps_row_order():
+    """
+    Removing rows by value, by row set or one at a time keeps the other rows in
+    spawn order, with their handles, and destroys the removed entities.
+    """
+    archetype = _archetype([1, 5, 2, 8, 3, 9, 4])
+    handles = archetype.getHandles()
+
+    archetype.keepBetween('x', 1.5, 8.5)
+    assert _live(archetype, 'x') == [5, 2, 8, 3, 4]
+    assert _live(archetype, 'y') == [50, 20, 80, 30, 40]
+    assert _live(archetype, 'kind') == [1, 2, 3, 4, 6]
+    assert archetype.getHandles() == [handles[i] for i in (1, 2, 3, 4, 6)]
+    assert archetype.find(handles[0]) == None and archetype.find(handles[5]) == None
+    assert archetype.find(handles[3]) == 2
+
+    archetype.removeRows({0, 3})
+    assert _live(archetype, 'x') == [2, 8, 4]
+    archetype.removeRow(1)
+    assert _live(archetype, 'x') == [2, 4]
+    assert archetype.getHandles() == [handles[2], handles[6]]
+    assert archetype.find(handles[6]) == 1
+
+    archetype.clear()
+    assert len(archetype) == 0
+    assert archetype.getHandles() == []
+
+
+def test_batch_and_single_removal_agree():
+    """
+    Removing rows in one batch leaves the same rows as removing them one at a time.
+    """
+    batch = _archetype([3, 1, 4, 1, 5, 9, 2, 6])
+    single = _archetype([3, 1, 4, 1, 5, 9, 2, 6])
+    batch.removeRows({1, 4, 7})
+    for row in (7, 4, 1):
+        single.removeRow(row)
+    assert _live(batch, 'x') == _live(single, 'x')
+    assert _live(batch, 'kind') == _live(single, 'kind')
+
+
+def test_bounds_may_be_infinite():
+    """
+    keepBetween keeps every value below an infinite bound.
+    """
+    archetype = _archetype([-1e300, 0, 1e300])
+    archetype.keepBetween('x', -math.inf, 1)
+    assert _live(archetype, 'x') == [-1e300, 0]
+
+
+def test_storage_grows_and_is_reused():
+    """
+    The columns grow to hold more than _CAPACITY entities, and spawning after a
+    removal reuses the storage and the handle slots.
+    """
+    entities = Entities()
+    archetype = Archetype(entities, ('x', 'y'))
+    for i in range(3*_CAPACITY):
+        archetype.spawn((i, -i))
+    assert len(archetype) == 3*_CAPACITY
+    assert _live(archetype, 'x') == list(range(3*_CAPACITY))
+    assert _live(archetype, 'y') == [-i for i in range(3*_CAPACITY)]
+
+    column = archetype.column('x')
+    room = len(column)
+    old = archetype.getHandles()
+    archetype.clear()
+    assert entities.count() == 0
+    for i in range(3*_CAPACITY):
+        handle = archetype.spawn((i, i))
+        assert handle not in old
+        assert not entities.isAlive(old[i])
+    assert archetype.column('x') is column
+    assert len(column) == room
+    assert entities.count() == 3*_CAPACITY
+
+
+def test_copy_copies_live_rows():
+    """
+    copy copies a component into another for every live row.
+    """
+    archetype = _archetype([1, 2, 3])
+    archetype.copy('x', 'y')
+    assert _live(archetype, 'y') == [1, 2, 3]
@@ -0,0 +1,194 @@
+"""
+Equivalence tests for Alien Invaders
+
+A Wave is deterministic, and the faster ways of running one promise to change nothing
+about that: Wave.fastForward must leave the wave exactly where update would, a wave
+restored from a snapshot must play on exactly like the original, and a RewindBuffer
+must seek to exactly the recorded frame.  These tests compare the snapshots, which
+hold the whole state of a wave, byte for byte.
+"""
+from headless import *
+from headless import _sweep
+from config import Config
+from rewind import RewindBuffer
+import random
+import pytest
+
+
+def _keys(seed, mode):
+    """
+    Returns a script holding keys for runs of frames, chosen with the given seed.
+
+    Parameter seed: the seed for the runs
+    Precondition: an int
+
+    Parameter mode: 'idle' for no keys, 'sweep' for the sweeping bot, or 'random'
+    Precondition: one of the three strs
+    """
+    if mode == 'idle':
+        return None
+    if mode == 'sweep':
+        return _sweep
+    rng = random.Random(seed)
+    held = []
+    while len(held) < 6000:
+        keys = tuple(k for k in ('left', 'right', 'spacebar') if rng.random() < 0.4)
+        held.extend([keys] * rng.randint(1, 300))
+    return lambda frame: held[frame % len(held)]
+
+
+def _shifted(script, start):
+    """
+    Returns script started at the given frame, or None if script is None.
+
+    Parameter script: function from frame number to the keys held that frame
+    Precondition: a function returning an iterable of strings, or None
+
+    Parameter start: the frame to start at
+    Precondition: an int >= 0
+    """
+    if script is None:
+        return None
+    return lambda frame: script(frame+start)
+
+
+def _playBoth(slow, fast, script, dt, chunks=8, frames=500):
+    """
+    Plays two equal waves in chunks, one with update and one with fastForward, and
+    checks they are equal after each chunk.
+
+    A destroyed ship is replaced in both, so a chunk can start after a lost ship.
+
+    Parameter slow: the wave to update frame by frame
+    Precondition: a Wave object
+
+    Parameter fast: the wave to fast-forward
+    Precondition: a Wave object with the same snapshot as slow
+
+    Parameter script: function from frame number to the keys held that frame
+    Precondition: a function returning an iterable of strings, or None
+
+    Parameter dt: the time in seconds per frame
+    Precondition: a number > 0
+    """
+    start = 0
+    for chunk in range(chunks):
+        ran = simulate(slow, frames, dt, _shifted(script, start))
+        assert simulate(fast, frames, dt, _shifted(script, start), True) == ran
+        assert fast.snapshot() == slow.snapshot(), (chunk, start)
+        start += ran
+        if slow.gameOver():
+            return
+        if slow.getShip() == None:
+            slow.setShip()
+            fast.setShip()
+
+
+def test_trace_is_deterministic():
+    """
+    Two waves with the same seed and input play the same game, and seed 0 plays the
+    known one.
+    """
+    first = Wave(SHIP_LIVES, ALIEN_SPEED, 0, Config(seed=0))
+    second = Wave(SHIP_LIVES, ALIEN_SPEED, 0, Config(seed=0))
+    input = HeadlessInput()
+    for frame in range(1071):
+        input.setKeys(_sweep(frame))
+        first.update(1/60, input)
+        second.update(1/60, input)
+        assert first.snapshot() == second.snapshot(), frame
+    assert first.getShip() == None
+    assert first.getScore() == 320
+
+
+@pytest.mark.parametrize('mode', ['idle', 'sweep', 'random'])
+@pytest.mark.parametrize('dt', [1/60, 1/15, 0.013])
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_fast_forward_matches_update(mode, dt, seed):
+    """
+    Fast-forwarding a wave leaves it exactly where updating it frame by frame does.
+    """
+    slow = Wave(SHIP_LIVES, ALIEN_SPEED, 0, Config(seed=seed))
+    fast = Wave(SHIP_LIVES, ALIEN_SPEED, 0, Config(seed=seed))
+    _playBoth(slow, fast, _keys(seed, mode), dt)
+
+
+@pytest.mark.parametrize('options', [
+    {'specials': 5},
+    {'dives': 6},
+    {'specials': 5, 'dives': 6},
+    {'bunkers': 0},
+    {'bunkers': 7, 'rows': 3, 'cols': 8},
+])
+@pytest.mark.parametrize('mode', ['sweep', 'random'])
+def test_fast_forward_matches_update_with_options(options, mode):
+    """
+    Fast-forwarding matches updating with special aliens, dives, and other bunkers
+    and formation sizes, at slow and fast alien speeds.
+    """
+    for speed in (1.0, 0.12):
+        slow = Wave(SHIP_LIVES, speed, 0, Config(seed=3, **options))
+        fast = Wave(SHIP_LIVES, speed, 0, Config(seed=3, **options))
+        _playBoth(slow, fast, _keys(3, mode), 1/60, chunks=4)
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_snapshot_fork_plays_on_alike(seed):
+    """
+    A wave restored from a snapshot, special aliens and all, plays on exactly like
+    the wave the snapshot was taken of.
+    """
+    wave = Wave(SHIP_LIVES, 0.3, 0, Config(seed=seed, specials=5, dives=6))
+    input = HeadlessInput()
+    for frame in range(200):
+        input.setKeys(_sweep(frame))
+        wave.update(1/60, input)
+    data = wave.snapshot()
+    fork = Wave(SHIP_LIVES, 0.3, 0, Config(seed=99))
+    fork.restore(data)
+    assert fork.snapshot() == data
+    assert fork.countScripts() == wave.countScripts()
+    for frame in range(200, 900):
+        input.setKeys(_sweep(frame))
+        wave.update(1/60, input)
+        fork.update(1/60, input)
+        assert fork.snapshot() == wave.snapshot(), frame
+        assert fork.countScripts() == wave.countScripts(), frame
+        assert fork.getScore() == wave.getScore(), frame
+
+
+def test_rewind_seek_matches_recording():
+    """
+    Seeking a RewindBuffer puts a wave in exactly the recorded state, whether it is
+    restored from a keyframe or played forward from a nearby frame.
+    """
+    wave = Wave(SHIP_LIVES, ALIEN_SPEED, 0, Config(seed=4, specials=3))
+    buffer = RewindBuffer(300, 60)
+    script = _keys(4, 'random')
+    input = HeadlessInput()
+    frames = []
+    for frame in range(700):
+        frames.append(wave.snapshot())
+        input.setKeys(script(frame))
+        dt = 1/60 if frame % 7 else 1/30
+        buffer.record(wave, dt, input)
+        wave.update(dt, input)
+        if wave.gameOver():
+            break
+        if wave.getShip() == None:
+            wave.setShip()
+            buffer.mark()
+    frames.append(wave.snapshot())
+    assert buffer.getEnd() == len(frames)-1
+
+    seeker = Wave(SHIP_LIVES, ALIEN_SPEED, 0, Config(seed=4, specials=3))
+    start = buffer.getStart()
+    for frame in (start, start+1, start+59, start+60, start+61, buffer.getEnd()-1):
+        buffer.seek(seeker, frame)
+        assert seeker.snapshot() == frames[frame], frame
+    current = start+10
+    buffer.seek(seeker, current)
+    for frame in range(current+1, buffer.getEnd()+1, 13):
+        buffer.seek(seeker, frame, current)
+        assert seeker.snapshot() == frames[frame], frame
+        current = frame
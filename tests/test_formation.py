@@ -0,0 +1,160 @@
+"""
+Formation tests for Alien Invaders
+
+A Formation keeps counters, extents and a sparse index of its living aliens up to date
+as aliens die, dive away, come back and are revived, instead of scanning its grid.
+These tests play random sequences of those changes and compare every query with the
+answer a scan of the slots gives, and check that copies and restored states agree.
+"""
+from formation import *
+from config import Config
+import numpy as np
+import random
+import pytest
+
+
+def _check(formation, live, away, deaths):
+    """
+    Checks every query of the formation against the slots it should hold.
+
+    Parameter formation: the formation to check
+    Precondition: a Formation object
+
+    Parameter live: the slots of the living aliens in the grid
+    Precondition: a set of (row,col) pairs
+
+    Parameter away: the slots of the aliens away from the formation
+    Precondition: a set of (row,col) pairs
+
+    Parameter deaths: the world position each dead alien died at
+    Precondition: a dict of (row,col) to (x,y)
+    """
+    rows = formation.getRows()
+    cols = formation.getCols()
+    mask = np.zeros((rows, cols), dtype=bool)
+    for (row, col) in live:
+        mask[row, col] = True
+    assert (formation.getAliveMask() == mask).all()
+    assert set(formation.living()) == live and len(formation.living()) == len(live)
+    assert formation.count() == len(live)
+    assert formation.countAway() == len(away)
+    for (row, col) in away:
+        assert formation.isAway(row, col) and not formation.isAlive(row, col)
+
+    columns = sorted(set(col for (row, col) in live))
+    assert sorted(formation.getLivingColumns()) == columns
+    assert formation.countColumns() == len(columns)
+    order = [formation.getLivingColumn(i) for i in range(len(columns))]
+    assert order == formation.getLivingColumns()
+    for col in range(cols):
+        assert formation.columnAlive(col) == (col in columns)
+        if col in columns:
+            assert formation.bottomRow(col) == max(r for (r, c) in live if c == col)
+
+    if live:
+        xs = [formation.getPosition(row, col)[0] for (row, col) in live]
+        ys = [formation.getPosition(row, col)[1] for (row, col) in live]
+        assert formation.rightmost() == max(xs)
+        assert formation.leftmost() == min(xs)
+        assert formation.lowest() == min(ys)
+        xs, ys = formation.bottomPositions()
+        assert xs.tolist() == sorted(xs.tolist())
+        assert len(xs) == len(columns)
+    for slot in deaths:
+        assert formation.getPosition(slot[0], slot[1]) == deaths[slot]
+
+
+@pytest.mark.parametrize('shape', ['full', 'diamond', 'text:HI'])
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_random_changes_keep_queries_exact(shape, seed):
+    """
+    After every kill, detach, attach, revive and release in a random sequence, the
+    queries of the formation match a scan of its slots.
+    """
+    rng = random.Random(seed)
+    formation = Formation(Config(6, 9, shape=shape))
+    mask = makeMask(shape, 6, 9)
+    live = set((int(r), int(c)) for (r, c) in zip(*np.nonzero(mask)))
+    away = set()
+    deaths = {}
+    _check(formation, live, away, deaths)
+    for step in range(300):
+        action = rng.choice(['kill', 'kill', 'detach', 'attach', 'revive', 'release',
+                             'march'])
+        if action == 'march':
+            formation.march(rng.choice([-6, 6, 0]), rng.choice([0, -18.5]))
+        elif action in ('kill', 'detach') and live:
+            slot = rng.choice(sorted(live))
+            live.remove(slot)
+            if action == 'kill':
+                deaths[slot] = formation.getPosition(slot[0], slot[1])
+                formation.kill(slot[0], slot[1])
+            else:
+                away.add(slot)
+                formation.detach(slot[0], slot[1])
+        elif action in ('attach', 'release') and away:
+            slot = rng.choice(sorted(away))
+            away.remove(slot)
+            if action == 'attach':
+                live.add(slot)
+                formation.attach(slot[0], slot[1])
+            else:
+                deaths[slot] = (rng.random(), rng.random())
+                formation.release(slot[0], slot[1], deaths[slot])
+        elif action == 'revive':
+            empty = [(r, c) for r in range(6) for c in range(9)
+                     if (r, c) not in live and (r, c) not in away]
+            if empty:
+                slot = rng.choice(empty)
+                deaths.pop(slot, None)
+                live.add(slot)
+                formation.revive(slot[0], slot[1])
+                assert formation.living()[-1] == slot
+        _check(formation, live, away, deaths)
+
+
+def test_copy_is_independent():
+    """
+    A copy starts equal to the formation and changes independently of it.
+    """
+    formation = Formation(Config(4, 5))
+    formation.kill(3, 0)
+    other = formation.copy()
+    other.kill(3, 4)
+    other.detach(0, 2)
+    other.march(10, -5)
+    assert formation.isAlive(3, 4) and formation.count() == 19
+    assert formation.getOffset() == (0, 0)
+    assert formation.countAway() == 0
+    assert other.count() == 17 and other.countAway() == 1
+    assert other.getPosition(3, 0) == formation.getPosition(3, 0)
+
+
+def test_set_state_matches_changes():
+    """
+    A formation put in the state of another by setState answers every query like it.
+    """
+    rng = random.Random(5)
+    played = Formation(Config(5, 7))
+    restored = Formation(Config(5, 7))
+    for i in range(20):
+        slots = played.living()
+        slot = slots[rng.randrange(len(slots))]
+        if i % 4 == 0:
+            played.detach(slot[0], slot[1])
+        else:
+            played.kill(slot[0], slot[1])
+        played.march(3, -2)
+    remains = {}
+    for row in range(5):
+        for col in range(7):
+            if not played.isAlive(row, col) and not played.isAway(row, col):
+                remains[(row, col)] = played.getPosition(row, col)
+    away = [(row, col) for row in range(5) for col in range(7) if played.isAway(row, col)]
+    restored.setState(played.getAliveMask(), played.getOffset(),
+                      played.getLivingColumns(), remains, away)
+    live = set(played.living())
+    _check(restored, live, set(away), remains)
+    assert restored.getLivingColumns() == played.getLivingColumns()
+    assert restored.rightmost() == played.rightmost()
+    assert restored.lowest() == played.lowest()
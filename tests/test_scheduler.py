@@ -0,0 +1,134 @@
+"""
+Scheduler tests for Alien Invaders
+
+A SystemScheduler runs only its RATE_TICK systems on the updates between alien steps,
+and wakes the other systems when a step is signalled or a system is requested.  These
+tests record which systems ran, in order, with and without a profiler attached.
+"""
+from scheduler import *
+import pytest
+
+
+def _schedule(log, actions=None):
+    """
+    Returns a scheduler of five logging systems: move (tick), march (tick), fire
+    (step), invasion (demand) and tidy (tick), in that order.
+
+    Each system appends its name to log when it runs, and then calls the action given
+    for it, if any, with the scheduler.
+
+    Parameter log: the list the names are appended to
+    Precondition: a list
+
+    Parameter actions: what each system does after it logs
+    Precondition: a dict of names to functions of a SystemScheduler, or None
+    """
+    actions = {} if actions == None else actions
+    systems = SystemScheduler()
+
+    def make(name):
+        def system(dt, input):
+            log.append(name)
+            if name in actions:
+                actions.pop(name)(systems)
+        return system
+
+    rates = [('move', RATE_TICK), ('march', RATE_TICK), ('fire', RATE_STEP),
+             ('invasion', RATE_DEMAND), ('tidy', RATE_TICK)]
+    for (name, rate) in rates:
+        systems.addSystem(name, make(name), rate)
+    return systems
+
+
+def _profile(systems, names):
+    """
+    Attaches a profiler to the scheduler that appends the names of what ran to names.
+
+    Parameter systems: the scheduler to profile
+    Precondition: a SystemScheduler object
+
+    Parameter names: the list the names are appended to
+    Precondition: a list
+    """
+    systems.setProfiler(lambda records: names.extend(name for (name, t) in records))
+
+
+@pytest.mark.parametrize('profiled', [False, True])
+def test_only_ticks_run_between_steps(profiled):
+    """
+    Without a step or a request, only the RATE_TICK systems run, in order.
+    """
+    log = []
+    systems = _schedule(log)
+    names = []
+    if profiled:
+        _profile(systems, names)
+    for i in range(3):
+        systems.run(1/60, None)
+    assert log == ['move', 'march', 'tidy']*3
+    assert names == (log if profiled else [])
+    assert systems.getNames() == ['move', 'march', 'fire', 'invasion', 'tidy']
+
+
+@pytest.mark.parametrize('profiled', [False, True])
+def test_step_wakes_later_systems(profiled):
+    """
+    A step signalled by a system runs the RATE_STEP systems after it in the same
+    update, and is forgotten by the next.
+    """
+    log = []
+    systems = _schedule(log, {'march': lambda systems: systems.stepped()})
+    if profiled:
+        _profile(systems, [])
+    systems.run(1/60, None)
+    systems.run(1/60, None)
+    assert log == ['move', 'march', 'fire', 'tidy', 'move', 'march', 'tidy']
+
+
+@pytest.mark.parametrize('profiled', [False, True])
+def test_request_wakes_demand_system(profiled):
+    """
+    A request made before the turn of a system runs it in the same update, and a
+    request made after its turn runs it in the next.  Either way it runs once.
+    """
+    log = []
+    actions = {'march': lambda systems: systems.request('invasion')}
+    systems = _schedule(log, actions)
+    if profiled:
+        _profile(systems, [])
+    systems.run(1/60, None)
+    assert log == ['move', 'march', 'invasion', 'tidy']
+
+    del log[:]
+    actions['tidy'] = lambda systems: systems.request('invasion')
+    systems.run(1/60, None)
+    systems.run(1/60, None)
+    systems.run(1/60, None)
+    assert log == ['move', 'march', 'tidy', 'move', 'march', 'invasion', 'tidy',
+                   'move', 'march', 'tidy']
+
+
+@pytest.mark.parametrize('profiled', [False, True])
+def test_request_between_updates(profiled):
+    """
+    A request made between updates runs the system at its turn in the next update,
+    and a request for a RATE_TICK system runs it only once.
+    """
+    log = []
+    systems = _schedule(log)
+    if profiled:
+        _profile(systems, [])
+    systems.request('fire')
+    systems.request('move')
+    systems.run(1/60, None)
+    systems.run(1/60, None)
+    assert log == ['move', 'march', 'fire', 'tidy', 'move', 'march', 'tidy']
+
+
+def test_duplicate_name_is_refused():
+    """
+    Two systems may not have the same name.
+    """
+    systems = _schedule([])
+    with pytest.raises(AssertionError):
+        systems.addSystem('fire', lambda dt, input: None, RATE_TICK)
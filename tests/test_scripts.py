@@ -0,0 +1,248 @@
+"""
+Script tests for Alien Invaders
+
+A ScriptScheduler resumes its scripts in the order their waits end, ties going to the
+wait pushed first, and leaves the heap entries of stopped scripts to be thrown away
+later.  A stored script is started again at its phase.  These tests run plain
+generators and the behaviours of behaviours.py against a stand-in for a wave, which
+records what the scripts do to it.
+"""
+from scripts import *
+from behaviours import *
+from entities import Entities
+
+
+class _Stage(object):
+    """
+    A stand-in for a wave, with the methods the behaviours use.
+
+    INSTANCE ATTRIBUTES:
+        alive:   the slots of the living aliens [set of (row,col)]
+        cols:    the number of columns of the formation [int > 0]
+        fired:   the slot and clock of every bolt fired, in order [list of (slot, float)]
+        shields: the slots with a shield up [set of (row,col)]
+        clock:   the function returning the current time [function]
+    """
+
+    def __init__(self, alive, cols, clock):
+        """
+        Creates a stage with the given living aliens.
+
+        Parameter alive: the slots of the living aliens
+        Precondition: an iterable of (row,col) pairs
+
+        Parameter cols: the number of columns of the formation
+        Precondition: an int > 0
+
+        Parameter clock: the function returning the current time
+        Precondition: a function of no arguments
+        """
+        self.alive = set(alive)
+        self.cols = cols
+        self.fired = []
+        self.shields = set()
+        self.clock = clock
+
+    def isAlienAlive(self, slot):
+        """
+        Returns True if the alien at the slot is alive.
+        """
+        return slot in self.alive
+
+    def isSlotEmpty(self, slot):
+        """
+        Returns True if the slot is in a one row formation and has no alien.
+        """
+        return slot[0] == 0 and 0 <= slot[1] < self.cols and slot not in self.alive
+
+    def reviveAlien(self, slot):
+        """
+        Puts an alien in the slot.
+        """
+        self.alive.add(slot)
+
+    def fireFrom(self, slot):
+        """
+        Records a bolt fired from the slot.
+        """
+        self.fired.append((slot, self.clock()))
+
+    def setShield(self, slot, up):
+        """
+        Raises or lowers the shield of the slot.
+        """
+        if up:
+            self.shields.add(slot)
+        else:
+            self.shields.discard(slot)
+
+
+def _sleeper(log, name, waits):
+    """
+    Returns a script that logs its name each time it runs, then yields the next wait.
+
+    Parameter log: the list the name is appended to
+    Precondition: a list
+
+    Parameter name: the name to log
+    Precondition: any value
+
+    Parameter waits: what to yield, in order
+    Precondition: a list of WaitSteps, WaitSeconds or None
+    """
+    for wait in waits:
+        log.append(name)
+        yield wait
+    log.append(name)
+
+
+def test_scripts_wake_in_order():
+    """
+    Scripts wake when their wait ends, in the order the waits were pushed when they
+    end together, and a script is resumed once per update.
+    """
+    log = []
+    scripts = ScriptScheduler(Entities())
+    scripts.spawn(_sleeper(log, 'a', [WaitSteps(2), None]))
+    scripts.spawn(_sleeper(log, 'b', [None, WaitSeconds(0.5)]))
+    scripts.spawn(_sleeper(log, 'c', [WaitSeconds(0), WaitSteps(1)]))
+    scripts.advance(0.1)
+    assert log == ['a', 'b', 'c']
+    assert scripts.nextStep() == 1 and scripts.nextTime() == 0.1
+    scripts.advance(0.1)
+    assert log == ['a', 'b', 'c', 'c']
+    scripts.stepped(1)
+    assert log == ['a', 'b', 'c', 'c', 'b', 'c']
+    assert scripts.count() == 2
+    scripts.stepped(3)
+    assert log[-1] == 'a'
+    scripts.advance(0.5)
+    assert log[-1] == 'b' and scripts.count() == 1
+    scripts.stepped(4)
+    assert log[-1] == 'a' and scripts.count() == 0
+    assert scripts.nextStep() == None and scripts.nextTime() == None
+
+
+def test_stopped_scripts_leave_stale_entries():
+    """
+    A stopped script never runs again, and its heap entry is skipped when it comes to
+    the top, even after a new script reuses its entity slot.
+    """
+    log = []
+    entities = Entities()
+    scripts = ScriptScheduler(entities)
+    first = scripts.spawn(_sleeper(log, 'first', [WaitSteps(1)]*5))
+    second = scripts.spawn(_sleeper(log, 'second', [WaitSteps(3)]*5))
+    scripts.advance(0)
+    assert scripts.nextStep() == 1
+
+    scripts.stop(first)
+    assert not scripts.isRunning(first) and not entities.isAlive(first)
+    assert scripts.nextStep() == 3
+    third = scripts.spawn(_sleeper(log, 'third', [WaitSteps(2)]*5))
+    assert third != first
+    scripts.advance(0)
+    scripts.stepped(1)
+    scripts.stepped(2)
+    assert log == ['first', 'second', 'third', 'third']
+    scripts.stepped(3)
+    assert log[-1] == 'second'
+
+    def quitter():
+        yield None
+        scripts.stop(handle)
+        yield None
+        log.append('quitter')
+    handle = scripts.spawn(quitter())
+    scripts.advance(0)
+    scripts.stepped(4)
+    scripts.stepped(5)
+    assert 'quitter' not in log and not scripts.isRunning(handle)
+    assert scripts.count() == 2
+
+
+def _gunners(state=None, step=0):
+    """
+    Returns a stage and a scheduler running a gunner at slot (0,1) that fires bursts
+    of 3 bolts 0.25 seconds apart every 2 steps, started fresh or from a stored state.
+
+    Parameter state: the state of a scheduler to start from, as getState returns it
+    Precondition: a tuple, or None for a fresh gunner
+
+    Parameter step: the alien step the stored state was taken at
+    Precondition: an int >= 0
+    """
+    scripts = ScriptScheduler(Entities())
+    stage = _Stage([(0, 1)], 3, scripts.getClock)
+    params = fillParams('gunner', (2, 3, 0.25))
+    if state == None:
+        script = startBehaviour(stage, 'gunner', (0, 1), params)
+        scripts.spawn(script, ('gunner', (0, 1), params))
+    else:
+        records, order, clock = state
+        start = lambda spec, phase: startBehaviour(stage, *spec, phase)
+        scripts.setState(records, order, clock, step, start)
+    return (stage, scripts)
+
+
+def _play(scripts, frames, start):
+    """
+    Runs a scheduler for some frames of 0.1 seconds, with an alien step after every
+    5 frames.
+
+    Parameter scripts: the scheduler to run
+    Precondition: a ScriptScheduler object
+
+    Parameter frames: the number of frames to run
+    Precondition: an int >= 0
+
+    Parameter start: the number of frames run before
+    Precondition: an int >= 0
+    """
+    for frame in range(start, start+frames):
+        scripts.advance(0.1)
+        if frame % 5 == 4:
+            scripts.stepped(frame // 5 + 1)
+
+
+def test_gunner_restored_mid_burst_fires_alike():
+    """
+    A gunner stored and started again in the middle of a burst fires the rest of it,
+    and every later burst, at the same times as the original.
+    """
+    restored = 0
+    for split in range(1, 80):
+        stage, scripts = _gunners()
+        _play(scripts, split, 0)
+        state = scripts.getState()
+        records, order, clock = state
+        restored += 1 < records[0][4] <= 3 and not records[0][1]
+
+        copy, copied = _gunners(state, split // 5)
+        _play(scripts, 60, split)
+        _play(copied, 60, split)
+        later = [shot for shot in stage.fired if shot[1] > clock]
+        assert copy.fired == later, split
+        assert len(later) > 0
+        assert copied.getState() == scripts.getState(), split
+    assert restored > 0
+
+
+def test_splitter_splits_when_shot():
+    """
+    A splitter puts a new alien in each empty slot next to it once it dies, and
+    then ends.
+    """
+    clock = [0.0]
+    stage = _Stage([(0, 0), (0, 2), (0, 3)], 4, lambda: clock[0])
+    scripts = ScriptScheduler(Entities())
+    params = fillParams('splitter', ())
+    scripts.spawn(startBehaviour(stage, 'splitter', (0, 2), params),
+                  ('splitter', (0, 2), params))
+    scripts.advance(0)
+    scripts.stepped(1)
+    assert stage.alive == {(0, 0), (0, 2), (0, 3)}
+    stage.alive.discard((0, 2))
+    scripts.stepped(2)
+    assert stage.alive == {(0, 0), (0, 1), (0, 3)}
+    assert scripts.count() == 0
@@ -0,0 +1,81 @@
+"""
+Shape tests for Alien Invaders
+
+A formation starts in a shape, the mask of the slots that hold an alien.  These tests
+check the masks makeMask builds: their size, that none is empty, and the slots of the
+simple shapes and of text.
+"""
+from shapes import *
+import numpy as np
+import pytest
+
+
+@pytest.mark.parametrize('name', ['full', 'diamond', 'box', 'text:HI', 'text:a b'])
+@pytest.mark.parametrize('size', [(1, 1), (1, 7), (5, 12), (6, 1), (40, 90)])
+def test_mask_fills_grid(name, size):
+    """
+    Every shape gives a bool mask of the size of the grid with at least one alien.
+    """
+    rows, cols = size
+    mask = makeMask(name, rows, cols)
+    assert mask.dtype == bool
+    assert mask.shape == (rows, cols)
+    assert mask.any()
+
+
+def test_simple_shapes():
+    """
+    The full, box and diamond shapes hold the slots they are named for.
+    """
+    assert makeMask('full', 3, 4).all()
+
+    box = makeMask('box', 4, 5)
+    assert box[0].all() and box[-1].all() and box[:, 0].all() and box[:, -1].all()
+    assert not box[1:-1, 1:-1].any()
+
+    diamond = makeMask('diamond', 5, 5)
+    assert (diamond == maskFromLines(['..X..', '.XXX.', 'XXXXX', '.XXX.', '..X..'])).all()
+    assert (diamond == diamond[::-1]).all() and (diamond == diamond[:, ::-1]).all()
+
+
+def test_text_is_scaled_and_centered():
+    """
+    Text is drawn from the font at the largest whole scale that fits, in the middle
+    of the grid, and its middle is kept if even one slot per pixel is too big.
+    """
+    glyph = maskFromLines(['XXX', '.X.', '.X.', '.X.', '.X.'])
+    assert (makeMask('text:T', 5, 3) == glyph).all()
+    assert (makeMask('text:t', 5, 3) == glyph).all()
+
+    big = makeMask('text:T', 12, 9)
+    scaled = np.repeat(np.repeat(glyph, 2, axis=0), 2, axis=1)
+    assert (big[1:11, 1:7] == scaled).all()
+    assert big.sum() == scaled.sum()
+
+    small = makeMask('text:HI', 3, 3)
+    assert small.shape == (3, 3) and small.any()
+
+
+def test_is_shape():
+    """
+    Only the simple shapes and text in the font are shapes.
+    """
+    for name in SHAPE_NAMES:
+        assert isShape(name)
+    assert isShape('text:Hello world')
+    assert not isShape('text:')
+    assert not isShape('text:   ')
+    assert not isShape('text:A1')
+    assert not isShape('circle')
+    assert not isShape(None)
+    assert not isShape(3)
+
+
+def test_mask_from_lines():
+    """
+    Lines of text give a mask with holes for '.' and spaces, padded on the right.
+    """
+    mask = maskFromLines(['X.X', 'X', ' XX'])
+    expected = np.array([[True, False, True], [True, False, False],
+                         [False, True, True]])
+    assert (mask == expected).all()
@@ -8,6 +8,9 @@ new level, you are expected to make a new instance of the class.
 The subcontroller Wave manages the ship, the aliens and any laser bolts on screen.
 These are model objects.  Their classes are defined in models.py.
 
+Wave does not import game2d.  The simulation runs without Kivy, and the drawables are
+only built (by render.py) the first time the wave is drawn to a view.
+
 Most of your work on this assignment will be in either this module or models.py.
 Whether a helper method belongs in this module or models.py is often a complicated
 issue.  If you do not know, ask on Piazza and we will answer.
@@ -15,10 +18,71 @@ issue.  If you do not know, ask on Piazza and we will answer.
 Jin Ryu jfr224
 December 4th 2018
 """
-from game2d import *
 from consts import *
 from models import *
-import random
+from formation import *
+from barrage import *
+from entities import *
+from collision import *
+from firing import *
+from scheduler import *
+from shapes import *
+from scripts import *
+from dives import *
+from bunkers import *
+from behaviours import *
+from config import *
+import numpy as np
+import struct
+import math
+
+# The layout of a snapshot (see Wave.snapshot).  All records are little-endian.
+# Header: rows, cols, flags, result, lives, score, alien step, _time, _alienSpeed,
+#         formation offset x and y, ship x and saved x, and the record counts
+_HEADER = struct.Struct('<HHBbHqq6dHHHHH')
+# Random stream: PCG64 state and increment, plus the buffered 32-bit draw
+_RANDOM = struct.Struct('<16s16sBI')
+# Dead alien a pending shot fires from: row, col, x, y
+_REMAINS = struct.Struct('<HHdd')
+# Bolt: kind, x, y, saved x, saved y
+_BOLT = struct.Struct('<B4d')
+# Scheduled shot: row and col of the shooter, alien step
+_SHOT = struct.Struct('<HHq')
+# Bullet-hell field: bolt count, scale of the last advance
+_FIELD = struct.Struct('<Id')
+# Diver: row, col, path, direction, seconds into the dive, x, y, saved x, saved y
+_DIVER = struct.Struct('<HHBb5d')
+# Scripts: shield count, script count, script clock, waits ever pushed
+_SCRIPTS = struct.Struct('<IIdq')
+# Shield: row, col of an alien with its shield up
+_SHIELD = struct.Struct('<HH')
+# Script: behaviour, row, col, phase, whether it waits for a step, wake, tie order,
+#         followed by the parameters of the behaviour
+_SCRIPT = struct.Struct('<BHHHBdq')
+# Dive trigger: alien steps between dives, alien step of the next dive
+_DIVES = struct.Struct('<Hq')
+# Bunkers: count, followed by their packed bitmasks
+_BUNKERS = struct.Struct('<H')
+
+# Flags in the header
+_HAS_SHIP = 1
+_MOVING_RIGHT = 2
+_HAS_BARRAGE = 4
+
+# Bolt kinds
+_PLAYER_BOLT = 0
+_ALIEN_BOLT = 1
+
+# The components of a bolt entity: position, position at the start of the step, velocity
+_BOLT_COMPONENTS = ('x', 'y', 'px', 'py', 'vy')
+
+# The components of a diver entity: its slot, the index of its path, the direction of the
+# path (1, or -1 when mirrored), the seconds it has flown, the formation-local position
+# of its slot, and its position now and at the start of the step
+_DIVER_COMPONENTS = ('row', 'col', 'path', 'sign', 't', 'sx', 'sy', 'x', 'y', 'px', 'py')
+
+# The components of a diver entity that hold ints
+_DIVER_INTS = ('row', 'col', 'path', 'sign')
 
 # PRIMARY RULE: Wave can only access attributes in models.py via getters/setters
 # Wave is NOT allowed to access anything in app.py (Subcontrollers are not permitted
@@ -43,9 +107,9 @@ class Wave(object):
     #UPDATE ME LATER
     INSTANCE ATTRIBUTES:
         _ship:   the player ship to control [Ship]
-        _aliens: the 2d list of aliens in the wave [rectangular 2d list of Alien or None]
-        _bolts:  the laser bolts currently on screen [list of Bolt, possibly empty]
-        _dline:  the defensive line being protected [GPath]
+        _aliens: the grid of aliens in the wave [Formation]
+        _playerBolts: the player bolts on screen [Archetype of _BOLT_COMPONENTS]
+        _alienBolts:  the alien bolts on screen [Archetype of _BOLT_COMPONENTS]
         _lives:  the number of lives left  [int >= 0]
         _time:   The amount of time since the last Alien "step" [number >= 0]
 
@@ -61,10 +125,27 @@ class Wave(object):
 
     LIST MORE ATTRIBUTES (AND THEIR INVARIANTS) HERE IF NECESSARY
     _aliensDirection: the Direction in which aliens are moving
-    _alienStep: number of steps since the last Alien Bolt was fired
+    _alienStep: number of alien steps since the wave started [int >= 0]
+    _schedule: the (row,col) slots of the aliens waiting to fire, keyed by alien step
+               [FireSchedule]
     _gameResult: whether the player won or not
     _alienSpeed: the number of seconds (0 < float <= 1) between alien steps
     _score: score collected when aliens have been killed
+    _renderer: the adapter that draws the models [WaveRenderer, or None until drawn]
+    _barrage: the alien bolts of bullet-hell mode [BoltField, or None in normal mode]
+    _random: the random stream for every choice this wave makes [numpy Generator]
+    _entities: the registry of the bolt entities [Entities]
+    _collisions: the pass that finds every contact of a frame [CollisionPass]
+    _systems: the systems an update runs, each at its own rate [SystemScheduler]
+    _invaded: whether an alien is at or below the defense line, as of the last
+              alien step or kill [bool]
+    _scripts: the scripted behaviours running in this wave [ScriptScheduler]
+    _shields: the slots of the aliens whose shield is up [set of (row,col)]
+    _divers: the aliens away from the formation on a dive [Archetype of _DIVER_COMPONENTS]
+    _diveSteps: the number of alien steps between the dives the wave starts [int >= 0,
+                0 if it starts none]
+    _nextDive: the alien step at or after which the wave starts its next dive [int >= 0]
+    _bunkers: the bunkers between the ship and the defensive line [Bunkers]
     """
 
     # GETTERS AND SETTERS (ONLY ADD IF YOU NEED THEM)
@@ -80,71 +161,318 @@ class Wave(object):
         """
         return self._ship
 
-    def setAliens(self):
+    def setAliens(self, config, formation=None):
         """
-        Creats the attribute _aliens by looping through the table of aliens
-        created. Then it sets the attributes _aliensDirection and _alienStep.
+        Creats the attribute _aliens as a full formation of aliens. Then it sets
+        the attributes _aliensDirection and _alienStep.
+
+        The settings are only used to build a formation when none is given.
+
+        Parameter config: the settings of the wave
+        Precondition: a Config object
+
+        Parameter formation: a fresh formation to use instead of building one
+        Precondition: a full Formation in its starting position that no other
+        wave uses, or None
         """
-        aliens = []
-        for row in range(ALIEN_ROWS):
-            aliens.append([])
-            for col in range(ALIENS_IN_ROW):
-                alien = Alien(row+1, col+1)
-                aliens[row].append(alien)
-        self._aliens = aliens
+        if formation == None:
+            formation = Formation(config)
+        self._aliens = formation
         self._aliensDirection = "Right"
         self._alienStep = 0
 
     def setBolts(self):
         """
-        Creates the attribute _bolts by initializing one alien bolt.
+        Creates the attributes _entities, _playerBolts, _alienBolts and _schedule
+        by scheduling one alien shot.
         """
-        self._bolts = []
+        self._entities = Entities()
+        self._playerBolts = Archetype(self._entities, _BOLT_COMPONENTS)
+        self._alienBolts = Archetype(self._entities, _BOLT_COMPONENTS)
+        self._schedule = FireSchedule()
         self.addAlienBolt()
 
-    def addAlienBolt(self):
+    def setBunkers(self, count=BUNKER_COUNT):
         """
-        Adds a new alien bolt to be fired from a random alien at random time
-        into the list _bolts.
+        Creates the attribute _bunkers, with undamaged bunkers.
+
+        Parameter count: the number of bunkers
+        Precondition: an int with 0 <= count <= GAME_WIDTH // BUNKER_WIDTH
         """
-        firingAlien = self.whos_firing(self.randomColumn())
-        when_to_fire = random.randrange(1, BOLT_RATE)
+        self._bunkers = Bunkers(count)
 
-        newAlienBolt = Bolt(firingAlien, 'alien', when_to_fire)
-        self._bolts.append(newAlienBolt)
+    def getBunkers(self):
+        """
+        Returns the attribute _bunkers.
+        """
+        return self._bunkers
 
-    def whos_firing(self, v_aliens):
+    def setDivers(self, every=0):
         """
-        Returns the alien that will fire a bolt, after finding the lowest alien
-        among the aliens from the column given.
+        Creates the attributes _divers, _diveSteps and _nextDive, with no alien
+        diving.
 
-        Parameter v_aliens: the list that contains the vertial column of aliens
-        Precondition: a one-dimension list of Alien objects
+        Parameter every: the number of alien steps between the dives the wave starts
+        (see triggerDive)
+        Precondition: an int >= 0, 0 to start none
         """
-        for alien in range(ALIEN_ROWS):
-            bottomAlien = (ALIEN_ROWS-1) - alien
-            if v_aliens[bottomAlien] != None :
-                return v_aliens[bottomAlien]
+        self._divers = Archetype(self._entities, _DIVER_COMPONENTS, _DIVER_INTS)
+        self._diveSteps = every
+        self._nextDive = self._alienStep + every
 
-    def randomColumn(self):
+    def startDive(self, slot, path='loop', mirror=None):
+        """
+        Sends the alien at the given slot on a dive.
+
+        The alien leaves the formation and flies the path from its slot, following
+        the slot as the formation marches.  When the path is over it is back in
+        its slot, and in the formation again.  While it dives it does not stop the
+        wave from marching or invading, but it can be shot, and it destroys the
+        ship if it flies into it.
+
+        Parameter slot: the (row,col) slot of the alien
+        Precondition: a slot of a living alien in the formation of this wave (not
+        one that is already diving)
+
+        Parameter path: the path to fly
+        Precondition: a str in dives.PATH_NAMES
+
+        Parameter mirror: whether to fly the path mirrored left to right
+        Precondition: a bool, or None to bend towards the middle of the screen
+        """
+        row, col = slot
+        sx, sy = self._aliens.getLocal(row, col)
+        x, y = self._aliens.getPosition(row, col)
+        if mirror == None:
+            mirror = x > GAME_WIDTH/2
+        self._aliens.detach(row, col)
+        self._divers.spawn((row, col, pathIndex(path), -1 if mirror else 1, 0.0,
+                            sx, sy, x, y, x, y))
+        self._formationChanged()
+
+    def triggerDive(self):
+        """
+        Sends a random alien on a dive if one is due.
+
+        A dive is due every _diveSteps alien steps.  The diver is the lowest alien of
+        a random column, and it flies a random path towards the middle of the
+        screen.  Both are picked with the random stream of the wave.  Nothing
+        dives if no alien is left in the formation.
+        """
+        if self._diveSteps == 0 or self._alienStep < self._nextDive:
+            return
+        self._nextDive = self._alienStep + self._diveSteps
+        col = self.randomColumn()
+        if col == None:
+            return
+        path = int(self._random.integers(len(PATH_NAMES)))
+        self.startDive((self._aliens.bottomRow(col), col), PATH_NAMES[path])
+
+    def isDiving(self, slot):
+        """
+        Returns True if the alien at the given slot is away on a dive.
+
+        Parameter slot: the (row,col) slot of the alien
+        Precondition: a slot of the formation of this wave
+        """
+        return self._aliens.isAway(slot[0], slot[1])
+
+    def countDivers(self):
+        """
+        Returns the number of aliens away on a dive.
+        """
+        return len(self._divers)
+
+    def setScripts(self):
+        """
+        Creates the attributes _scripts and _shields, with no script running and
+        no shield up.
+        """
+        self._scripts = ScriptScheduler(self._entities, self._alienStep)
+        self._shields = set()
+
+    def addScript(self, kind, slot, *params):
+        """
+        Returns the handle of a new scripted behaviour running in this wave.
+
+        The script first runs in the next update.  The parameters not given take
+        their defaults.  See behaviours.py for the behaviours to run.
+
+        Parameter kind: the name of the behaviour
+        Precondition: a str for which behaviours.isBehaviour is True
+
+        Parameter slot: the (row,col) slot of the alien running it
+        Precondition: a slot of a living alien in the formation of this wave
+
+        Parameter params: the first parameters of the behaviour, after the phase
+        Precondition: numbers, no more than the behaviour takes
+        """
+        assert isBehaviour(kind), repr(kind)
+        slot = (int(slot[0]), int(slot[1]))
+        params = fillParams(kind, params)
+        script = startBehaviour(self, kind, slot, params)
+        return self._scripts.spawn(script, (kind, slot, params))
+
+    def setSpecials(self, count):
+        """
+        Makes special aliens of up to count living aliens chosen at random, each
+        running a behaviour with its default parameters.
+
+        The behaviours are handed out in the order of behaviours.BEHAVIOURS, over and
+        over.
+
+        Parameter count: the number of special aliens
+        Precondition: an int >= 0
+        """
+        living = self._aliens.living()
+        count = min(count, len(living))
+        if count == 0:
+            return
+        chosen = self._random.choice(len(living), size=count, replace=False)
+        for i in range(count):
+            self.addScript(BEHAVIOURS[i % len(BEHAVIOURS)], living[int(chosen[i])])
+
+    def _startScript(self, spec, phase):
+        """
+        Returns the generator of a stored scripted behaviour, started at a phase.
+
+        Parameter spec: the behaviour, as addScript recorded it
+        Precondition: a (kind, slot, params) tuple
+
+        Parameter phase: the phase to start at
+        Precondition: an int >= 0 that is a phase of the behaviour
+        """
+        kind, slot, params = spec
+        return startBehaviour(self, kind, slot, params, phase)
+
+    def stopScript(self, handle):
+        """
+        Ends a scripted behaviour.
+
+        Parameter handle: the script to stop
+        Precondition: a handle returned by addScript, of a script still running
+        """
+        self._scripts.stop(handle)
+
+    def countScripts(self):
+        """
+        Returns the number of scripted behaviours running in this wave.
+        """
+        return self._scripts.count()
+
+    def isAlienAlive(self, slot):
         """
-        Returns a random Column of aliens in self._aliens table.
+        Returns True if the alien at the given slot is alive, in the formation or
+        on a dive.
+
+        Parameter slot: the (row,col) slot of the alien
+        Precondition: a slot of the formation of this wave
         """
-        list = [None]*ALIEN_ROWS
-        while list == [None]*ALIEN_ROWS:
-            col_number = random.randint(1, ALIENS_IN_ROW)
-            list = []
-            for row in self._aliens:
-                list.append(row[col_number-1])
-        return list
+        row, col = slot
+        return self._aliens.isAlive(row, col) or self._aliens.isAway(row, col)
 
-    def setDline(self):
+    def isShielded(self, slot):
         """
-        Creates the attribute _dline.
+        Returns True if the alien at the given slot has its shield up.
+
+        Parameter slot: the (row,col) slot of the alien
+        Precondition: a slot of the formation of this wave
         """
-        points = [0, DEFENSE_LINE, GAME_WIDTH, DEFENSE_LINE]
-        color = 'black'
-        self._dline = GPath(points = points, linewidth = 1, linecolor = color)
+        return slot in self._shields
+
+    def setShield(self, slot, up):
+        """
+        Raises or lowers the shield of an alien.  A player bolt that hits a
+        shielded alien is used up, and the alien survives.
+
+        Parameter slot: the (row,col) slot of the alien
+        Precondition: a slot of a living alien of the formation of this wave
+
+        Parameter up: whether the shield is up
+        Precondition: a bool
+        """
+        if up:
+            self._shields.add(tuple(slot))
+        else:
+            self._shields.discard(tuple(slot))
+
+    def isSlotEmpty(self, slot):
+        """
+        Returns True if slot is a slot of the formation with no alien in it, alive
+        or away.
+
+        Parameter slot: the (row,col) slot to check
+        Precondition: a pair of ints
+        """
+        row, col = slot
+        return (0 <= row < self._aliens.getRows() and 0 <= col < self._aliens.getCols()
+                and not self.isAlienAlive(slot))
+
+    def reviveAlien(self, slot):
+        """
+        Puts a new living alien in an empty slot of the formation.
+
+        Parameter slot: the (row,col) slot of the alien
+        Precondition: a slot for which isSlotEmpty is True
+        """
+        self._aliens.revive(slot[0], slot[1])
+        self._formationChanged()
+
+    def fireFrom(self, slot):
+        """
+        Fires an alien bolt downwards from the bottom of the alien at the given
+        slot, where it is now.  A diving alien fires from where it flies.
+
+        Parameter slot: the (row,col) slot of the alien
+        Precondition: a slot of the formation of this wave that is alive, that is
+        diving, or that has remains (see Formation.getPosition)
+        """
+        if self._aliens.isAway(slot[0], slot[1]):
+            row = self._diverRow(slot)
+            x = self._divers.column('x')[row]
+            y = self._divers.column('y')[row]
+        else:
+            x, y = self._aliens.getPosition(slot[0], slot[1])
+        y -= self._aliens.getAlienSize()[1]/2
+        self.fireBolt(self._alienBolts, x, y, -BOLT_SPEED)
+
+    def addAlienBolt(self):
+        """
+        Schedules a random alien to fire a bolt a random number of alien steps
+        from now.  Nothing is scheduled if no alien is left.
+
+        Only the slot of the alien is recorded.  The bolt entity is spawned when
+        the shot is due (see fire_Alien_Bolt).
+        """
+        col = self.randomColumn()
+        if col == None:
+            return
+        firingAlien = self.whos_firing(col)
+        when_to_fire = int(self._random.integers(1, BOLT_RATE))
+        self._schedule.push(self._alienStep + when_to_fire, firingAlien)
+
+    def whos_firing(self, col):
+        """
+        Returns the (row,col) slot of the alien that will fire a bolt, after
+        finding the lowest alien among the aliens from the column given.
+
+        Parameter col: the column of aliens to fire from
+        Precondition: an int 0 <= col < the number of columns, with a living alien
+        """
+        return (self._aliens.bottomRow(col), col)
+
+    def randomColumn(self):
+        """
+        Returns a random column of self._aliens that has a living alien, or None
+        if there are no aliens left.
+
+        The formation keeps an index of its living columns, so this takes the
+        same time however sparse the formation is.
+        """
+        count = self._aliens.countColumns()
+        if count == 0:
+            return None
+        return self._aliens.getLivingColumn(int(self._random.integers(count)))
 
     def getLives(self):
         """
@@ -165,13 +493,19 @@ class Wave(object):
         return self._score
 
     # INITIALIZER (standard form) TO CREATE SHIP AND ALIENS
-    def __init__(self, lives, alienspeed, score):
+    def __init__(self, lives, alienspeed, score, config=None, formation=None):
         """
-        Creates ship, aliens bolts, defense line, and sets wave attributes such
+        Creates ship, aliens and bolts, and sets wave attributes such
         as _time, _lives, _gameResult, _alienSpeed, and _score. Other attributes
         such as _aliensDirection and _alienStep are initialized in setAliens()
         helper method.
 
+        The other settings of the wave come from config: the size and shape of the
+        formation, the number of bunkers and special aliens, how often aliens dive,
+        bullet-hell mode and the seed.  Two waves made with the same seed and given
+        the same input and dt on every update play out identically.  The bullet-hell
+        field shares the wave's stream.
+
         Parameter lives: number of lives that the player is initially given
         Precondition: an int between 1 <= lives <= SHIP_LIVES
 
@@ -180,23 +514,95 @@ class Wave(object):
 
         Parameter score: score collected when aliens have been killed
         Precondition: an int greater than 0
+
+        Parameter config: the settings of the wave; its seed seeds the random stream
+        of the wave, or the operating system does if it is None (see setSpecials for
+        the special aliens and triggerDive for the dives)
+        Precondition: a Config object, or None for Config()
+
+        Parameter formation: a fresh formation to use instead of building one
+        Precondition: a full Formation in its starting position, built from the size
+        and shape of config, that no other wave uses, or None (WaveFactory passes a
+        copy of its template)
         """
+        if config == None:
+            config = Config()
+        self._random = np.random.default_rng(config.getSeed())
         self.setShip()
-        self.setAliens()
+        self.setAliens(config, formation)
         self.setBolts()
-        self.setDline()
+        self.setBunkers(config.getBunkers())
+        self.setDivers(config.getDives())
+        self.setScripts()
+        self.setCollisions()
+        self._renderer = None
+        self._barrage = BoltField(rng=self._random) if config.getBarrage() else None
         self._time = 0
         self._lives = lives
 
         self._gameResult = None
         self._alienSpeed = alienspeed
         self._score = score
+        self.setSystems()
+        self.setSpecials(config.getSpecials())
+        self.checkInvasion()
+
+    def setSystems(self):
+        """
+        Creates the attribute _systems, registering the systems in the order an
+        update runs them.
+
+        Ship, aliens and bolts move on every update.  Firing the alien shots that
+        are due and the invasion check only depend on the formation, so they run
+        on the updates in which the aliens take a step (and the invasion check
+        again when an alien is killed).  Scripts waiting for an alien step are
+        resumed at the same rate, and scripts waiting for a time on every update.
+        Divers fly on every update, after the formation has marched, so they keep
+        up with their slots.  New dives are started on the alien steps, after the
+        scripts, like the dives scripts start.  The bullet-hell system is only registered
+        in bullet-hell mode.
+        """
+        systems = SystemScheduler()
+        systems.addSystem('positions', lambda dt, input: self.savePositions(), RATE_TICK)
+        systems.addSystem('ship', lambda dt, input: self.shipMoving(input, dt), RATE_TICK)
+        systems.addSystem('aliens', lambda dt, input: self.aliensMoving(dt), RATE_TICK)
+        systems.addSystem('playerBolts',
+                          lambda dt, input: self.update_Player_Bolt(input, dt), RATE_TICK)
+        systems.addSystem('alienFire', lambda dt, input: self.fire_Alien_Bolt(),
+                          RATE_STEP)
+        systems.addSystem('alienBolts', lambda dt, input: self.update_Alien_Bolt(dt),
+                          RATE_TICK)
+        systems.addSystem('divers', lambda dt, input: self.moveDivers(dt), RATE_TICK)
+        systems.addSystem('collide', lambda dt, input: self.collide(), RATE_TICK)
+        if self._barrage != None:
+            systems.addSystem('barrage', lambda dt, input: self.update_Barrage(dt),
+                              RATE_TICK)
+        systems.addSystem('scriptSteps',
+                          lambda dt, input: self._scripts.stepped(self._alienStep),
+                          RATE_STEP)
+        systems.addSystem('scriptTimers', lambda dt, input: self._scripts.advance(dt),
+                          RATE_TICK)
+        systems.addSystem('diveTrigger', lambda dt, input: self.triggerDive(), RATE_STEP)
+        systems.addSystem('invasion', lambda dt, input: self.checkInvasion(), RATE_STEP)
+        self._systems = systems
+
+    def setProfiler(self, profiler):
+        """
+        Sets the function told what ran after every update.
+
+        It is called as profiler(records), where records is a list of (name, seconds)
+        pairs: each system that ran, in order, and how long it took.
+
+        Parameter profiler: the function to call
+        Precondition: a function of one list, or None to stop profiling
+        """
+        self._systems.setProfiler(profiler)
 
     # UPDATE METHOD TO MOVE THE SHIP, ALIENS, AND LASER BOLTS
     def update(self, dt, input):
         """
         Animates a single frame in the game and update the whole wave object by
-        using several update methods.
+        running the systems that are due (see setSystems).
 
         Parameter dt: The time in seconds since last update
         Precondition: dt is a number (int or float)
@@ -204,58 +610,647 @@ class Wave(object):
         Parameter input: user input used to control the ship and change state
         Precondition: instance of GInput; it is inherited from GameApp
         """
-        if self._ship != None:
-            self.shipMoving(input)
+        self._systems.run(dt, input)
+
+    # FAST-FORWARD METHODS FOR HEADLESS RUNS
+    def fastForward(self, frames, dt, input):
+        """
+        Returns the number of frames run after updating the wave with the same dt
+        and input for the given number of frames.
 
-        self.aliensMoving(dt)
+        The result is bit-identical to calling update that many times.  Between
+        events the wave only moves: the ship slides, the bolts fly and _time grows.
+        Those frames are coasted (see coast) instead of updated, and update is only
+        called for the frames with an event in them: an alien step that fires a
+        shot, wakes a script or starts a dive, a bolt hitting something, a script
+        waking, or the player firing.  The other alien steps only march the
+        formation, and a bolt leaving the screen is only removed, so those are
+        coasted too.
 
-        self.update_Player_Bolt(input)
+        Like headless.simulate, this stops early after any frame at the end of
+        which the game is over or the ship is destroyed.
 
-        self.update_Alien_Bolt()
+        Parameter frames: the number of frames to run
+        Precondition: an int >= 0
 
-        for bolt in self._bolts:
-            if bolt.isPlayerBolt():
-                self.alien_collides(bolt)
-            if not bolt.isPlayerBolt():
-                self.ship_collides(bolt)
+        Parameter dt: The time in seconds of each frame
+        Precondition: dt is a number (int or float)
+
+        Parameter input: the input held down for all of the frames
+        Precondition: an object with an is_key_down method, like GInput
+        """
+        if frames > 0 and (self._ship == None or self.gameOver()):
+            self.update(dt, input)
+            return 1
+        done = 0
+        while done < frames:
+            done += self.coast(frames-done, dt, input)
+            if done == frames:
+                break
+            self.update(dt, input)
+            done += 1
+            if self.gameOver() or self._ship == None:
+                break
+        return done
+
+    def coast(self, frames, dt, input):
+        """
+        Returns the number of frames coasted, up to frames, before the next event.
+
+        Coasting does exactly the arithmetic update would do to the ship, the bolts,
+        _time and the script clock, and nothing else.  The running sums are computed
+        with NumPy accumulate, which adds in order like update does, so the results
+        are bit-identical.  Coasting stops before the first frame that could have an
+        event in it, so that frame can be given to update.  The tests for hits are
+        conservative: coasting may stop a little early, but never late.  In
+        bullet-hell mode, where aliens may fire on every frame, nothing is coasted,
+        and neither is it while an alien is diving.
+
+        Bolts that leave the screen are removed as update would remove them.
+        Alien steps are coasted too, as long as a step fires no shot, wakes no
+        script, starts no dive and brings no alien to the defense line.  Only the
+        formation moves in such a step.  The marches are planned with MovingRight
+        and MovingLeft (see _planMarches), so the formation ends up exactly where
+        the steps would have put it, and the player bolts are tested against the
+        formation as it is in each frame.
+
+        Parameter frames: the largest number of frames to coast
+        Precondition: an int >= 0
+
+        Parameter dt: The time in seconds of each frame
+        Precondition: dt is a number (int or float)
+
+        Parameter input: the input held down for all of the frames
+        Precondition: an object with an is_key_down method, like GInput
+        """
+        if frames == 0 or self._barrage != None or len(self._divers) > 0:
+            return 0
+
+        players = self._playerBolts
+        falling = self._alienBolts
+        ship = self._ship
+        if len(players) == 0 and ship != None and input.is_key_down('spacebar'):
+            return 0
+
+        # The same expressions as shipMoving and the bolt updates, so the sums match
+        da = 0
+        if input.is_key_down('right'):
+            da += SHIP_MOVEMENT * dt*BASE_RATE
+        if input.is_key_down('left'):
+            da -= SHIP_MOVEMENT * dt*BASE_RATE
+        speed = BOLT_SPEED * dt*BASE_RATE
+
+        # The quiet frames ahead, with the alien steps taken by the end of each
+        times, steps = self._coastClock(frames, dt, self._quietSteps())
+        n = len(times)
+        if n == 0:
+            return 0
+        ok = np.ones(n, dtype=bool)
+        marches, ceilings = self._planMarches(int(steps[-1]))
+        if len(marches) < steps[-1]:
+            ok &= steps <= len(marches)
+            steps = np.minimum(steps, len(marches))
+
+        # The script clock, stopping before any script wakes
+        clocks = _accumulate(self._scripts.getClock(), dt, n)
+        wake = self._scripts.nextTime()
+        if wake != None:
+            ok &= clocks < wake
+
+        if ship != None:
+            if da == 0 or not (SHIP_WIDTH/2 <= ship.x + da <= GAME_WIDTH - SHIP_WIDTH/2):
+                # Still, or pushing against a wall: update leaves x where it is
+                # (ship.x is on the wall then, or the first frame is an event)
+                xs = np.full(n, float(ship.x))
+                if da != 0 and ship.x not in (SHIP_WIDTH/2, GAME_WIDTH - SHIP_WIDTH/2):
+                    ok[0] = False
+            else:
+                xs = _accumulate(ship.x, da, n)
+                ok &= (xs >= SHIP_WIDTH/2) & (xs <= GAME_WIDTH - SHIP_WIDTH/2)
+
+        # A bolt stops counting in the frame it leaves the screen, as update removes
+        # it before the collisions.  Player bolts fly up, so leaving lasts.
+        paths = []
+        cleared = np.ones(n, dtype=bool)
+        for row in range(len(players)):
+            x = players.column('x')[row]
+            y = players.column('y')[row]
+            ys = _accumulate(y, speed, n)
+            gone = ys >= GAME_HEIGHT + BOLT_HEIGHT/2
+            hits = ys + BOLT_HEIGHT/2 >= ceilings[row][steps]
+            near = self._nearBunkers(x, y, ys)
+            if near is not None:
+                hits |= near
+            ok &= gone | ~hits
+            cleared &= gone
+            paths.append((players, row, ys))
+        if len(players) > 0 and ship != None and input.is_key_down('spacebar'):
+            # The ship fires again the frame after the last player bolt is gone
+            ok[1:] &= ~cleared[:-1]
+        for row in range(len(falling)):
+            x = falling.column('x')[row]
+            y = falling.column('y')[row]
+            ys = _accumulate(y, -speed, n)
+            gone = ys + BOLT_HEIGHT/2 <= 0
+            hits = self._nearBunkers(x, y, ys)
+            if ship != None:
+                # A margin of a pixel keeps rounding in these bounds from missing a hit
+                before = np.concatenate(([y], ys[:-1]))
+                band = ((ys - BOLT_HEIGHT/2 < ship.y + SHIP_HEIGHT/2 + 1) &
+                        (before + BOLT_HEIGHT/2 > ship.y - SHIP_HEIGHT/2 - 1))
+                near = np.abs(xs - x) < SHIP_WIDTH/2 + BOLT_WIDTH/2 + 1
+                hits = band & near if hits is None else hits | (band & near)
+            if hits is not None:
+                ok &= gone | ~hits
+            paths.append((falling, row, ys))
+
+        done = n if ok.all() else int(np.argmin(ok))
+        if done == 0:
+            return 0
+
+        # Commit the last coasted frame, with the frame before it as the saved one
+        last = done-1
+        self._time = float(times[last])
+        self._scripts.setClock(float(clocks[last]))
+        taken = int(steps[last])
+        if taken > 0:
+            ox, oy, direction = marches[taken-1]
+            self._aliens.setOffset(ox, oy)
+            self._aliensDirection = direction
+            self._alienStep += taken
+            self._scripts.stepped(self._alienStep)
+            self.checkInvasion()
+        if ship != None:
+            px = ship.x if last == 0 else float(xs[last-1])
+            ship.x = float(xs[last])
+            ship.setSavedPosition(px, ship.y)
+        for (bolts, row, ys) in paths:
+            y = bolts.column('y')[row]
+            bolts.column('px')[row] = bolts.column('x')[row]
+            bolts.column('py')[row] = y if last == 0 else float(ys[last-1])
+            bolts.column('y')[row] = float(ys[last])
+        # The bolts that left the screen, with the tests of the bolt updates
+        players.keepBetween('y', -math.inf, GAME_HEIGHT + BOLT_HEIGHT/2)
+        falling.keepBetween('y', -BOLT_HEIGHT/2, math.inf)
+        return done
+
+    def _quietSteps(self):
+        """
+        Returns the number of alien steps ahead that only move the formation, or None
+        if there is no limit.
+
+        A step is not quiet if a shot is due in it, a script waits for it, or the
+        wave starts a dive in it.  Whether a step brings an alien to the defense
+        line is left to _planMarches.
+        """
+        limits = []
+        due = self._schedule.peek()
+        if due != None:
+            limits.append(due)
+        wake = self._scripts.nextStep()
+        if wake != None:
+            limits.append(wake)
+        if self._diveSteps > 0:
+            limits.append(self._nextDive)
+        if not limits:
+            return None
+        return max(0, min(limits) - 1 - self._alienStep)
+
+    def _coastClock(self, frames, dt, steps):
+        """
+        Returns _time at the end of each of the next frames, and the number of alien
+        steps taken by then, as a float array and an int array.
+
+        The arrays have an entry for each of up to frames frames.  They stop before
+        the first frame that would take a step beyond the given number, or more
+        than one step at once.  _time is summed in the order of aliensMoving, a
+        step at a time, so the values are bit-identical.
+
+        Parameter frames: the largest number of frames
+        Precondition: an int > 0
+
+        Parameter dt: The time in seconds of each frame
+        Precondition: dt is a number (int or float)
+
+        Parameter steps: the number of alien steps that may be taken
+        Precondition: an int >= 0, or None for any number
+        """
+        limit = self._alienSpeed
+        runs = []
+        stepped = []
+        time = self._time
+        total = 0
+        while total < frames:
+            # Look no further than the next alien step, plus a frame for rounding
+            m = min(frames-total, max(1, int((limit - time) / dt) + 2))
+            run = _accumulate(time, dt, m)
+            j = int(run.searchsorted(limit))
+            if j == m:
+                runs.append(run)
+                total += m
+                time = run[-1]
+                continue
+            after = run[j] - limit
+            if len(stepped) == steps or after >= limit:
+                runs.append(run[:j])
+                total += j
+                break
+            run = run[:j+1]
+            run[j] = after
+            runs.append(run)
+            total += j+1
+            stepped.append(total-1)
+            time = after
+        counts = np.zeros(total, dtype=int)
+        if stepped:
+            counts[stepped] = 1
+            counts = np.cumsum(counts)
+        return (runs[0] if len(runs) == 1 else np.concatenate(runs), counts)
+
+    def _planMarches(self, count):
+        """
+        Returns where the formation would be after each of the next alien steps, and
+        the ceilings of the player bolts before and after each step.
+
+        The first result is a list with an (ox, oy, direction) triple after each
+        step, cut short before the first step that brings an alien to the defense
+        line.  The second has a float array per player bolt, with the ceiling (see
+        Formation.ceiling) less a pixel for the formation now and after each step in
+        the list.  The steps follow MovingRight, MovingLeft and invation, but move a
+        copy of the offset and direction, so the formation is never changed.
+
+        Parameter count: the number of steps to plan
+        Precondition: an int >= 0
+        """
+        aliens = self._aliens
+        players = self._playerBolts
+        xs = players.column('x')
+        ys = players.column('y')
+        bolts = [(xs[row], ys[row]) for row in range(len(players))]
+        ox, oy = aliens.getOffset()
+        direction = self._aliensDirection
+        marches = []
+        ceilings = [[aliens.ceiling(x, y) - 1] for (x, y) in bolts]
+        scale = aliens.getScale()
+        margin = (ALIEN_H_SEP + ALIEN_WIDTH/2)*scale
+        height = aliens.getAlienSize()[1]/2
+        for k in range(count):
+            if direction == "Right":
+                walk = aliens.rightmost(ox) < GAME_WIDTH - margin
+            else:
+                walk = aliens.leftmost(ox) > margin
+            ox, oy, direction = self._stepOffset(ox, oy, direction, walk)
+            if aliens.count() > 0 and aliens.lowest(oy) - height <= DEFENSE_LINE:
+                break
+            marches.append((ox, oy, direction))
+            for (row, (x, y)) in enumerate(bolts):
+                ceilings[row].append(aliens.ceiling(x, y, (ox, oy)) - 1)
+        return (marches, [np.array(values) for values in ceilings])
+
+    def _stepOffset(self, ox, oy, direction, walk):
+        """
+        Returns the (ox, oy, direction) of the formation after one alien step from
+        the given one, like MovingRight and MovingLeft take it.
+
+        Parameter ox: the horizontal offset of the formation
+        Precondition: a number
+
+        Parameter oy: the vertical offset of the formation
+        Precondition: a number
+
+        Parameter direction: the direction the formation moves in
+        Precondition: "Right" or "Left"
+
+        Parameter walk: whether the formation walks on, rather than moving down and
+        turning around
+        Precondition: a bool
+        """
+        scale = self._aliens.getScale()
+        if not walk:
+            return (ox + 0, oy + -ALIEN_V_WALK*scale,
+                    "Left" if direction == "Right" else "Right")
+        if direction == "Right":
+            return (ox + ALIEN_H_WALK*scale, oy + 0, direction)
+        return (ox + -ALIEN_H_WALK*scale, oy + 0, direction)
+
+    def _nearBunkers(self, x, y, ys):
+        """
+        Returns whether a bolt could meet a bunker in each of the coasted frames, as
+        a bool array, or None if it cannot meet one in any.
+
+        Each frame is swept from the position before it, like in Bunkers.hit, and
+        tested against the heights Bunkers.getReach gives for the bolt.
+
+        Parameter x: the horizontal coordinate of the bolt
+        Precondition: a number
+
+        Parameter y: the vertical coordinate of the bolt before the first frame
+        Precondition: a number
+
+        Parameter ys: the vertical coordinate of the bolt after each frame
+        Precondition: a 1d float array
+        """
+        low, high = self._bunkers.getReach(x)
+        if low >= high:
+            return None
+        before = np.concatenate(([y], ys[:-1]))
+        return (np.maximum(before, ys) > low) & (np.minimum(before, ys) < high)
 
     # DRAW METHOD TO DRAW THE SHIP, ALIENS, DEFENSIVE LINE AND BOLTS
-    def draw(self, view):
+    def draw(self, view, alpha=1.0):
         """
-        Draws Alien, Ship, and Defense line, and Bolt objects.
+        Draws Alien, Ship, and Defense line, and bolts.
+
+        The render adapter is created on the first call, so a wave that is never
+        drawn never imports game2d.  The ship and bolts are drawn between their
+        positions at the last two updates; the aliens step, so they are not.
 
         Paramter view: the game view, used in drawing
         Precondition: instance of GView; it is inherited from GameApp
+
+        Parameter alpha: how far real time is past the last update
+        Precondition: a float in 0..1; it is inherited from GameApp
         """
-        for row in self._aliens:
-            for alien in row:
-                if alien != None:
-                    alien.draw(view)
+        if self._renderer is None:
+            from render import WaveRenderer
+            self._renderer = WaveRenderer()
+
+        bolts = (self._playerBolts, self._alienBolts)
+        self._renderer.draw(view, self._ship, self._aliens, bolts, self._barrage, alpha,
+                            self._shields, self._divers, self._bunkers)
 
+    # SNAPSHOT METHODS TO FORK AND ROLL BACK A WAVE
+    def snapshot(self):
+        """
+        Returns the complete state of this wave as a compact bytes object.
+
+        Passing the result to restore, on this wave or on any other wave with the
+        same formation size, gives a wave that plays on exactly like this one from
+        here: the same input and dt give the same frames.  The models are stored
+        as plain numbers, so no drawable is copied.  A normal wave takes a few
+        hundred bytes, most of them the bunker bitmasks at a bit per cell; a
+        bullet-hell field adds 24 bytes per live bolt.
+
+        The snapshot does not include drawables, so it is only valid between
+        calls to update.  Scripted behaviours are running generators, which cannot
+        be copied, so each is stored as its behaviour, slot, parameters, wait and
+        phase, and restore starts it again at that phase (see behaviours.py).
+        Shields and divers are plain data, so they are included as they are.
+        """
+        rows = self._aliens.getRows()
+        cols = self._aliens.getCols()
+        bolts = []
+        for (kind, archetype) in self._boltKinds():
+            for row in range(len(archetype)):
+                bolts.append((kind, archetype.column('x')[row],
+                              archetype.column('y')[row], archetype.column('px')[row],
+                              archetype.column('py')[row]))
+        shots = self._schedule.pending()
+        columns = self._aliens.getLivingColumns()
+
+        # Dead aliens only matter while a shot waits to fire from them
+        remains = []
+        for (step, slot) in shots:
+            if (not self._aliens.isAlive(slot[0], slot[1]) and
+                    not self._aliens.isAway(slot[0], slot[1]) and slot not in remains):
+                remains.append(slot)
+
+        flags = 0
         if self._ship != None:
-            self._ship.draw(view)
+            flags |= _HAS_SHIP
+            shipX = self._ship.x
+            shipPx = self._ship.getSavedPosition()[0]
+        else:
+            shipX = shipPx = 0.0
+        if self._aliensDirection == "Right":
+            flags |= _MOVING_RIGHT
+        if self._barrage != None:
+            flags |= _HAS_BARRAGE
+        result = -1 if self._gameResult == None else int(self._gameResult)
+        ox, oy = self._aliens.getOffset()
+
+        data = [_HEADER.pack(rows, cols, flags, result, self._lives, self._score,
+                             self._alienStep, self._time, self._alienSpeed, ox, oy,
+                             shipX, shipPx, len(columns), len(remains), len(bolts),
+                             len(shots), len(self._divers))]
+        state = self._random.bit_generator.state
+        data.append(_RANDOM.pack(state['state']['state'].to_bytes(16, 'little'),
+                                 state['state']['inc'].to_bytes(16, 'little'),
+                                 state['has_uint32'], state['uinteger']))
+        data.append(np.packbits(self._aliens.getAliveMask()).tobytes())
+        data.append(np.array(columns, dtype='<u2').tobytes())
+        for slot in remains:
+            x, y = self._aliens.getPosition(slot[0], slot[1])
+            data.append(_REMAINS.pack(slot[0], slot[1], x, y))
+        for bolt in bolts:
+            data.append(_BOLT.pack(*bolt))
+        for (step, slot) in shots:
+            data.append(_SHOT.pack(slot[0], slot[1], step))
+        divers = self._divers
+        for row in range(len(divers)):
+            data.append(_DIVER.pack(*[divers.column(name)[row] for name in
+                ('row', 'col', 'path', 'sign', 't', 'x', 'y', 'px', 'py')]))
+        data.append(_DIVES.pack(self._diveSteps, self._nextDive))
+        if self._barrage != None:
+            xs, ys, vys, scale = self._barrage.getState()
+            data.append(_FIELD.pack(len(xs), scale))
+            for values in (xs, ys, vys):
+                data.append(values.astype('<f8').tobytes())
+        records, order, clock = self._scripts.getState()
+        data.append(_SCRIPTS.pack(len(self._shields), len(records), clock, order))
+        for slot in sorted(self._shields):
+            data.append(_SHIELD.pack(*slot))
+        for ((kind, slot, params), steps, when, rank, phase) in records:
+            data.append(_SCRIPT.pack(behaviourIndex(kind), slot[0], slot[1], phase,
+                                     steps, when, rank))
+            data.append(packParams(kind, params))
+        data.append(_BUNKERS.pack(self._bunkers.getCount()))
+        data.append(self._bunkers.getState())
+        return b''.join(data)
+
+    def restore(self, data):
+        """
+        Puts this wave in the state recorded by snapshot.
 
-        self._dline.draw(view)
+        Every model is set in place and the bolts are spawned again, so restoring
+        is cheap enough to do thousands of times per second.
 
-        for bolt in self._bolts:
-            active = not bolt.isPlayerBolt() and bolt.getBoltState() == 'active'
-            active_alienBolt = active
-            if bolt.isPlayerBolt() or active_alienBolt:
-               bolt.draw(view)
+        Parameter data: the snapshot to restore
+        Precondition: a bytes object returned by snapshot on a wave with the same
+        number of rows and columns of aliens, the same number of bunkers, and the
+        same mode (normal or bullet-hell)
+        """
+        (rows, cols, flags, result, lives, score, step, time, speed, ox, oy, shipX,
+         shipPx, ncols, nremains, nbolts, nshots, ndivers) = _HEADER.unpack_from(data, 0)
+        assert rows == self._aliens.getRows() and cols == self._aliens.getCols()
+        assert bool(flags & _HAS_BARRAGE) == (self._barrage != None)
+        pos = _HEADER.size
+
+        state, inc, has32, uint = _RANDOM.unpack_from(data, pos)
+        pos += _RANDOM.size
+        self._random.bit_generator.state = {'bit_generator': 'PCG64',
+            'state': {'state': int.from_bytes(state, 'little'),
+                      'inc': int.from_bytes(inc, 'little')},
+            'has_uint32': has32, 'uinteger': uint}
+
+        size = (rows*cols+7)//8
+        bits = np.frombuffer(data, dtype=np.uint8, count=size, offset=pos)
+        alive = np.unpackbits(bits, count=rows*cols).reshape(rows, cols)
+        pos += size
+        columns = np.frombuffer(data, dtype='<u2', count=ncols, offset=pos).tolist()
+        pos += 2*ncols
+        remains = {}
+        for i in range(nremains):
+            row, col, x, y = _REMAINS.unpack_from(data, pos)
+            remains[(row, col)] = (x, y)
+            pos += _REMAINS.size
+        # The divers come after the shots, but the formation needs their slots
+        start = pos + nbolts*_BOLT.size + nshots*_SHOT.size
+        divers = [_DIVER.unpack_from(data, start + i*_DIVER.size) for i in range(ndivers)]
+        self._aliens.setState(alive, (ox, oy), columns, remains,
+                              [(diver[0], diver[1]) for diver in divers])
+
+        if flags & _HAS_SHIP:
+            if self._ship == None:
+                self.setShip()
+            self._ship.x = shipX
+            self._ship.setSavedPosition(shipPx, self._ship.y)
+        else:
+            self._ship = None
+
+        self._playerBolts.clear()
+        self._alienBolts.clear()
+        for i in range(nbolts):
+            kind, x, y, px, py = _BOLT.unpack_from(data, pos)
+            pos += _BOLT.size
+            if kind == _PLAYER_BOLT:
+                self._playerBolts.spawn((x, y, px, py, BOLT_SPEED))
+            else:
+                self._alienBolts.spawn((x, y, px, py, -BOLT_SPEED))
+        self._schedule.clear()
+        for i in range(nshots):
+            row, col, when = _SHOT.unpack_from(data, pos)
+            pos += _SHOT.size
+            self._schedule.push(when, (row, col))
+        self._divers.clear()
+        for (row, col, path, sign, t, x, y, px, py) in divers:
+            sx, sy = self._aliens.getLocal(row, col)
+            self._divers.spawn((row, col, path, sign, t, sx, sy, x, y, px, py))
+        pos += ndivers*_DIVER.size
+        self._diveSteps, self._nextDive = _DIVES.unpack_from(data, pos)
+        pos += _DIVES.size
+
+        if self._barrage != None:
+            n, scale = _FIELD.unpack_from(data, pos)
+            pos += _FIELD.size
+            arrays = []
+            for k in range(3):
+                arrays.append(np.frombuffer(data, dtype='<f8', count=n, offset=pos))
+                pos += 8*n
+            self._barrage.setState(arrays[0], arrays[1], arrays[2], scale)
+
+        nshields, nscripts, clock, order = _SCRIPTS.unpack_from(data, pos)
+        pos += _SCRIPTS.size
+        shields = set()
+        for i in range(nshields):
+            shields.add(_SHIELD.unpack_from(data, pos))
+            pos += _SHIELD.size
+        records = []
+        for i in range(nscripts):
+            index, row, col, phase, steps, when, rank = _SCRIPT.unpack_from(data, pos)
+            kind = BEHAVIOURS[index]
+            params, pos = unpackParams(kind, data, pos + _SCRIPT.size)
+            when = int(when) if steps else when
+            records.append(((kind, (row, col), params), bool(steps), when, rank, phase))
+
+        count, = _BUNKERS.unpack_from(data, pos)
+        pos += _BUNKERS.size
+        assert count == self._bunkers.getCount()
+        self._bunkers.setState(data[pos:])
+
+        self._lives = lives
+        self._score = score
+        self._alienStep = step
+        self._time = time
+        self._alienSpeed = speed
+        self._aliensDirection = "Right" if flags & _MOVING_RIGHT else "Left"
+        self._gameResult = None if result < 0 else bool(result)
+        self._scripts.setState(records, order, clock, step, self._startScript)
+        self._shields = shields
+        self.checkInvasion()
+        if self._renderer != None:
+            self._renderer.invalidate()
+
+    def _boltKinds(self):
+        """
+        Returns the bolt archetypes of this wave, each paired with its snapshot kind.
+        """
+        return ((_PLAYER_BOLT, self._playerBolts), (_ALIEN_BOLT, self._alienBolts))
 
     # HELPER METHODS FOR COLLISION DETECTION
-    def shipMoving(self, input):
+    def savePositions(self):
+        """
+        Helper function for update method that remembers where the ship, the
+        bolts and the divers were at the start of this update, for interpolated
+        drawing.
+        """
+        if self._ship != None:
+            self._ship.savePosition()
+        for bolts in (self._playerBolts, self._alienBolts, self._divers):
+            bolts.copy('x', 'px')
+            bolts.copy('y', 'py')
+
+    def fireBolt(self, bolts, x, y, vy):
+        """
+        Spawns a bolt entity at the given position.
+
+        Parameter bolts: the kind of bolt to fire
+        Precondition: _playerBolts or _alienBolts
+
+        Parameter x: the horizontal coordinate of the center of the new bolt
+        Precondition: a number
+
+        Parameter y: the vertical coordinate of the center of the new bolt
+        Precondition: a number
+
+        Parameter vy: the velocity in y direction, in pixels per BASE_RATE update
+        Precondition: a number (BOLT_SPEED or -BOLT_SPEED)
+        """
+        bolts.spawn((x, y, x, y, vy))
+
+    def moveBolts(self, bolts, dt):
+        """
+        Moves every bolt of the given kind by its velocity.
+
+        Parameter bolts: the kind of bolt to move
+        Precondition: _playerBolts or _alienBolts
+
+        Parameter dt: The time in seconds since last update
+        Precondition: dt is a number (int or float)
+        """
+        ys = bolts.column('y')
+        vys = bolts.column('vy')
+        for row in range(len(bolts)):
+            ys[row] += vys[row] * dt*BASE_RATE
+
+    def shipMoving(self, input, dt):
         """
         Helper function for update method that updates the ship's position.
+        Does nothing if the ship is destroyed.
 
         Parameter input: user input used to control the ship and change state
         Precondition: instance of GInput; it is inherited from GameApp
+
+        Parameter dt: The time in seconds since last update
+        Precondition: dt is a number (int or float)
         """
+        if self._ship == None:
+            return
         da = 0
         if input.is_key_down('right'):
-            da += SHIP_MOVEMENT
+            da += SHIP_MOVEMENT * dt*BASE_RATE
         if input.is_key_down('left'):
-            da -= SHIP_MOVEMENT
+            da -= SHIP_MOVEMENT * dt*BASE_RATE
 
         if (self._ship.x + da) < (SHIP_WIDTH/2):
             self._ship.x = SHIP_WIDTH/2
@@ -267,18 +1262,22 @@ class Wave(object):
     def aliensMoving(self, dt):
         """
         Helper function for update method that updates the aliens' positions.
+        If more than one step is owed (dt is longer than _alienSpeed), all of
+        them are taken.  Every step is signalled to _systems, so that the systems
+        that only run on alien steps run later in this update.
 
         Parameter dt: The time in seconds since last update
         Precondition: dt is a number (int or float)
         """
         self._time += dt
-        if self._time >= self._alienSpeed:
+        while self._time >= self._alienSpeed:
             if self._aliensDirection == "Right":
                 self.MovingRight()
             elif self._aliensDirection == "Left":
                 self.MovingLeft()
             self._time -= self._alienSpeed
             self._alienStep += 1
+            self._systems.stepped()
 
     def MovingRight(self):
         """
@@ -287,39 +1286,19 @@ class Wave(object):
         it should move down and turn left. If it does not have to, then all the
         aliens walk to the right by one step.
         """
-        rightmost_alien = self.find_rightmostA()
-
-        max_X = GAME_WIDTH - ALIEN_H_SEP - ALIEN_WIDTH/2
-        if rightmost_alien.x >= max_X:
-            for row in self._aliens:
-                for alien in row:
-                    if alien != None:
-                        alien.y -= ALIEN_V_WALK
-                        self._aliensDirection = "Left"
+        scale = self._aliens.getScale()
+        max_X = GAME_WIDTH - (ALIEN_H_SEP + ALIEN_WIDTH/2)*scale
+        if self.find_rightmostA() >= max_X:
+            self._aliens.march(0, -ALIEN_V_WALK*scale)
+            self._aliensDirection = "Left"
         else:
-            for row in self._aliens:
-                for alien in row:
-                    if alien != None:
-                        alien.x += ALIEN_H_WALK
+            self._aliens.march(ALIEN_H_WALK*scale, 0)
 
     def find_rightmostA(self):
         """
-        Find the rightmost alien among the aliens from self._aliens.
+        Returns the x coordinate of the rightmost alien in self._aliens.
         """
-        all_x = [0]
-        rightmost_alien_row = 0
-        rightmost_alien_col = 0
-        for row in range(len(self._aliens)):
-            for col in range(len(self._aliens[row])):
-                if self._aliens[row][col] != None:
-                    if self._aliens[row][col].x > max(all_x):
-                        rightmost_alien_row = row
-                        rightmost_alien_col = col
-                    all_x += [self._aliens[row][col].x]
-
-        all_x.remove(0)
-        rightmost_alien= self._aliens[rightmost_alien_row][rightmost_alien_col]
-        return rightmost_alien
+        return self._aliens.rightmost()
 
     def MovingLeft(self):
         """
@@ -328,41 +1307,21 @@ class Wave(object):
         it should move down and turn right. If it does not have to, then all the
         aliens walk to the left by one step.
         """
-        leftmost_alien = self.find_leftmostA()
-
-        min_X = ALIEN_H_SEP + ALIEN_WIDTH/2
-        if leftmost_alien.x <= min_X:
-            for row in self._aliens:
-                for alien in row:
-                    if alien != None:
-                        alien.y -= ALIEN_V_WALK
-                        self._aliensDirection = "Right"
+        scale = self._aliens.getScale()
+        min_X = (ALIEN_H_SEP + ALIEN_WIDTH/2)*scale
+        if self.find_leftmostA() <= min_X:
+            self._aliens.march(0, -ALIEN_V_WALK*scale)
+            self._aliensDirection = "Right"
         else:
-            for row in self._aliens:
-                for alien in row:
-                    if alien != None:
-                        alien.x -= ALIEN_H_WALK
+            self._aliens.march(-ALIEN_H_WALK*scale, 0)
 
     def find_leftmostA(self):
         """
-        Find the leftmost alien among the aliens from self._aliens.
+        Returns the x coordinate of the leftmost alien in self._aliens.
         """
-        all_x = [GAME_WIDTH]
-        leftmost_alien_row = 0
-        leftmost_alien_col = 0
-        for row in range(len(self._aliens)):
-            for col in range(len(self._aliens[row])):
-                if self._aliens[row][col] != None:
-                    if self._aliens[row][col].x < min(all_x):
-                        leftmost_alien_row = row
-                        leftmost_alien_col = col
-                    all_x += [self._aliens[row][col].x]
+        return self._aliens.leftmost()
 
-        all_x.remove(GAME_WIDTH)
-        leftmost_alien = self._aliens[leftmost_alien_row][leftmost_alien_col]
-        return leftmost_alien
-
-    def update_Player_Bolt(self, input):
+    def update_Player_Bolt(self, input, dt):
         """
         Creates and updates the upward motion of a player bolt. While there is
         no player bolt being fired on the screen, if the player presses spacebar
@@ -371,103 +1330,402 @@ class Wave(object):
 
         Parameter input: the user input, used to control the ship and change state
         Precondition: instance of GInput; it is inherited from GameApp
+
+        Parameter dt: The time in seconds since last update
+        Precondition: dt is a number (int or float)
         """
+        bolts = self._playerBolts
         if not self.player_bolt_on_screen():
             if self._ship != None and input.is_key_down('spacebar'):
-                    self._bolts.append(Bolt(self._ship, 'ship'))
+                y = SHIP_BOTTOM + SHIP_HEIGHT + BOLT_HEIGHT/2
+                self.fireBolt(bolts, self._ship.x, y, BOLT_SPEED)
         else:
-            for bolt in self._bolts:
-                if bolt.isPlayerBolt():
-                    bolt.y += BOLT_SPEED
-                    if bolt.y >= GAME_HEIGHT + BOLT_HEIGHT/2:
-                        self._bolts.remove(bolt)
+            self.moveBolts(bolts, dt)
+            bolts.keepBetween('y', -math.inf, GAME_HEIGHT + BOLT_HEIGHT/2)
 
     def player_bolt_on_screen(self):
         """
         Helper function for update method that returns True/False if there is
         a player bolt active and on the screen.
         """
-        for bolt in self._bolts:
-            if bolt.isPlayerBolt():
-                return True
-        return False
-
-    def update_Alien_Bolt(self):
-        """
-        Creates and updates the downward motion of alien bolts. If the
-        designated amount of alien steps have passed, state of the alien bolt
-        becomes active and is fired downwards. After being fired, the bolt's x
-        position does not have to follow that of the alien. If the bolt reaches
-        the bottom of the screen, the bolt disappears.
-        """
-        if self._alienStep == self.steps_to_be_passed():
-            for bolt in self._bolts:
-                if not bolt.isPlayerBolt() and bolt.getBoltState()=='inactive':
-                    step = bolt.getWhenToFire()
-                    bolt.setBoltState('active')
-            self._alienStep -= step
+        return len(self._playerBolts) > 0
+
+    def fire_Alien_Bolt(self):
+        """
+        Fires the alien shots that are due.  If the designated amount of alien
+        steps have passed, a new bolt is fired downwards from the bottom of the
+        scheduled alien, where it is now, and the next shot is scheduled.
+
+        Shots are scheduled at least one alien step ahead, so none can be due
+        unless the aliens stepped in this update.
+        """
+        for slot in self._schedule.due(self._alienStep):
+            self.fireFrom(slot)
             self.addAlienBolt()
-        for bolt in self._bolts:
-            if not bolt.isPlayerBolt():
-                if bolt.getBoltState() == 'inactive':
-                    alien = bolt.getWhichAlien()
-                    bolt.x = alien.x
-                if bolt.getBoltState() == 'active':
-                    bolt.y -= BOLT_SPEED
-                    if bolt.y + BOLT_HEIGHT/2 <= 0:
-                        self._bolts.remove(bolt)
 
-    def steps_to_be_passed(self):
+    def update_Alien_Bolt(self, dt):
+        """
+        Updates the downward motion of alien bolts. After being fired, the
+        bolt's x position does not follow that of the alien. If the bolt
+        reaches the bottom of the screen, the bolt disappears.
+
+        Parameter dt: The time in seconds since last update
+        Precondition: dt is a number (int or float)
+        """
+        bolts = self._alienBolts
+        if len(bolts) > 0:
+            self.moveBolts(bolts, dt)
+            # The same test as y + BOLT_HEIGHT/2 > 0, which is exact near the bound
+            bolts.keepBetween('y', -BOLT_HEIGHT/2, math.inf)
+
+    def moveDivers(self, dt):
         """
-        Helper function for update_Alien_Bolt; returns amount of alien steps
-        to be passed in order to fire the alien bolt.
+        Flies every diver along its path, and puts back in the formation the
+        divers whose path is over.
+
+        A diver is at its slot plus the offset its path gives for the time it has
+        flown.  The offset comes from the lookup table of the path (see dives.py),
+        so a diver costs a table lookup per update.
+
+        Parameter dt: The time in seconds since last update
+        Precondition: dt is a number (int or float)
+        """
+        divers = self._divers
+        if len(divers) == 0:
+            return
+        ts = divers.column('t')
+        slotRows = divers.column('row')
+        slotCols = divers.column('col')
+        paths = divers.column('path')
+        signs = divers.column('sign')
+        slotXs = divers.column('sx')
+        slotYs = divers.column('sy')
+        xs = divers.column('x')
+        ys = divers.column('y')
+        # Plain floats, since NumPy scalars are slow in a loop
+        ox, oy = self._aliens.getOffset()
+        ox = float(ox)
+        oy = float(oy)
+        scale = float(self._aliens.getScale())
+
+        # The lookup of DivePath.offset, done here to save two calls per diver
+        tables = [path.getTable() for path in getPaths()]
+        landed = []
+        for row in range(len(divers)):
+            t = ts[row] + dt
+            ts[row] = t
+            tx, ty = tables[paths[row]]
+            at = t*BASE_RATE
+            i = int(at)
+            if i >= len(tx)-1:
+                landed.append(row)
+                continue
+            f = at - i
+            xs[row] = slotXs[row] + ox + signs[row]*(tx[i] + (tx[i+1]-tx[i])*f)*scale
+            ys[row] = slotYs[row] + oy + (ty[i] + (ty[i+1]-ty[i])*f)*scale
+
+        if landed:
+            for row in reversed(landed):
+                self._aliens.attach(slotRows[row], slotCols[row])
+                divers.removeRow(row)
+            self._formationChanged()
+
+    def downDiver(self, slot):
         """
-        steps = 0
+        Kills a diving alien where it is.
 
-        for bolt in self._bolts:
-            if not bolt.isPlayerBolt() and bolt.getBoltState() == 'inactive':
-                steps = bolt.getWhenToFire()
-                return steps
+        Parameter slot: the (row,col) slot of the alien
+        Precondition: a slot for which isDiving is True
+        """
+        row = self._diverRow(slot)
+        x = self._divers.column('x')[row]
+        y = self._divers.column('y')[row]
+        self._aliens.release(slot[0], slot[1], (x, y))
+        self._divers.removeRow(row)
+        self._shields.discard(slot)
+
+    def _diverRow(self, slot):
+        """
+        Returns the row of _divers holding the alien of the given slot.
 
-    def alien_collides(self, bolt):
+        Parameter slot: the (row,col) slot of the alien
+        Precondition: a slot for which isDiving is True
         """
-        Check all the aliens in the list if each collides with this specific
-        bolt. If it does, then the alien becomes None.
+        slotRows = self._divers.column('row')
+        slotCols = self._divers.column('col')
+        for row in range(len(self._divers)):
+            if slotRows[row] == slot[0] and slotCols[row] == slot[1]:
+                return row
 
-        Parameter bolt: the bolt that is tested if it collides with any alien
-        Precondition: a player bolt from the Bolt class
+    def _formationChanged(self):
         """
-        for row in range(ALIEN_ROWS):
-             for alien in range(ALIENS_IN_ROW):
-                 if self._aliens[row][alien] != None:
-                     if self._aliens[row][alien].collides(bolt):
-                         self._aliens[row][alien] = None
-                         self._bolts.remove(bolt)
-                         self._score += 20
-                         self._alienSpeed *= 0.97
+        Asks for the invasion check, and for the renderer to rebuild the aliens,
+        after an alien left the formation or came back to it.
+        """
+        self._systems.request('invasion')
+        if self._renderer != None:
+            self._renderer.invalidate()
 
-    def ship_collides(self, bolt):
+    def update_Barrage(self, dt):
         """
-        Check the ship if it collides with this specific bolt. If it does, the
-        ship becomes None.
+        Fires, moves and collides the alien bolts of bullet-hell mode.
+
+        Every bottom alien fires with chance BARRAGE_CHANCE per BASE_RATE update.
+        All bolts move and are tested against the bunkers, then the ship, in
+        vectorized batches.  If any bolt hits the ship, the ship becomes None.
 
-        Parameter bolt: the bolt that is tested if it collides with any ship
-        Precondition: an alien bolt from the Bolt class
+        Parameter dt: The time in seconds since last update
+        Precondition: dt is a number (int or float)
         """
-        if self._ship != None:
-            if self._ship.collides(bolt):
+        scale = dt*BASE_RATE
+        if self._aliens.count() > 0:
+            xs, ys = self._aliens.bottomPositions()
+            height = self._aliens.getAlienSize()[1]
+            self._barrage.volley(xs, ys, 1 - (1-BARRAGE_CHANCE)**scale, height)
+        self._barrage.advance(scale)
+        if self._bunkers.getCount() > 0:
+            self._barrage.strike(self._bunkers)
+        if self._ship != None and self._barrage.collides(self._ship) > 0:
+            self._ship = None
+
+    def setCollisions(self):
+        """
+        Creates the attribute _collisions, the collision pass of this wave.
+
+        Player bolts collide with aliens and alien bolts with the ship.  Divers
+        are hit by player bolts and collide with the ship.  Bolts of both kinds
+        are stopped by the bunkers, which are tested first since they stand in
+        front of both the ship and the aliens.  The ship and diver layers are
+        filled in by collide, since the ship and the divers come and go.
+        """
+        self._collisions = CollisionPass()
+        matrix = self._collisions.getMatrix()
+        matrix.enable(LAYER_PLAYER_BOLT, LAYER_BUNKER)
+        matrix.enable(LAYER_ALIEN_BOLT, LAYER_BUNKER)
+        self._collisions.addTest(LAYER_PLAYER_BOLT, LAYER_BUNKER, self.bunker_collides)
+        self._collisions.addTest(LAYER_ALIEN_BOLT, LAYER_BUNKER, self.bunker_collides)
+        matrix.enable(LAYER_PLAYER_BOLT, LAYER_ALIEN)
+        matrix.enable(LAYER_ALIEN_BOLT, LAYER_SHIP)
+        matrix.enable(LAYER_PLAYER_BOLT, LAYER_DIVER)
+        matrix.enable(LAYER_DIVER, LAYER_SHIP)
+        self._collisions.addTest(LAYER_PLAYER_BOLT, LAYER_ALIEN, self.alien_collides)
+        self._collisions.addTest(LAYER_ALIEN_BOLT, LAYER_SHIP, self.ship_collides)
+        self._collisions.addTest(LAYER_PLAYER_BOLT, LAYER_DIVER, self.diver_collides)
+        self._collisions.addTest(LAYER_DIVER, LAYER_SHIP, self.ship_rammed)
+        self._collisions.setBody(LAYER_ALIEN, self._aliens)
+        self._collisions.setBody(LAYER_PLAYER_BOLT, self._playerBolts)
+        self._collisions.setBody(LAYER_ALIEN_BOLT, self._alienBolts)
+        if self._bunkers.getCount() > 0:
+            self._collisions.setBody(LAYER_BUNKER, self._bunkers)
+
+    def collide(self):
+        """
+        Helper function for update method that runs the collision pass and
+        resolves its contacts.
+
+        A player bolt that hits an alien, in the formation or diving, kills it
+        unless its shield is up, and is removed.  An alien bolt
+        that hits the ship destroys it (the ship becomes None) and is removed.  A
+        bolt that hits a bunker cuts a crater in it and is removed.  A
+        diver that flies into the ship destroys it and dies with it.
+        Contacts are resolved in order, and a contact whose alien or ship was
+        already destroyed by an earlier one is ignored, so only the first bolt
+        to hit the ship is used up.  A bolt is used up by the first contact it
+        makes.
+        """
+        self._collisions.setBody(LAYER_SHIP, self._ship)
+        self._collisions.setBody(LAYER_DIVER, self._divers if len(self._divers) else None)
+        contacts = self._collisions.run()
+        if not contacts:
+            return
+
+        spent = {LAYER_PLAYER_BOLT: set(), LAYER_ALIEN_BOLT: set(), LAYER_DIVER: set()}
+        for (layer, row, target, which) in contacts:
+            if row in spent[layer]:
+                continue
+            if target == LAYER_BUNKER:
+                self._bunkers.erode(which)
+            elif target == LAYER_ALIEN and self._aliens.isAlive(which[0], which[1]):
+                if which not in self._shields:
+                    self._aliens.kill(which[0], which[1])
+                    self._score += 20
+                    self._alienSpeed *= 0.97
+                    self._systems.request('invasion')
+            elif target == LAYER_DIVER and self._aliens.isAway(which[0], which[1]):
+                if which not in self._shields:
+                    self.downDiver(which)
+                    self._score += 20
+                    self._alienSpeed *= 0.97
+            elif (target == LAYER_SHIP and self._ship != None and
+                    (layer != LAYER_DIVER or self._aliens.isAway(row[0], row[1]))):
                 self._ship = None
-                self._bolts.remove(bolt)
+            else:
+                continue
+            spent[layer].add(row)
+
+        for slot in spent[LAYER_DIVER]:
+            self.downDiver(slot)
+
+        for (layer, bolts) in ((LAYER_PLAYER_BOLT, self._playerBolts),
+                               (LAYER_ALIEN_BOLT, self._alienBolts)):
+            if spent[layer]:
+                bolts.removeRows(spent[layer])
+
+    def alien_collides(self, bolts, aliens):
+        """
+        Returns the contacts between player bolts and aliens, as (row, (row,col))
+        pairs of a bolt row and an alien slot.
+
+        Each bolt is swept from its position at the start of the step, and hits
+        at most one alien: the first it reaches.
+
+        Parameter bolts: the player bolts
+        Precondition: an Archetype of _BOLT_COMPONENTS
+
+        Parameter aliens: the aliens
+        Precondition: a Formation object
+        """
+        contacts = []
+        if len(bolts) == 0:
+            return contacts
+        xs = bolts.column('x')
+        ys = bolts.column('y')
+        pys = bolts.column('py')
+        for row in range(len(bolts)):
+            hit = aliens.collides(xs[row], min(ys[row], pys[row]), max(ys[row], pys[row]))
+            if hit != None:
+                contacts.append((row, hit))
+        return contacts
+
+    def ship_collides(self, bolts, ship):
+        """
+        Returns the contacts between alien bolts and the ship, as (row, None)
+        pairs with a bolt row.
+
+        Each bolt is swept from its position at the start of the step.
+
+        Parameter bolts: the alien bolts
+        Precondition: an Archetype of _BOLT_COMPONENTS
+
+        Parameter ship: the player ship
+        Precondition: a Ship object
+        """
+        contacts = []
+        if len(bolts) == 0:
+            return contacts
+        xs = bolts.column('x')
+        ys = bolts.column('y')
+        pys = bolts.column('py')
+        for row in range(len(bolts)):
+            if ship.collides(xs[row], min(ys[row], pys[row]), max(ys[row], pys[row])):
+                contacts.append((row, None))
+        return contacts
+
+    def bunker_collides(self, bolts, bunkers):
+        """
+        Returns the contacts between bolts and bunkers, as (row, (bunker,row,col))
+        pairs of a bolt row and the cell the bolt hits.
+
+        Each bolt is swept from its position at the start of the step (see
+        Bunkers.hit).  The bunkers are tested as they were at the start of the
+        step, so two bolts hitting the same spot in one step are both stopped.
+
+        Parameter bolts: the player or alien bolts
+        Precondition: an Archetype of _BOLT_COMPONENTS
+
+        Parameter bunkers: the bunkers
+        Precondition: a Bunkers object
+        """
+        contacts = []
+        if len(bolts) == 0:
+            return contacts
+        xs = bolts.column('x')
+        ys = bolts.column('y')
+        pys = bolts.column('py')
+        vys = bolts.column('vy')
+        for row in range(len(bolts)):
+            impact = bunkers.hit(xs[row], min(ys[row], pys[row]), max(ys[row], pys[row]),
+                                 vys[row] < 0)
+            if impact != None:
+                contacts.append((row, impact))
+        return contacts
+
+    def diver_collides(self, bolts, divers):
+        """
+        Returns the contacts between player bolts and divers, as (row, (row,col))
+        pairs of a bolt row and the slot of a diver.
+
+        Each bolt is swept from its position at the start of the step, like in
+        Formation.collides, and hits at most one diver: the lowest.
+
+        Parameter bolts: the player bolts
+        Precondition: an Archetype of _BOLT_COMPONENTS
+
+        Parameter divers: the divers
+        Precondition: an Archetype of _DIVER_COMPONENTS
+        """
+        contacts = []
+        if len(bolts) == 0:
+            return contacts
+        xs = bolts.column('x')
+        ys = bolts.column('y')
+        pys = bolts.column('py')
+        w, h = self._aliens.getAlienSize()
+        reachX = float(w/2 + BOLT_WIDTH/2)
+        reachY = float(h/2 + BOLT_HEIGHT/2)
+        dxs = divers.column('x')
+        dys = divers.column('y')
+        for row in range(len(bolts)):
+            low = min(ys[row], pys[row])
+            high = max(ys[row], pys[row])
+            hit = None
+            for i in range(len(divers)):
+                if (abs(dxs[i] - xs[row]) < reachX and dys[i] - reachY < high and
+                        dys[i] + reachY > low and (hit == None or dys[i] < dys[hit])):
+                    hit = i
+            if hit != None:
+                slot = (divers.column('row')[hit], divers.column('col')[hit])
+                contacts.append((row, slot))
+        return contacts
+
+    def ship_rammed(self, divers, ship):
+        """
+        Returns the contacts between divers and the ship, as ((row,col), None)
+        pairs with the slot of a diver.
+
+        Parameter divers: the divers
+        Precondition: an Archetype of _DIVER_COMPONENTS
+
+        Parameter ship: the player ship
+        Precondition: a Ship object
+        """
+        contacts = []
+        w, h = self._aliens.getAlienSize()
+        reachX = float((w + SHIP_WIDTH)/2)
+        reachY = float((h + SHIP_HEIGHT)/2)
+        xs = divers.column('x')
+        ys = divers.column('y')
+        for i in range(len(divers)):
+            if abs(xs[i] - ship.x) < reachX and abs(ys[i] - ship.y) < reachY:
+                slot = (divers.column('row')[i], divers.column('col')[i])
+                contacts.append((slot, None))
+        return contacts
+
+    def checkInvasion(self):
+        """
+        Sets the attribute _invaded from the current formation.
+
+        This runs only when the formation changes: after an alien step or a kill.
+        """
+        self._invaded = self._aliens.count() > 0 and self.invation()
 
     def invation(self):
         """
         Returns True when aliens end up invading under the defense line.
+
+        Precondition: at least one alien is alive
         """
-        for row in self._aliens:
-            for alien in row:
-                if alien != None:
-                    lowest_alien = alien
-        if lowest_alien.y - ALIEN_HEIGHT/2 <= DEFENSE_LINE:
+        if self._aliens.lowest() - self._aliens.getAlienSize()[1]/2 <= DEFENSE_LINE:
             return True
         else:
             return False
@@ -475,12 +1733,99 @@ class Wave(object):
     def gameOver(self):
         """
         Checks if the game is over by checking if
-        (1) all the aliens are killed or
-        (2) any alien dips below the defense line
+        (1) all the aliens are killed, diving ones included, or
+        (2) any alien in the formation dips below the defense line
         """
-        if self._aliens == [[None]*ALIENS_IN_ROW]*ALIEN_ROWS:
+        if self._aliens.count() == 0 and self._aliens.countAway() == 0:
             self._gameResult = True
             return True
-        elif self._lives == 0 or self.invation():
+        elif self._lives == 0 or self._invaded:
             self._gameResult = False
             return True
+
+
+def _accumulate(start, step, n):
+    """
+    Returns the n values start+step, start+2*step, ... as repeated addition gives them.
+
+    NumPy accumulate adds in order, so each value is rounded exactly like the
+    running sum x += step in a loop, not like start + i*step.
+
+    Parameter start: the value before the first step
+    Precondition: a number
+
+    Parameter step: the amount added each time
+    Precondition: a number
+
+    Parameter n: the number of values
+    Precondition: an int > 0
+    """
+    values = np.empty(n+1)
+    values[0] = start
+    values[1:] = step
+    return np.add.accumulate(values)[1:]
+
+
+class WaveFactory(object):
+    """
+    A class that hands out new waves built from prebuilt formation templates.
+
+    Building a Formation lays out every slot and computes every alien image.  The
+    factory does that once per formation size and shape, and gives each new wave a copy
+    of the template, which is a handful of array copies.
+
+    INSTANCE ATTRIBUTES:
+        _templates: the starting formation for each size and shape
+                    [dict of (rows,cols,shape) to Formation]
+    """
+
+    # INITIALIZER
+    def __init__(self):
+        """
+        Creates a factory with no templates yet.
+        """
+        self._templates = {}
+
+    # FACTORY METHODS
+    def getTemplate(self, config):
+        """
+        Returns the starting formation of the size and shape of config, building it
+        the first time.
+
+        The template must not be changed; use a copy.
+
+        Parameter config: the settings of the wave
+        Precondition: a Config object
+        """
+        key = (config.getRows(), config.getCols(), config.getShape())
+        template = self._templates.get(key)
+        if template is None:
+            template = Formation(config)
+            self._templates[key] = template
+        return template
+
+    def make(self, lives, alienspeed, score, config=None):
+        """
+        Returns a new wave with the settings of config, a starting formation and
+        undamaged bunkers.
+
+        The parameters are those of Wave.  A formation beyond the command line
+        limits, like MEGA_ROWS by MEGA_COLS, is scaled down to fit the screen (see
+        Formation.fitScale).
+
+        Parameter lives: number of lives that the player is initially given
+        Precondition: an int between 1 <= lives <= SHIP_LIVES
+
+        Parameter alienspeed: the number of seconds between alien steps
+        Precondition: a float between 0 < alienspeed <= 1
+
+        Parameter score: score collected when aliens have been killed
+        Precondition: an int greater than 0
+
+        Parameter config: the settings of the wave, seed and all
+        Precondition: a Config object, or None for Config()
+        """
+        if config == None:
+            config = Config()
+        formation = self.getTemplate(config).copy()
+        return Wave(lives, alienspeed, score, config, formation)